@@ -356,7 +356,7 @@ async def upload_avatar(
         
         await file.close()
         
-        file_url = storage_service.upload_file(
+        file_url = await storage_service.upload_file_async(
             file_content=contents,
             object_name=s3_object_path,
             content_type=file.content_type
@@ -3,7 +3,7 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from app.core.dependencies import get_current_user, get_db
+from app.core.dependencies import conditional_etag, get_current_user, get_db
 from app.models.user import User
 from app.models.user_badge import UserBadge
 from app.schemas.badge import (
@@ -27,6 +27,7 @@ router = APIRouter()
 def get_badges(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
+    etag: str = Depends(conditional_etag),
 ):
     badges_list, total_earned, new_badge_ids = get_all_badges_with_status(current_user, db)
     
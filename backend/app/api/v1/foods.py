@@ -1,12 +1,14 @@
 from fastapi import APIRouter, Depends, Query, HTTPException, status
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, func, text
+from sqlalchemy import func
 from typing import List, Optional
 from pydantic import BaseModel
 
 from app.core.dependencies import get_current_user, get_db
 from app.models.user import User
-from app.models.food import Food, FoodNutrient, BrandedFood
+from app.models.food import Food, FoodNutrient, BrandedFood, FoodMacros
+from app.services.food_search import InvalidCursorError, search_food_ids
+from app.services.food_suggest import food_suggest
 
 router = APIRouter()
 
@@ -47,6 +49,21 @@ class FoodSearchResponse(BaseModel):
     limit: int
     lang: str = "en"
     foods: List[FoodItemResponse]
+    next_cursor: Optional[str] = None
+    has_more: bool = False
+    corrected_query: Optional[str] = None
+
+
+class FoodSuggestion(BaseModel):
+    name: str
+    fdc_id: int
+    popularity: Optional[int] = None
+
+
+class FoodSuggestResponse(BaseModel):
+    prefix: str
+    lang: str = "en"
+    suggestions: List[FoodSuggestion]
 
 
 def get_food_name(food: Food, lang: str = 'en') -> str:
@@ -57,17 +74,44 @@ def get_food_name(food: Food, lang: str = 'en') -> str:
     return food.description
 
 
-def build_food_response(food: Food, nutrients_dict: dict, branded_info: Optional[BrandedFood] = None, lang: str = 'en') -> FoodItemResponse:
+def _amount(value) -> Optional[float]:
+    return float(value) if value else None
+
+
+def load_macros(db: Session, foods: List[Food]) -> dict:
+    # Foods without a food_macros row yet get one pivoted from food_nutrients/branded_foods.
+    macros = {food.fdc_id: food.macros for food in foods if food.macros is not None}
+    missing = [food.fdc_id for food in foods if food.macros is None]
+    if not missing:
+        return macros
+
+    pivoted = {fdc_id: FoodMacros(fdc_id=fdc_id) for fdc_id in missing}
+    nutrients = db.query(FoodNutrient).filter(
+        FoodNutrient.fdc_id.in_(missing),
+        FoodNutrient.nutrient_id.in_(NUTRIENT_MAP.keys())
+    ).all()
+    for nutrient in nutrients:
+        setattr(pivoted[nutrient.fdc_id], NUTRIENT_MAP[nutrient.nutrient_id], nutrient.amount)
+    for branded in db.query(BrandedFood).filter(BrandedFood.fdc_id.in_(missing)).all():
+        entry = pivoted[branded.fdc_id]
+        entry.brand_owner = branded.brand_owner
+        entry.serving_size = branded.serving_size
+        entry.serving_size_unit = branded.serving_size_unit
+    macros.update(pivoted)
+    return macros
+
+
+def build_food_response(food: Food, macros: Optional[FoodMacros], lang: str = 'en') -> FoodItemResponse:
     return FoodItemResponse(
         fdc_id=food.fdc_id,
         name=get_food_name(food, lang),
-        calories=nutrients_dict.get(1008),
-        protein=nutrients_dict.get(1003),
-        fat=nutrients_dict.get(1004),
-        carbs=nutrients_dict.get(1005),
-        fiber=nutrients_dict.get(1079),
-        portion=f"{branded_info.serving_size}{branded_info.serving_size_unit}" if branded_info and branded_info.serving_size else "100g",
-        brand=branded_info.brand_owner if branded_info else None,
+        calories=_amount(macros.calories) if macros else None,
+        protein=_amount(macros.protein) if macros else None,
+        fat=_amount(macros.fat) if macros else None,
+        carbs=_amount(macros.carbs) if macros else None,
+        fiber=_amount(macros.fiber) if macros else None,
+        portion=f"{macros.serving_size}{macros.serving_size_unit}" if macros and macros.serving_size else "100g",
+        brand=macros.brand_owner if macros else None,
         source=food.data_type
     )
 
@@ -76,74 +120,22 @@ def build_food_response(food: Food, nutrients_dict: dict, branded_info: Optional
 async def search_foods(
     q: str = Query(..., min_length=1, max_length=100, description="Поисковый запрос"),
     limit: int = Query(50, ge=1, le=100, description="Количество результатов"),
-    offset: int = Query(0, ge=0, description="Смещение для пагинации"),
+    offset: int = Query(0, ge=0, deprecated=True, description="Смещение для пагинации; используйте cursor"),
+    cursor: Optional[str] = Query(None, max_length=64, description="next_cursor из предыдущего ответа"),
     source: str = Query("all", regex="^(all|foundation|branded|survey)$", description="Источник данных"),
     lang: str = Query("en", regex="^(en|ru|uz)$", description="Язык результатов"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     try:
-        query = db.query(Food)
-        if source != "all":
-            if source == "foundation":
-                query = query.filter(Food.data_type == "foundation_food")
-            elif source == "branded":
-                query = query.filter(Food.data_type == "branded_food")
-            elif source == "survey":
-                query = query.filter(Food.data_type.in_(["survey_fndds_food", "sample_food"]))
-        
-        search_term = q.strip().lower()
-        if lang == 'ru':
-            query = query.filter(
-                or_(
-                    Food.description_ru.ilike(f"%{search_term}%"),
-                    Food.description.ilike(f"%{search_term}%")
-                )
-            )
-        elif lang == 'uz':
-            query = query.filter(
-                or_(
-                    Food.description_uz.ilike(f"%{search_term}%"),
-                    Food.description.ilike(f"%{search_term}%")
-                )
-            )
-        else:
-            query = query.filter(
-                or_(
-                    Food.description.ilike(f"%{search_term}%"),
-                    text(f"MATCH(description) AGAINST('{search_term}' IN BOOLEAN MODE)")
-                )
-            )
-        
-        total = query.count()
-        
-        foods = query.order_by(Food.description).offset(offset).limit(limit).all()
-        fdc_ids = [f.fdc_id for f in foods]
-        nutrients = db.query(FoodNutrient).filter(
-            FoodNutrient.fdc_id.in_(fdc_ids),
-            FoodNutrient.nutrient_id.in_(NUTRIENT_MAP.keys())
-        ).all()
-        
-        nutrients_by_food = {}
-        for nutrient in nutrients:
-            if nutrient.fdc_id not in nutrients_by_food:
-                nutrients_by_food[nutrient.fdc_id] = {}
-            nutrients_by_food[nutrient.fdc_id][nutrient.nutrient_id] = float(nutrient.amount) if nutrient.amount else None
-        
-        branded_info = {}
-        if source in ("all", "branded"):
-            branded = db.query(BrandedFood).filter(BrandedFood.fdc_id.in_(fdc_ids)).all()
-            branded_info = {b.fdc_id: b for b in branded}
-        
-        result_foods = [
-            build_food_response(
-                food,
-                nutrients_by_food.get(food.fdc_id, {}),
-                branded_info.get(food.fdc_id),
-                lang
-            )
-            for food in foods
-        ]
+        fdc_ids, total, next_cursor, corrected_query = search_food_ids(db, q, lang, source, limit, offset, cursor)
+        by_id = {
+            f.fdc_id: f
+            for f in db.query(Food).options(joinedload(Food.macros)).filter(Food.fdc_id.in_(fdc_ids))
+        } if fdc_ids else {}
+        foods = [by_id[fdc_id] for fdc_id in fdc_ids if fdc_id in by_id]
+        macros = load_macros(db, foods)
+        result_foods = [build_food_response(food, macros.get(food.fdc_id), lang) for food in foods]
         
         return FoodSearchResponse(
             query=q,
@@ -153,9 +145,17 @@ async def search_foods(
             offset=offset,
             limit=limit,
             lang=lang,
-            foods=result_foods
+            foods=result_foods,
+            next_cursor=next_cursor,
+            has_more=next_cursor is not None,
+            corrected_query=corrected_query
         )
         
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid search cursor"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -183,33 +183,9 @@ async def get_foods(
         
         total = query.count()
         
-        foods = query.order_by(Food.fdc_id).offset(offset).limit(limit).all()
-        fdc_ids = [f.fdc_id for f in foods]
-        nutrients = db.query(FoodNutrient).filter(
-            FoodNutrient.fdc_id.in_(fdc_ids),
-            FoodNutrient.nutrient_id.in_(NUTRIENT_MAP.keys())
-        ).all()
-        
-        nutrients_by_food = {}
-        for nutrient in nutrients:
-            if nutrient.fdc_id not in nutrients_by_food:
-                nutrients_by_food[nutrient.fdc_id] = {}
-            nutrients_by_food[nutrient.fdc_id][nutrient.nutrient_id] = float(nutrient.amount) if nutrient.amount else None
-        
-        branded_info = {}
-        if source in ("all", "branded"):
-            branded = db.query(BrandedFood).filter(BrandedFood.fdc_id.in_(fdc_ids)).all()
-            branded_info = {b.fdc_id: b for b in branded}
-        
-        result_foods = [
-            build_food_response(
-                food,
-                nutrients_by_food.get(food.fdc_id, {}),
-                branded_info.get(food.fdc_id),
-                lang
-            )
-            for food in foods
-        ]
+        foods = query.options(joinedload(Food.macros)).order_by(Food.fdc_id).offset(offset).limit(limit).all()
+        macros = load_macros(db, foods)
+        result_foods = [build_food_response(food, macros.get(food.fdc_id), lang) for food in foods]
         
         return FoodSearchResponse(
             query=None,
@@ -219,7 +195,8 @@ async def get_foods(
             offset=offset,
             limit=limit,
             lang=lang,
-            foods=result_foods
+            foods=result_foods,
+            has_more=offset + len(result_foods) < total
         )
         
     except Exception as e:
@@ -229,6 +206,32 @@ async def get_foods(
         )
 
 
+@router.get("/foods/suggest", response_model=FoodSuggestResponse)
+async def suggest_foods(
+    prefix: str = Query(..., min_length=1, max_length=100, description="Начало названия продукта"),
+    limit: int = Query(10, ge=1, le=20, description="Количество подсказок"),
+    lang: str = Query("en", regex="^(en|ru|uz)$", description="Язык подсказок"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    suggestions = food_suggest.suggest(prefix, lang, limit)
+    if suggestions is None:
+        try:
+            fdc_ids = search_food_ids(db, prefix, lang, "all", limit)[0]
+            by_id = {f.fdc_id: f for f in db.query(Food).filter(Food.fdc_id.in_(fdc_ids))} if fdc_ids else {}
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error suggesting foods: {str(e)}"
+            )
+        suggestions = [
+            {"name": get_food_name(by_id[fdc_id], lang), "fdc_id": fdc_id}
+            for fdc_id in fdc_ids if fdc_id in by_id
+        ]
+
+    return FoodSuggestResponse(prefix=prefix, lang=lang, suggestions=suggestions)
+
+
 @router.get("/foods/{fdc_id}", response_model=FoodItemResponse)
 async def get_food_by_id(
     fdc_id: int,
@@ -236,7 +239,7 @@ async def get_food_by_id(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    food = db.query(Food).filter(Food.fdc_id == fdc_id).first()
+    food = db.query(Food).options(joinedload(Food.macros)).filter(Food.fdc_id == fdc_id).first()
     
     if not food:
         raise HTTPException(
@@ -244,16 +247,7 @@ async def get_food_by_id(
             detail=f"Food with fdc_id {fdc_id} not found"
         )
     
-    nutrients = db.query(FoodNutrient).filter(
-        FoodNutrient.fdc_id == fdc_id,
-        FoodNutrient.nutrient_id.in_(NUTRIENT_MAP.keys())
-    ).all()
-    
-    nutrients_dict = {n.nutrient_id: float(n.amount) if n.amount else None for n in nutrients}
-    
-    branded = db.query(BrandedFood).filter(BrandedFood.fdc_id == fdc_id).first()
-    
-    return build_food_response(food, nutrients_dict, branded, lang)
+    return build_food_response(food, load_macros(db, [food]).get(fdc_id), lang)
 
 
 @router.get("/foods/sources")
@@ -1,75 +1,64 @@
+import asyncio
 import uuid
 import json
 import re
-import tempfile
-import os
 from pathlib import Path
-from datetime import datetime, timezone, timedelta
+from datetime import date, datetime, timezone, timedelta
 from typing import Optional, List, Dict, Any
 
-import httpx
-from fastapi import APIRouter, Depends, File, Form, UploadFile, HTTPException, status, Query, Header, Body
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, File, Form, UploadFile, HTTPException, status, Query, Header, Body, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from app.core.dependencies import get_current_user, get_db
+from app.core.dependencies import conditional_etag, get_current_user, get_db
+from app.core.database import SessionLocal
 from app.core.config import settings
 from app.models.user import User
 from app.models.meal_photo import MealPhoto
 from app.models.water_log import WaterLog
-from app.models.onboarding_data import OnboardingData
-from app.schemas.meal_photo import MealPhotoUploadResponse, MealPhotoResponse, MealPhotoCreate
+from app.models.meal_analysis_job import MealAnalysisJob, AnalysisStatus
+from app.schemas.meal_photo import MealPhotoUploadResponse, MealPhotoResponse, MealPhotoCreate, MealAnalysisJobResponse
 from app.schemas.water import WaterCreate, WaterDailyResponse, WaterEntry
 from app.services.storage import storage_service
 from app.services.ai_service import ai_service
 from app.utils.date_utils import get_day_range_utc
 from app.services.badge_service import check_and_award_badges
+from app.services.meal_analysis import meal_analysis_pool, analysis_events, analyze_meal_bytes, apply_nutrition, job_timings
+from app.services.image_processing import normalize_image_async, ImageDecodeError
+from app.services.barcode_lookup import lookup_local_product, product_from_openfoodfacts
+from app.services.openfoodfacts import openfoodfacts_service
+from app.services.barcode_enrichment import barcode_enrichment_service
+from app.services.daily_nutrition import MACRO_FIELDS, format_health_score, get_days, remember_timezone, rollup_covers
+from app.services.streak_service import current_streak
+from app.services.data_version import CACHE_CONTROL, etag_for, require_modified
+from app.services.meal_range import MAX_RANGE_DAYS, DayTotals, day_origin, iter_day_summaries, rollup_day_summaries, rollup_totals
+from app.services.photo_variants import (
+    PHOTO_SIZE_PATTERN,
+    apply_variant_paths,
+    delete_photo_objects,
+    delete_photo_objects_sync,
+    is_stored_file,
+    meal_image_url,
+    photo_object_paths,
+    photo_path_for_size,
+    upload_photo_objects,
+    variant_paths,
+)
 
 router = APIRouter()
 
-def format_health_score(score: Optional[int]) -> Optional[float]:
-    if score is None:
-        return None
-    score_float = float(score)
-    if score_float > 100:
-        score_float = 10.0
-    elif score_float > 10:
-        score_float = score_float / 10.0
-    return round(min(max(score_float, 0), 10), 1)
-
-async def fetch_openfoodfacts_product(barcode: str) -> Optional[Dict[str, Any]]:
-    hosts = [
-        "https://world.openfoodfacts.org",
-        "https://ru.openfoodfacts.org",
-    ]
-
-    for host in hosts:
-        url = f"{host}/api/v2/product/{barcode}.json"
-        try:
-            async with httpx.AsyncClient(timeout=12) as client:
-                resp = await client.get(url)
-                if resp.status_code == 404:
-                    continue
-                resp.raise_for_status()
-                data = resp.json()
-                if data.get("status") == 1 and data.get("product"):
-                    return data.get("product")
-        except httpx.HTTPStatusError:
-            continue
-        except Exception:
-            continue
-
-    return None
-
+RANGE_FETCH_SIZE = 500
 
 @router.post("/meals/upload", response_model=MealPhotoUploadResponse, status_code=status.HTTP_201_CREATED)
 async def upload_meal_photo(
+    response: Response,
     file: UploadFile = File(...),
     barcode: str = Form(default=""),
     meal_name: str = Form(default=""),
     client_timestamp: Optional[str] = Form(default=None),
     client_tz_offset_minutes: Optional[int] = Form(default=None),
+    async_analysis: bool = Form(default=False),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
@@ -91,15 +80,13 @@ async def upload_meal_photo(
     original_filename = file.filename or "photo"
     sanitized_filename = sanitize_filename(original_filename)
     file_ext = Path(sanitized_filename).suffix or ".jpg"
-    unique_filename = f"{uuid.uuid4()}{file_ext}"
-    
-    s3_object_path = f"meal_photos/{current_user.id}/{unique_filename}"
+    s3_object_path = None
+    stored_objects: Dict[str, bytes] = {}
 
     try:
         contents = await file.read()
-        file_size = len(contents)
         
-        if not validate_file_size(file_size, max_size_mb=settings.max_file_size_mb):
+        if not validate_file_size(len(contents), max_size_mb=settings.max_file_size_mb):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"File too large. Maximum size: {settings.max_file_size_mb}MB"
@@ -113,12 +100,31 @@ async def upload_meal_photo(
         
         await file.close()
 
-        file_url = storage_service.upload_file(
-            file_content=contents,
-            object_name=s3_object_path,
-            content_type=file.content_type
-        )
-        
+        try:
+            normalized = await normalize_image_async(contents)
+        except ImageDecodeError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Could not decode image"
+            )
+
+        if normalized:
+            stored_bytes, stored_type, file_ext = normalized.data, normalized.content_type, normalized.extension
+            ai_bytes, ai_type = normalized.ai_data, normalized.ai_content_type
+        else:
+            stored_bytes, stored_type = contents, file.content_type
+            ai_bytes, ai_type = contents, file.content_type
+
+        file_size = len(stored_bytes)
+        unique_filename = f"{uuid.uuid4()}{file_ext}"
+        s3_object_path = f"meal_photos/{current_user.id}/{unique_filename}"
+
+        stored_objects = {s3_object_path: stored_bytes}
+        photo_variant_paths = {}
+        if normalized and normalized.variants:
+            photo_variant_paths = variant_paths(s3_object_path, normalized.variants, file_ext)
+            for size, data in normalized.variants.items():
+                stored_objects[photo_variant_paths[size]] = data
 
         if client_timestamp and client_tz_offset_minutes is not None:
             try:
@@ -135,59 +141,59 @@ async def upload_meal_photo(
         else:
             created_at_now = datetime.now(timezone.utc)
 
-        temp_file_path = None
-        try:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as temp_file:
-                temp_file.write(contents)
-                temp_file_path = Path(temp_file.name)
-            
-            nutrition = await ai_service.analyze_meal_photo(
-                file_path=temp_file_path,
-                meal_name_hint=meal_name_value,
-            )
-            
-            import logging
-            logger = logging.getLogger(__name__)
-            if nutrition is None:
-                logger.warning(f"AI service returned None for meal photo analysis. User: {current_user.id}")
-            else:
-                logger.info(f"AI analysis result: {nutrition}")
-        finally:
-            if temp_file_path and temp_file_path.exists():
-                try:
-                    os.unlink(temp_file_path)
-                except Exception:
-                    pass
-
-        detected_name = nutrition.get("detected_meal_name") if nutrition else (meal_name_value or "Блюдо")
-        calories_val = nutrition.get("calories") if nutrition else 250
-        protein_val = nutrition.get("protein") if nutrition else 10
-        fat_val = nutrition.get("fat") if nutrition else 8
-        carbs_val = nutrition.get("carbs") if nutrition else 30
-        fiber_val = nutrition.get("fiber") if nutrition else 2
-        sugar_val = nutrition.get("sugar") if nutrition else 5
-        sodium_val = nutrition.get("sodium") if nutrition else 200
-        health_score_val = nutrition.get("health_score") if nutrition else 5
-
         meal_photo = MealPhoto(
             user_id=current_user.id,
             file_path=s3_object_path,
             file_name=file.filename or unique_filename,
             file_size=file_size,
-            mime_type=file.content_type,
+            mime_type=stored_type,
             barcode=barcode_value,
             meal_name=meal_name_value,
-            detected_meal_name=detected_name,
-            calories=calories_val,
-            protein=protein_val,
-            fat=fat_val,
-            carbs=carbs_val,
-            fiber=fiber_val,
-            sugar=sugar_val,
-            sodium=sodium_val,
-            health_score=health_score_val,
             created_at=created_at_now,
         )
+        apply_variant_paths(meal_photo, photo_variant_paths)
+        remember_timezone(db, current_user, client_tz_offset_minutes)
+
+        if async_analysis and meal_analysis_pool.reserve():
+            try:
+                await upload_photo_objects(stored_objects, stored_type)
+
+                meal_photo.detected_meal_name = meal_name_value
+                meal_photo.analysis_status = AnalysisStatus.PENDING.value
+                db.add(meal_photo)
+                db.flush()
+                job = meal_analysis_pool.create_job(db, meal_photo)
+                db.commit()
+            except BaseException:
+                meal_analysis_pool.release()
+                raise
+
+            meal_analysis_pool.enqueue(job.id, current_user.id, ai_bytes, ai_type, meal_name_value)
+            db.refresh(meal_photo)
+            response.status_code = status.HTTP_202_ACCEPTED
+
+            return MealPhotoUploadResponse(
+                photo=MealPhotoResponse.model_validate(meal_photo),
+                url=f"{settings.api_domain}/api/v1/meals/photos/{meal_photo.id}",
+                job_id=job.id,
+            )
+
+        analysis_task = asyncio.create_task(analyze_meal_bytes(ai_bytes, ai_type, meal_name_value, current_user.id))
+        try:
+            await upload_photo_objects(stored_objects, stored_type)
+        except Exception:
+            analysis_task.cancel()
+            raise
+        nutrition = await analysis_task
+        
+        import logging
+        logger = logging.getLogger(__name__)
+        if nutrition is None:
+            logger.warning(f"AI service returned None for meal photo analysis. User: {current_user.id}")
+        else:
+            logger.info(f"AI analysis result: {nutrition}")
+
+        apply_nutrition(meal_photo, nutrition, meal_name_value)
 
         db.add(meal_photo)
         db.commit()
@@ -206,19 +212,150 @@ async def upload_meal_photo(
     except HTTPException:
         raise
     except Exception:
-        try:
-            storage_service.delete_file(s3_object_path)
-        except:
-            pass
+        if stored_objects:
+            await delete_photo_objects(list(stored_objects))
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error saving file"
         )
 
+@router.get("/meals/jobs/{job_id}", response_model=MealAnalysisJobResponse)
+def get_meal_analysis_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    job = db.query(MealAnalysisJob).filter(
+        MealAnalysisJob.id == job_id,
+        MealAnalysisJob.user_id == current_user.id
+    ).first()
+
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+
+    return _job_response(job)
+
+
+TERMINAL_JOB_STATUSES = (AnalysisStatus.COMPLETED.value, AnalysisStatus.FAILED.value)
+
+
+def _job_response(job: MealAnalysisJob) -> MealAnalysisJobResponse:
+    photo = None
+    if job.status in TERMINAL_JOB_STATUSES and job.meal_photo:
+        photo = MealPhotoResponse.model_validate(job.meal_photo)
+
+    partial = None
+    if job.partial_result:
+        try:
+            partial = json.loads(job.partial_result)
+        except (json.JSONDecodeError, TypeError):
+            partial = None
+
+    return MealAnalysisJobResponse(
+        job_id=job.id,
+        status=job.status,
+        meal_photo_id=job.meal_photo_id,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        partial=partial,
+        photo=photo,
+        **job_timings(job),
+    )
+
+
+def _load_job_response(job_id: str, user_id: int) -> Optional[MealAnalysisJobResponse]:
+    db = SessionLocal()
+    try:
+        job = db.query(MealAnalysisJob).filter(
+            MealAnalysisJob.id == job_id,
+            MealAnalysisJob.user_id == user_id
+        ).first()
+        return _job_response(job) if job else None
+    finally:
+        db.close()
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+@router.get("/meals/jobs/{job_id}/events")
+async def stream_meal_analysis_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+):
+    user_id = current_user.id
+    initial = await asyncio.to_thread(_load_job_response, job_id, user_id)
+    if initial is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+
+    async def events():
+        queue = analysis_events.subscribe(job_id)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.meal_analysis_sse_timeout
+        sent: Dict[str, Any] = {}
+        snapshot = initial
+        try:
+            while True:
+                fresh = {k: v for k, v in (snapshot.partial or {}).items() if sent.get(k) != v}
+                if fresh:
+                    sent.update(fresh)
+                    yield _sse("partial", fresh)
+                if snapshot.status in TERMINAL_JOB_STATUSES:
+                    yield _sse(snapshot.status, snapshot.model_dump(mode="json"))
+                    return
+
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    yield _sse("timeout", {"status": snapshot.status})
+                    return
+
+                try:
+                    event, data = await asyncio.wait_for(
+                        queue.get(), timeout=min(settings.meal_analysis_sse_poll_seconds, remaining)
+                    )
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                else:
+                    if event == "partial":
+                        fresh = {k: v for k, v in data.items() if sent.get(k) != v}
+                        if fresh:
+                            sent.update(fresh)
+                            yield _sse("partial", fresh)
+                        continue
+                    if event == "reset":
+                        sent.clear()
+                        yield _sse("reset", {})
+                        continue
+                    if event == "status":
+                        yield _sse("status", data)
+                        continue
+
+                snapshot = await asyncio.to_thread(_load_job_response, job_id, user_id)
+                if snapshot is None:
+                    return
+        finally:
+            analysis_events.unsubscribe(job_id, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.get("/meals/photos", response_model=List[MealPhotoResponse])
 def get_user_meal_photos(
     skip: int = 0,
     limit: int = 100,
+    image_size: str = Query("thumb", regex=PHOTO_SIZE_PATTERN),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
@@ -229,7 +366,12 @@ def get_user_meal_photos(
         .limit(limit)\
         .all()
 
-    return photos
+    result = []
+    for p in photos:
+        item = MealPhotoResponse.model_validate(p)
+        item.image_url = meal_image_url(p, image_size)
+        result.append(item)
+    return result
 
 @router.post("/meals/manual", response_model=MealPhotoResponse, status_code=status.HTTP_201_CREATED)
 def create_manual_meal(
@@ -239,7 +381,7 @@ def create_manual_meal(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    from datetime import datetime, timezone, timedelta
+    from datetime import date, datetime, timezone, timedelta
 
     if not payload.meal_name:
         raise HTTPException(
@@ -267,6 +409,8 @@ def create_manual_meal(
     else:
         created_at = datetime.now(timezone.utc)
 
+    remember_timezone(db, current_user, client_tz_offset_minutes)
+
     meal_photo = MealPhoto(
         user_id=current_user.id,
         file_path="manual",
@@ -297,6 +441,7 @@ def create_manual_meal(
 def get_meal_photo(
     photo_id: int,
     token: Optional[str] = Query(None),
+    size: str = Query("original", regex=PHOTO_SIZE_PATTERN),
     authorization: Optional[str] = Header(default=None),
     db: Session = Depends(get_db),
 ):
@@ -348,7 +493,7 @@ def get_meal_photo(
         )
 
     from fastapi.responses import RedirectResponse
-    file_url = storage_service.get_file_url(photo.file_path)
+    file_url = storage_service.get_file_url(photo_path_for_size(photo, size))
     
     return RedirectResponse(url=file_url)
 
@@ -406,6 +551,45 @@ def get_meal_photo_detail(
     }
 
 
+def _meal_entry(photo: MealPhoto, tz: timezone, image_size: Optional[str]) -> Dict[str, Any]:
+    created_at = photo.created_at
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return {
+        "id": photo.id,
+        "name": photo.meal_name or photo.detected_meal_name or "Meal",
+        "time": created_at.astimezone(tz).strftime("%H:%M"),
+        "calories": photo.calories or 0,
+        "protein": photo.protein or 0,
+        "carbs": photo.carbs or 0,
+        "fats": photo.fat or 0,
+        "fiber": photo.fiber or 0,
+        "sugar": photo.sugar or 0,
+        "sodium": photo.sodium or 0,
+        "health_score": format_health_score(photo.health_score),
+        "image_url": meal_image_url(photo, image_size),
+    }
+
+
+def _day_totals(
+    db: Session,
+    user: User,
+    tz_offset_minutes: int,
+    days: List[date],
+    photos_by_day: Dict[date, List[MealPhoto]],
+) -> Dict[date, Dict[str, Any]]:
+    if days and rollup_covers(user, tz_offset_minutes, min(days)):
+        rollups = get_days(db, user.id, min(days), max(days) + timedelta(days=1))
+        return {day: rollup_totals(rollups.get(day)) for day in days}
+    totals = {}
+    for day in days:
+        day_totals = DayTotals(day)
+        for photo in photos_by_day.get(day, ()):
+            day_totals.add(photo)
+        totals[day] = day_totals.summary(False)
+    return totals
+
+
 def _parse_ingredients(ingredients_json: Optional[str]) -> Optional[List[Dict[str, Any]]]:
     if not ingredients_json:
         return None
@@ -439,55 +623,29 @@ async def lookup_barcode(
             detail="Invalid barcode",
         )
 
-    product = await fetch_openfoodfacts_product(code)
-    if not product:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Product not found",
-        )
-
-    nutriments = product.get("nutriments", {}) if isinstance(product, dict) else {}
-
-    def _num(val: Any) -> Optional[int]:
-        try:
-            if val is None:
-                return None
-            return int(float(val))
-        except Exception:
-            return None
+    product = await asyncio.to_thread(lookup_local_product, code)
+    if product is not None:
+        ai_payload = product.ai_payload()
+    else:
+        off_product = await openfoodfacts_service.get_product(code)
+        if not off_product:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Product not found",
+            )
+        product = product_from_openfoodfacts(code, off_product)
+        ai_payload = off_product
 
-    base_data = {
-        "barcode": code,    
-        "name": product.get("product_name") or product.get("generic_name") or "Product",
-        "brand": product.get("brands"),
-        "calories": _num(
-            nutriments.get("energy-kcal_100g")
-            or nutriments.get("energy_kcal_value")
-            or nutriments.get("energy_kcal")
-        ),
-        "protein": _num(nutriments.get("proteins_100g") or nutriments.get("proteins_serving")),
-        "fat": _num(nutriments.get("fat_100g") or nutriments.get("fat_serving")),
-        "carbs": _num(
-            nutriments.get("carbohydrates_100g")
-            or nutriments.get("carbohydrates_serving")
-        ),
-    }
-    
-    fiber_off = _num(nutriments.get("fiber_100g") or nutriments.get("fiber_serving"))
-    sugar_off = _num(nutriments.get("sugars_100g") or nutriments.get("sugars_serving"))
-    sodium_off = _num(nutriments.get("sodium_100g") or nutriments.get("sodium_serving"))
+    base_data = product.as_dict()
     
-    ai_analysis = await ai_service.analyze_barcode_product(product)
+    ai_analysis = await barcode_enrichment_service.get_enrichment(code, ai_payload)
     
     if ai_analysis:
-        base_data["fiber"] = fiber_off if fiber_off is not None else ai_analysis.get("fiber")
-        base_data["sugar"] = sugar_off if sugar_off is not None else ai_analysis.get("sugar")
-        base_data["sodium"] = sodium_off if sodium_off is not None else ai_analysis.get("sodium")
+        for field in ("fiber", "sugar", "sodium"):
+            if base_data[field] is None:
+                base_data[field] = ai_analysis.get(field)
         base_data["health_score"] = ai_analysis.get("health_score")
     else:
-        base_data["fiber"] = fiber_off
-        base_data["sugar"] = sugar_off
-        base_data["sodium"] = sodium_off
         base_data["health_score"] = None
     
     return base_data
@@ -534,12 +692,13 @@ def confirm_meal_photo(
 def get_daily_meals(
     date: str = Query(..., description="Date in YYYY-MM-DD format"),
     tz_offset_minutes: int = Query(0, description="Client timezone offset in minutes from UTC (getTimezoneOffset * -1)"),
+    image_size: str = Query("original", regex=PHOTO_SIZE_PATTERN, description="Photo variant for image_url: thumb, medium or original"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
+    etag: str = Depends(conditional_etag),
 ):
     try:
         start_utc, end_utc, tz = get_day_range_utc(date, tz_offset_minutes)
-        target_date = datetime.strptime(date, "%Y-%m-%d").date()
     except ValueError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -557,123 +716,23 @@ def get_daily_meals(
         .all()
     )
 
-    total_calories = 0
-    total_protein = 0
-    total_fat = 0
-    total_carbs = 0
-    total_fiber = 0
-    total_sugar = 0
-    total_sodium = 0
-    
-    for p in photos:
-        total_calories += p.calories or 0
-        total_protein += p.protein or 0
-        total_fat += p.fat or 0
-        total_carbs += p.carbs or 0
-        total_fiber += p.fiber or 0
-        total_sugar += p.sugar or 0
-        total_sodium += p.sodium or 0
-
-    target_calories = (
-        db.query(OnboardingData.target_calories)
-        .filter(
-            OnboardingData.user_id == current_user.id,
-            OnboardingData.target_calories.isnot(None)
-        )
-        .order_by(OnboardingData.id.desc())
-        .limit(1)
-        .scalar()
-    )
-
-    streak_count = current_user.streak_count or 0
-    last_streak_date = current_user.last_streak_date.date() if current_user.last_streak_date else None
-    try:
-        today_date = datetime.now(timezone.utc).date()
-        yesterday = today_date - timedelta(days=1)
-        
-        if last_streak_date and last_streak_date < yesterday:
-            streak_count = 0
-            current_user.streak_count = 0
-            db.commit()
-            db.refresh(current_user)
-        
-        if target_calories is not None and target_calories > 0 and target_date <= today_date:
-            achieved = total_calories >= target_calories
-            
-            if last_streak_date and target_date < last_streak_date:
-                pass
-            else:
-                if achieved:
-                    if last_streak_date is None:
-                        streak_count = 1
-                    else:
-                        delta = (target_date - last_streak_date).days
-                        if delta == 0:
-                            streak_count = current_user.streak_count or 1
-                        elif delta == 1:
-                            streak_count = (current_user.streak_count or 0) + 1
-                        else:
-                            streak_count = 1
-                    current_user.last_streak_date = datetime.combine(target_date, datetime.min.time())
-                    current_user.streak_count = streak_count
-                    db.commit()
-                    db.refresh(current_user)
-    except Exception as e:
-        pass
-
-    meals_data = []
-    health_scores = []
-    
-    for p in photos:
-        meal_score_raw = p.health_score
-        meal_score_display = format_health_score(meal_score_raw)
-        if meal_score_display is not None:
-            health_scores.append(meal_score_display)
-        
-        photo_url = None
-        if p.file_path:
-            if p.file_path.startswith('http'):
-                photo_url = p.file_path
-            else:
-                photo_url = f"{settings.api_domain}/api/v1/meals/photos/{p.id}"
-        
-        meals_data.append({
-            "id": p.id,
-            "name": p.meal_name or p.detected_meal_name or "Meal",
-            "time": p.created_at.astimezone(tz).strftime("%H:%M"),
-            "calories": p.calories or 0,
-            "protein": p.protein or 0,
-            "carbs": p.carbs or 0,
-            "fats": p.fat or 0,
-            "fiber": p.fiber or 0,
-            "sugar": p.sugar or 0,
-            "sodium": p.sodium or 0,
-            "health_score": meal_score_display,
-            "image_url": photo_url,
-        })
-    
-    avg_health_score = None
-    if health_scores:
-        avg_health_score = round(sum(health_scores) / len(health_scores), 1)
+    day = start_utc.astimezone(tz).date()
+    totals = _day_totals(db, current_user, tz_offset_minutes, [day], {day: photos})[day]
 
     result = {
         "date": date,
-        "total_calories": total_calories,
-        "total_protein": total_protein,
-        "total_fat": total_fat,
-        "total_carbs": total_carbs,
-        "total_fiber": total_fiber,
-        "total_sugar": total_sugar,
-        "total_sodium": total_sodium,
-        "health_score": avg_health_score,
-        "streak_count": current_user.streak_count or 0,
-        "meals": meals_data,
+        **{f"total_{field}": totals[f"total_{field}"] for field in MACRO_FIELDS},
+        "health_score": totals["health_score"],
+        "streak_count": current_streak(current_user),
+        "meals": [_meal_entry(p, tz, image_size) for p in photos],
     }
     
     return result
 
 @router.post("/meals/daily/batch")
 def get_daily_meals_batch(
+    request: Request,
+    response: Response,
     payload: dict = Body(..., example={"dates": ["2025-12-10", "2025-12-11"]}),
     tz_offset_minutes: int = Query(0, description="Client timezone offset in minutes from UTC (getTimezoneOffset * -1)"),
     current_user: User = Depends(get_current_user),
@@ -684,8 +743,10 @@ def get_daily_meals_batch(
         return []
     
     dates = dates[:31] 
+    require_modified(request, response, etag_for(current_user, request, dates))
     
     date_ranges = {}
+    date_keys = {}
     min_start = None
     max_end = None
     tz = None
@@ -694,6 +755,7 @@ def get_daily_meals_batch(
         try:
             start_utc, end_utc, tz = get_day_range_utc(date_str, tz_offset_minutes)
             date_ranges[date_str] = (start_utc, end_utc)
+            date_keys[start_utc.astimezone(tz).date().isoformat()] = date_str
             if min_start is None or start_utc < min_start:
                 min_start = start_utc
             if max_end is None or end_utc > max_end:
@@ -721,10 +783,15 @@ def get_daily_meals_batch(
         if p_created_at.tzinfo is None:
             p_created_at = p_created_at.replace(tzinfo=timezone.utc)
         
-        for date_str, (start_utc, end_utc) in date_ranges.items():
-            if start_utc <= p_created_at < end_utc:
-                photos_by_date[date_str].append(p)
-                break
+        date_str = date_keys.get(p_created_at.astimezone(tz).date().isoformat())
+        if date_str is not None:
+            photos_by_date[date_str].append(p)
+
+    local_days = {date_str: start_utc.astimezone(tz).date() for date_str, (start_utc, _) in date_ranges.items()}
+    day_totals = _day_totals(
+        db, current_user, tz_offset_minutes, list(local_days.values()),
+        {local_days[date_str]: photos for date_str, photos in photos_by_date.items()},
+    )
     
     results = []
     for date_str in dates:
@@ -732,30 +799,10 @@ def get_daily_meals_batch(
             continue
         
         photos = photos_by_date.get(date_str, [])
-        
-        total_calories = 0
-        total_protein = 0
-        total_fat = 0
-        total_carbs = 0
-        total_fiber = 0
-        total_sugar = 0
-        total_sodium = 0
+        totals = day_totals[local_days[date_str]]
         meals_data = []
-        health_scores = []
         
         for p in photos:
-            total_calories += p.calories or 0
-            total_protein += p.protein or 0
-            total_fat += p.fat or 0
-            total_carbs += p.carbs or 0
-            total_fiber += p.fiber or 0
-            total_sugar += p.sugar or 0
-            total_sodium += p.sodium or 0
-            
-            meal_score = p.health_score
-            if meal_score is not None:
-                health_scores.append(meal_score)
-            
             meals_data.append({
                 "id": p.id,
                 "name": p.meal_name or p.detected_meal_name or "Meal",
@@ -767,28 +814,85 @@ def get_daily_meals_batch(
                 "fiber": p.fiber or 0,
                 "sugar": p.sugar or 0,
                 "sodium": p.sodium or 0,
-                "health_score": meal_score,
+                "health_score": format_health_score(p.health_score),
             })
-        
-        avg_health_score = None
-        if health_scores:
-            avg_health_score = round(sum(health_scores) / len(health_scores), 1)
 
         results.append({
             "date": date_str,
-            "total_calories": total_calories,
-            "total_protein": total_protein,
-            "total_fat": total_fat,
-            "total_carbs": total_carbs,
-            "total_fiber": total_fiber,
-            "total_sugar": total_sugar,
-            "total_sodium": total_sodium,
-            "health_score": avg_health_score,
+            **{f"total_{field}": totals[f"total_{field}"] for field in MACRO_FIELDS},
+            "health_score": totals["health_score"],
             "meals": meals_data,
         })
 
     return results
 
+@router.get("/meals/range")
+def get_meals_range(
+    start: str = Query(..., description="First date in YYYY-MM-DD format"),
+    end: str = Query(..., description="Last date (inclusive) in YYYY-MM-DD format"),
+    tz_offset_minutes: int = Query(0, description="Client timezone offset in minutes from UTC (getTimezoneOffset * -1)"),
+    aggregate_only: bool = Query(False, description="Only per-day totals, without the meals list"),
+    image_size: str = Query("thumb", regex=PHOTO_SIZE_PATTERN, description="Photo variant for image_url: thumb, medium or original"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    etag: str = Depends(conditional_etag),
+):
+    try:
+        start_date = datetime.strptime(start, "%Y-%m-%d").date()
+        end_date = datetime.strptime(end, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid date format. Use YYYY-MM-DD"
+        )
+
+    days = (end_date - start_date).days + 1
+    if days < 1 or days > MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range must cover 1 to {MAX_RANGE_DAYS} days"
+        )
+
+    if aggregate_only and rollup_covers(current_user, tz_offset_minutes, start_date):
+        rollups = get_days(db, current_user.id, start_date, end_date + timedelta(days=1))
+        return list(rollup_day_summaries(rollups, start_date, days))
+
+    user_id = current_user.id
+    start_utc = datetime.fromtimestamp(day_origin(start_date, tz_offset_minutes), timezone.utc)
+    end_utc = start_utc + timedelta(days=days)
+    tz = timezone(timedelta(minutes=tz_offset_minutes))
+
+    def generate():
+        range_db = SessionLocal()
+        try:
+            if aggregate_only:
+                query = range_db.query(MealPhoto.created_at, MealPhoto.health_score, *(getattr(MealPhoto, field) for field in MACRO_FIELDS))
+                meal_payload = None
+            else:
+                query = range_db.query(MealPhoto)
+                meal_payload = lambda p: _meal_entry(p, tz, image_size)
+            rows = (
+                query.filter(
+                    MealPhoto.user_id == user_id,
+                    MealPhoto.created_at >= start_utc,
+                    MealPhoto.created_at < end_utc,
+                )
+                .order_by(MealPhoto.created_at.asc(), MealPhoto.id.asc())
+                .yield_per(RANGE_FETCH_SIZE)
+            )
+            yield "["
+            for index, summary in enumerate(iter_day_summaries(rows, start_date, days, tz_offset_minutes, meal_payload)):
+                yield ("," if index else "") + json.dumps(summary, ensure_ascii=False)
+            yield "]"
+        finally:
+            range_db.close()
+
+    return StreamingResponse(
+        generate(),
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
+
 @router.put("/meals/photos/{photo_id}", response_model=MealPhotoResponse)
 def update_meal_photo(
     photo_id: int,
@@ -843,11 +947,8 @@ def delete_meal_photo(
     if photo.created_at:
         meal_date = photo.created_at.date().isoformat()
     
-    if photo.file_path and photo.file_path != "manual" and photo.mime_type != "manual":
-        try:
-            storage_service.delete_file(photo.file_path)
-        except Exception:
-            pass
+    if is_stored_file(photo):
+        delete_photo_objects_sync(photo_object_paths(photo))
 
     db.delete(photo)
     db.commit()
@@ -1009,12 +1110,14 @@ async def correct_meal_with_ai(
 @router.post("/water", response_model=WaterEntry, status_code=status.HTTP_201_CREATED)
 def add_water(
     payload: WaterCreate,
-    tz_offset_minutes: int = Query(0, description="Client timezone offset in minutes from UTC"),
+    tz_offset_minutes: Optional[int] = Query(None, description="Client timezone offset in minutes from UTC"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     from datetime import timezone, timedelta
 
+    remember_timezone(db, current_user, tz_offset_minutes)
+
     created_at = payload.created_at
     if created_at is None:
         created_at = datetime.now(timezone.utc)
@@ -1039,6 +1142,7 @@ def get_water_daily(
     tz_offset_minutes: int = Query(0, description="Client timezone offset in minutes from UTC (getTimezoneOffset * -1)"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
+    etag: str = Depends(conditional_etag),
 ):
     from datetime import datetime, timedelta, timezone
 
@@ -8,11 +8,10 @@ from fastapi.responses import FileResponse
 from sqlalchemy import func, and_
 from sqlalchemy.orm import Session
 
-from app.core.dependencies import get_current_user, get_db
+from app.core.dependencies import conditional_etag, get_current_user, get_db
 from app.models.user import User
 from app.models.weight_log import WeightLog
 from app.models.progress_photo import ProgressPhoto
-from app.models.meal_photo import MealPhoto
 from app.models.onboarding_data import OnboardingData
 from app.models.user_badge import UserBadge
 from app.schemas.progress import (
@@ -27,6 +26,20 @@ from app.schemas.progress import (
     EnergyChange,
 )
 from app.services.storage import storage_service
+from app.services.daily_nutrition import get_days, user_today
+from app.services.streak_service import current_streak
+from app.services.image_processing import normalize_image_async, ImageDecodeError
+from app.services.photo_variants import (
+    PHOTO_SIZE_PATTERN,
+    apply_variant_paths,
+    delete_photo_objects,
+    delete_photo_objects_sync,
+    photo_object_paths,
+    photo_path_for_size,
+    progress_image_url,
+    upload_photo_objects,
+    variant_paths,
+)
 
 router = APIRouter()
 
@@ -199,8 +212,6 @@ async def upload_progress_photo(
     original_filename = file.filename or "photo"
     sanitized_filename = sanitize_filename(original_filename)
     ext = Path(sanitized_filename).suffix if sanitized_filename else ".jpg"
-    unique_name = f"{current_user.id}_{uuid.uuid4().hex}{ext}"
-    s3_object_path = f"progress_photos/{unique_name}"
     
     content = await file.read()
     file_size = len(content)
@@ -217,19 +228,45 @@ async def upload_progress_photo(
             detail="File does not match declared type"
         )
     
-    file_url = storage_service.upload_file(
-        file_content=content,
-        object_name=s3_object_path,
-        content_type=file.content_type
-    )
+    try:
+        normalized = await normalize_image_async(content)
+    except ImageDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not decode image"
+        )
+
+    content_type = file.content_type
+    if normalized:
+        content, content_type, ext = normalized.data, normalized.content_type, normalized.extension
+
+    unique_name = f"{current_user.id}_{uuid.uuid4().hex}{ext}"
+    s3_object_path = f"progress_photos/{unique_name}"
+
+    stored_objects = {s3_object_path: content}
+    photo_variant_paths = {}
+    if normalized and normalized.variants:
+        photo_variant_paths = variant_paths(s3_object_path, normalized.variants, ext)
+        for size, data in normalized.variants.items():
+            stored_objects[photo_variant_paths[size]] = data
+
+    try:
+        await upload_photo_objects(stored_objects, content_type)
+    except Exception:
+        await delete_photo_objects(list(stored_objects))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error saving file"
+        )
     
     photo = ProgressPhoto(
         user_id=current_user.id,
         file_path=s3_object_path, 
         file_name=unique_name,
         file_size=len(content),
-        mime_type=file.content_type,
+        mime_type=content_type,
     )
+    apply_variant_paths(photo, photo_variant_paths)
     db.add(photo)
     db.commit()
     db.refresh(photo)
@@ -237,13 +274,14 @@ async def upload_progress_photo(
     return ProgressPhotoUploadResponse(
         id=photo.id,
         file_name=photo.file_name,
-        url=f"/api/v1/progress/photos/{photo.id}",
+        url=progress_image_url(photo),
         created_at=photo.created_at
     )
 
 
 @router.get("/photos", response_model=List[ProgressPhotoResponse])
 def get_progress_photos(
+    image_size: str = Query("thumb", regex=PHOTO_SIZE_PATTERN),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
@@ -253,12 +291,18 @@ def get_progress_photos(
         .order_by(ProgressPhoto.created_at.desc())
         .all()
     )
-    return photos
+    result = []
+    for photo in photos:
+        item = ProgressPhotoResponse.model_validate(photo)
+        item.url = progress_image_url(photo, image_size)
+        result.append(item)
+    return result
 
 
 @router.get("/photos/{photo_id}")
 def get_progress_photo(
     photo_id: int,
+    size: str = Query("original", regex=PHOTO_SIZE_PATTERN),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
@@ -274,7 +318,7 @@ def get_progress_photo(
         )
     
     from fastapi.responses import RedirectResponse
-    file_url = storage_service.get_file_url(photo.file_path)
+    file_url = storage_service.get_file_url(photo_path_for_size(photo, size))
     return RedirectResponse(url=file_url)
 
 
@@ -295,10 +339,7 @@ def delete_progress_photo(
             detail="Photo not found"
         )
     
-    try:
-        storage_service.delete_file(photo.file_path)
-    except Exception as e:
-        pass
+    delete_photo_objects_sync(photo_object_paths(photo))
     
     db.delete(photo)
     db.commit()
@@ -308,8 +349,9 @@ def delete_progress_photo(
 def get_progress_data(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
+    etag: str = Depends(conditional_etag),
 ):
-    streak_count = current_user.streak_count or 0
+    streak_count = current_streak(current_user)
     
     badges_count = db.query(func.count(UserBadge.id)).filter(
         UserBadge.user_id == current_user.id
@@ -317,23 +359,22 @@ def get_progress_data(
     
     weight_stats = get_weight_stats(current_user, db)
     
-    now = datetime.now(timezone.utc)
+    today = user_today(current_user)
+    days = get_days(db, current_user.id, today - timedelta(days=180), today + timedelta(days=1))
+
+    def window(start, end):
+        rows = [row for day, row in days.items() if start <= day < end and row.named_meal_count]
+        return sum(row.named_meal_count for row in rows), sum(row.named_calories for row in rows), len(rows)
+
     calorie_stats_list = []
     
     for week_offset in range(4): 
-        week_start = now - timedelta(days=now.weekday() + 7 * week_offset + 7)
+        week_start = today - timedelta(days=today.weekday() + 7 * week_offset + 7)
         week_end = week_start + timedelta(days=7)
         
-        meals = db.query(MealPhoto).filter(
-            MealPhoto.user_id == current_user.id,
-            MealPhoto.created_at >= week_start,
-            MealPhoto.created_at < week_end,
-            MealPhoto.meal_name.isnot(None)
-        ).all()
+        meal_count, total_calories, days_with_meals = window(week_start, week_end)
         
-        if len(meals) >= 3:
-            total_calories = sum(m.calories or 0 for m in meals)
-            days_with_meals = len(set(m.created_at.date() for m in meals))
+        if meal_count >= 3:
             average_calories = total_calories / days_with_meals if days_with_meals > 0 else 0
             
             period_name = ["this_week", "last_week", "2_weeks_ago", "3_weeks_ago"][week_offset]
@@ -355,29 +396,16 @@ def get_progress_data(
     energy_changes = []
     periods = [("3_days", 3), ("7_days", 7), ("14_days", 14), ("30_days", 30), ("90_days", 90)]
     
-    for period_name, days in periods:
-        current_start = now - timedelta(days=days)
-        current_meals = db.query(MealPhoto).filter(
-            MealPhoto.user_id == current_user.id,
-            MealPhoto.created_at >= current_start,
-            MealPhoto.meal_name.isnot(None)
-        ).all()
+    for period_name, period_days in periods:
+        current_start = today - timedelta(days=period_days - 1)
+        current_count, current_calories, current_days = window(current_start, today + timedelta(days=1))
         
-        prev_start = now - timedelta(days=days * 2)
-        prev_end = now - timedelta(days=days)
-        prev_meals = db.query(MealPhoto).filter(
-            MealPhoto.user_id == current_user.id,
-            MealPhoto.created_at >= prev_start,
-            MealPhoto.created_at < prev_end,
-            MealPhoto.meal_name.isnot(None)
-        ).all()
+        prev_start = current_start - timedelta(days=period_days)
+        prev_count, prev_calories, prev_days = window(prev_start, current_start)
         
-        if len(current_meals) >= 3 and len(prev_meals) >= 3:
-            current_days = len(set(m.created_at.date() for m in current_meals))
-            prev_days = len(set(m.created_at.date() for m in prev_meals))
-            
-            current_avg = sum(m.calories or 0 for m in current_meals) / current_days if current_days > 0 else 0
-            prev_avg = sum(m.calories or 0 for m in prev_meals) / prev_days if prev_days > 0 else 0
+        if current_count >= 3 and prev_count >= 3:
+            current_avg = current_calories / current_days if current_days > 0 else 0
+            prev_avg = prev_calories / prev_days if prev_days > 0 else 0
             
             change = current_avg - prev_avg
             
@@ -386,7 +414,7 @@ def get_progress_data(
                 change_calories=round(change, 1) if abs(change) > 0.1 else 0,
                 status="ok"
             ))
-        elif len(current_meals) >= 3:
+        elif current_count >= 3:
             energy_changes.append(EnergyChange(
                 period=period_name,
                 change_calories=None,
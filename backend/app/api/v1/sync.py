@@ -0,0 +1,51 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+
+from app.core.dependencies import get_current_user, get_db
+from app.models.user import User
+from app.schemas.sync import SyncBatchRequest, SyncBatchResponse, SyncResponse
+from app.services.bulk_sync import MAX_BATCH_ITEMS, batch_size, write_batch
+from app.services.change_log import MAX_SYNC_PAGE, changes_since, parse_cursor
+
+router = APIRouter()
+
+
+@router.get("/sync", response_model=SyncResponse)
+def sync_changes(
+    since: Optional[str] = Query(None, description="next_cursor from the previous response; omit for a full sync"),
+    limit: int = Query(500, ge=1, le=MAX_SYNC_PAGE),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    try:
+        cursor = parse_cursor(since)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid sync cursor"
+        )
+
+    changes, next_cursor, has_more = changes_since(db, current_user.id, cursor, limit)
+    return {
+        "changes": changes,
+        "next_cursor": str(next_cursor),
+        "has_more": has_more,
+        "data_version": current_user.data_version or 0,
+    }
+
+
+@router.post("/sync/batch", response_model=SyncBatchResponse)
+def sync_batch(
+    payload: SyncBatchRequest,
+    tz_offset_minutes: Optional[int] = Query(None, description="Client timezone offset in minutes from UTC; applied to created_at values without a timezone"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    if batch_size(payload) > MAX_BATCH_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH_ITEMS} items per batch"
+        )
+    return write_batch(db, current_user, payload, tz_offset_minutes)
@@ -36,12 +36,62 @@ class Settings(BaseSettings):
     anthropic_api_key: str = ""
     anthropic_model: str = "claude-3-haiku-20240307"
     anthropic_timeout: int = 30
+    anthropic_structured_output: bool = True
+    anthropic_prompt_caching: bool = True
+    anthropic_base_url: str = ""
+    anthropic_max_concurrency: int = 8
+    anthropic_queue_timeout: float = 10.0
+    anthropic_max_retries: int = 2
+    anthropic_retry_base_delay: float = 0.5
+    anthropic_retry_max_delay: float = 4.0
+    anthropic_breaker_window: int = 20
+    anthropic_breaker_min_calls: int = 10
+    anthropic_breaker_error_rate: float = 0.5
+    anthropic_breaker_slow_call_seconds: float = 20.0
+    anthropic_breaker_slow_call_rate: float = 0.5
+    anthropic_breaker_open_seconds: float = 30.0
+
+    meal_analysis_workers: int = 4
+    meal_analysis_queue_size: int = 200
+    meal_analysis_shutdown_timeout: int = 20
+    meal_analysis_stale_seconds: int = 600
+    meal_analysis_streaming: bool = True
+    meal_analysis_sse_timeout: int = 120
+    meal_analysis_sse_poll_seconds: float = 1.0
+
+    streak_sweep_interval_minutes: int = 30
+    daily_nutrition_rebuild_seconds: int = 60
+
+    food_search_index_enabled: bool = False
+    food_search_index_snapshot: str = ""
+    food_search_index_refresh_seconds: int = 300
+
+    food_spelling_enabled: bool = False
+    food_spelling_refresh_seconds: int = 86400
+
+    food_suggest_enabled: bool = False
+    food_suggest_refresh_seconds: int = 3600
+
+    analysis_cache_enabled: bool = True
+    analysis_cache_scope: str = "user"
+    analysis_cache_max_distance: int = 4
+    analysis_cache_ttl_hours: int = 720
+    analysis_cache_max_entries_per_user: int = 500
 
     yandex_storage_access_key: str = ""
     yandex_storage_secret_key: str = ""
     yandex_storage_bucket_name: str = "caloriesapp"
     yandex_storage_endpoint: str = "https://storage.yandexcloud.net"
     yandex_storage_region: str = "ru-central1"
+    storage_max_connections: int = 32
+    storage_addressing_style: str = "auto"
+
+    openfoodfacts_hosts: str = "https://world.openfoodfacts.org,https://ru.openfoodfacts.org"
+    openfoodfacts_timeout: float = 8.0
+    openfoodfacts_max_connections: int = 20
+    openfoodfacts_cache_ttl_hours: int = 168
+    openfoodfacts_negative_ttl_hours: int = 12
+    openfoodfacts_stale_hours: int = 720
 
     admin_username: str = "admin"
     admin_password: str = ""
@@ -52,6 +102,15 @@ class Settings(BaseSettings):
     max_file_size_mb: int = 10
     allowed_file_types: List[str] = ["image/jpeg", "image/png", "image/webp", "image/heic", "image/heif"]
 
+    image_output_format: str = "jpeg"
+    image_max_long_edge: int = 2048
+    image_quality: int = 85
+    image_ai_long_edge: int = 1024
+    image_ai_quality: int = 80
+    image_medium_long_edge: int = 960
+    image_thumbnail_long_edge: int = 320
+    image_variant_quality: int = 78
+
     @property
     def database_url(self) -> str:
         from urllib.parse import quote_plus
@@ -65,6 +124,10 @@ class Settings(BaseSettings):
             origins = [o for o in origins if "localhost" not in o.lower() and "127.0.0.1" not in o]
         return origins
     
+    @property
+    def openfoodfacts_hosts_list(self) -> List[str]:
+        return [host.strip().rstrip("/") for host in self.openfoodfacts_hosts.split(",") if host.strip()]
+    
     def validate_security(self):
         errors = []
         
@@ -1,3 +1,5 @@
+from contextlib import contextmanager
+
 from sqlalchemy import create_engine, text, inspect
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings
@@ -24,6 +26,19 @@ def get_db():
     finally:
         db.close()
 
+@contextmanager
+def startup_lock(name: str, timeout: int = 600):
+    # Serializes one-off startup work across uvicorn workers; MySQL only.
+    with engine.connect() as conn:
+        mysql = engine.dialect.name == "mysql"
+        if mysql:
+            conn.execute(text("SELECT GET_LOCK(:name, :timeout)"), {"name": name, "timeout": timeout})
+        try:
+            yield
+        finally:
+            if mysql:
+                conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": name})
+
 def init_db():
     import os
     from pathlib import Path
@@ -32,7 +47,17 @@ def init_db():
     from app.models.meal_photo import MealPhoto
     from app.models.water_log import WaterLog
     from app.models.recipe import Recipe
+    from app.models.meal_analysis_job import MealAnalysisJob
+    from app.models.meal_analysis_cache import MealAnalysisCacheEntry
+    from app.models.barcode_product_cache import BarcodeProductCacheEntry
+    from app.models.off_product import OffProduct
+    from app.models.barcode_enrichment import BarcodeEnrichment
+    from app.models.daily_nutrition import DailyNutrition
+    from app.models.change_log import ChangeLog
+    from app.services.change_log import seed_change_log
+    from app.services.daily_nutrition import backfill
     Base.metadata.create_all(bind=engine)
+    rebuild_rollup = False
 
     with engine.begin() as conn:
         inspector = inspect(conn)
@@ -65,6 +90,12 @@ def init_db():
             alters.append("ADD COLUMN ingredients_json TEXT NULL")
         if "recipe_id" not in columns:
             alters.append("ADD COLUMN recipe_id INT NULL")
+        if "analysis_status" not in columns:
+            alters.append("ADD COLUMN analysis_status VARCHAR(20) NULL")
+        if "thumbnail_path" not in columns:
+            alters.append("ADD COLUMN thumbnail_path VARCHAR(500) NULL")
+        if "medium_path" not in columns:
+            alters.append("ADD COLUMN medium_path VARCHAR(500) NULL")
         if alters:
             sql = "ALTER TABLE meal_photos " + ", ".join(alters)
             if all("ADD COLUMN" in alter.upper() for alter in alters):
@@ -72,15 +103,65 @@ def init_db():
             else:
                 raise ValueError("Unsafe SQL operation detected")
 
+        if "meal_analysis_jobs" in tables:
+            job_columns = {col["name"] for col in inspector.get_columns("meal_analysis_jobs")}
+            if "partial_result" not in job_columns:
+                conn.execute(text("ALTER TABLE meal_analysis_jobs ADD COLUMN partial_result TEXT NULL"))
+            if "heartbeat_at" not in job_columns:
+                conn.execute(text("ALTER TABLE meal_analysis_jobs ADD COLUMN heartbeat_at DATETIME(6) NULL"))
+
+        if "progress_photos" in tables:
+            progress_columns = {col["name"] for col in inspector.get_columns("progress_photos")}
+            progress_alters = []
+            if "thumbnail_path" not in progress_columns:
+                progress_alters.append("ADD COLUMN thumbnail_path VARCHAR(500) NULL")
+            if "medium_path" not in progress_columns:
+                progress_alters.append("ADD COLUMN medium_path VARCHAR(500) NULL")
+            if progress_alters:
+                if all("ADD COLUMN" in alter.upper() for alter in progress_alters):
+                    conn.execute(text("ALTER TABLE progress_photos " + ", ".join(progress_alters)))
+                else:
+                    raise ValueError("Unsafe SQL operation detected")
+
+        if "foods" in tables and "updated_at" not in {col["name"] for col in inspector.get_columns("foods")}:
+            conn.execute(text(
+                "ALTER TABLE foods ADD COLUMN updated_at DATETIME NULL DEFAULT NULL ON UPDATE CURRENT_TIMESTAMP, "
+                "ADD INDEX ix_foods_updated_at (updated_at)"
+            ))
+
+        for table_name in ("meal_photos", "water_logs", "weight_logs"):
+            if table_name in tables and "client_id" not in {col["name"] for col in inspector.get_columns(table_name)}:
+                conn.execute(text(
+                    f"ALTER TABLE {table_name} ADD COLUMN client_id VARCHAR(64) NULL, "
+                    f"ADD UNIQUE INDEX uq_{table_name}_user_client (user_id, client_id)"
+                ))
+
+        rollup_columns = {col["name"] for col in inspector.get_columns("daily_nutrition")}
+        if "named_meal_count" not in rollup_columns:
+            conn.execute(text(
+                "ALTER TABLE daily_nutrition ADD COLUMN named_meal_count INT NOT NULL DEFAULT 0, "
+                "ADD COLUMN named_calories INT NOT NULL DEFAULT 0"
+            ))
+            rebuild_rollup = True
+
         user_columns = {col["name"] for col in inspector.get_columns("users")}
         user_alters = []
         if "streak_count" not in user_columns:
             user_alters.append("ADD COLUMN streak_count INT NULL")
         if "last_streak_date" not in user_columns:
             user_alters.append("ADD COLUMN last_streak_date DATETIME NULL")
+        if "tz_offset_minutes" not in user_columns:
+            user_alters.append("ADD COLUMN tz_offset_minutes INT NULL")
+        if "rollup_stale_before" not in user_columns:
+            user_alters.append("ADD COLUMN rollup_stale_before DATE NULL")
+        if "data_version" not in user_columns:
+            user_alters.append("ADD COLUMN data_version BIGINT NOT NULL DEFAULT 0")
         if user_alters:
             if all("ADD COLUMN" in alter.upper() for alter in user_alters):
                 sql_users = "ALTER TABLE users " + ", ".join(user_alters)
                 conn.execute(text(sql_users))
             else:
                 raise ValueError("Unsafe SQL operation detected")
+
+    backfill(force=rebuild_rollup)
+    seed_change_log()
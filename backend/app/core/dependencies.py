@@ -1,12 +1,16 @@
-from fastapi import Depends, HTTPException, status, Request
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+import secrets
+
+from fastapi import Depends, HTTPException, status, Request, Response
+from fastapi.security import HTTPBasic, HTTPBasicCredentials, HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from app.core.config import settings
 from app.core.database import get_db
 from app.models.user import User
 from app.utils.auth import verify_token, get_user_by_id
 from typing import Optional
 
 security = HTTPBearer(auto_error=False)
+admin_security = HTTPBasic(auto_error=False)
 
 def get_current_user(
     request: Request,
@@ -57,3 +61,27 @@ def get_current_user(
         )
 
     return user
+
+
+def conditional_etag(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+) -> str:
+    from app.services.data_version import etag_for, require_modified
+
+    return require_modified(request, response, etag_for(current_user, request))
+
+
+def require_admin(credentials: Optional[HTTPBasicCredentials] = Depends(admin_security)) -> None:
+    if (
+        not credentials
+        or not settings.admin_password
+        or not secrets.compare_digest(credentials.username.encode(), settings.admin_username.encode())
+        or not secrets.compare_digest(credentials.password.encode(), settings.admin_password.encode())
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Basic"},
+        )
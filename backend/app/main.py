@@ -1,12 +1,24 @@
 import app.fastapi_patch
 
-from fastapi import FastAPI, Request
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from app.core.config import settings
 from app.core.database import init_db, engine
-from app.api.v1 import auth, onboarding, meals, progress, press, badges, foods
+from app.core.dependencies import require_admin
+from app.api.v1 import auth, onboarding, meals, progress, press, badges, foods, sync
 from app.middleware.security import SecurityHeadersMiddleware, RequestValidationMiddleware, RateLimitMiddleware
+from app.services.meal_analysis import meal_analysis_pool
+from app.services.analysis_cache import analysis_cache
+from app.services.ai_service import ai_service
+from app.services.openfoodfacts import openfoodfacts_service
+from app.services.barcode_enrichment import barcode_enrichment_service
+from app.services.streak_service import streak_sweeper
+from app.services.daily_nutrition import rollup_rebuilder
+from app.services.food_search_index import food_search_index
+from app.services.food_spelling import food_spelling
+from app.services.food_suggest import food_suggest
+from app.services.storage import storage_service
 
 app = FastAPI(
     title="Calories App API",
@@ -31,8 +43,8 @@ app.add_middleware(
     allow_origins=settings.cors_origins_list,
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
-    allow_headers=["Content-Type", "Authorization", "Accept", "Origin", "X-Requested-With"],
-    expose_headers=["Content-Type", "Authorization"],
+    allow_headers=["Content-Type", "Authorization", "Accept", "Origin", "X-Requested-With", "If-None-Match"],
+    expose_headers=["Content-Type", "Authorization", "ETag"],
     max_age=3600,
 )
 
@@ -54,13 +66,30 @@ app.include_router(progress.router, prefix="/api/v1/progress", tags=["progress"]
 app.include_router(press.router, prefix="/api/v1", tags=["press"])
 app.include_router(badges.router, prefix="/api/v1/badges", tags=["badges"])
 app.include_router(foods.router, prefix="/api/v1", tags=["foods"])
+app.include_router(sync.router, prefix="/api/v1", tags=["sync"])
 
 @app.on_event("startup")
 async def startup_event():
     init_db()
+    await meal_analysis_pool.start()
+    await streak_sweeper.start()
+    await rollup_rebuilder.start()
+    await food_search_index.start()
+    await food_spelling.start()
+    await food_suggest.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    await food_suggest.stop()
+    await food_spelling.stop()
+    await food_search_index.stop()
+    await rollup_rebuilder.stop()
+    await streak_sweeper.stop()
+    await meal_analysis_pool.stop()
+    await ai_service.close()
+    await openfoodfacts_service.close()
+    await barcode_enrichment_service.close()
+    storage_service.shutdown()
     engine.dispose()
 
 @app.get("/")
@@ -75,6 +104,20 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/health/metrics", dependencies=[Depends(require_admin)])
+async def health_metrics():
+    return {
+        "analysis_cache": analysis_cache.stats(),
+        "ai": ai_service.stats(),
+        "openfoodfacts": openfoodfacts_service.stats(),
+        "barcode_enrichment": barcode_enrichment_service.stats(),
+        "streak_sweep": streak_sweeper.stats(),
+        "daily_nutrition_rebuild": rollup_rebuilder.stats(),
+        "food_search_index": food_search_index.stats(),
+        "food_spelling": food_spelling.stats(),
+        "food_suggest": food_suggest.stats(),
+    }
+
 @app.head("/health")
 async def health_head():
     return {"status": "healthy"}
@@ -8,5 +8,12 @@ from app.models.progress_photo import ProgressPhoto
 from app.models.recipe import Recipe
 from app.models.press_inquiry import PressInquiry
 from app.models.user_badge import UserBadge
+from app.models.meal_analysis_job import MealAnalysisJob
+from app.models.meal_analysis_cache import MealAnalysisCacheEntry
+from app.models.barcode_product_cache import BarcodeProductCacheEntry
+from app.models.off_product import OffProduct
+from app.models.barcode_enrichment import BarcodeEnrichment
+from app.models.daily_nutrition import DailyNutrition
+from app.models.change_log import ChangeLog
 
-__all__ = ["Base", "User", "OnboardingData", "MealPhoto", "WaterLog", "WeightLog", "ProgressPhoto", "Recipe", "PressInquiry", "UserBadge"]
+__all__ = ["Base", "User", "OnboardingData", "MealPhoto", "WaterLog", "WeightLog", "ProgressPhoto", "Recipe", "PressInquiry", "UserBadge", "MealAnalysisJob", "MealAnalysisCacheEntry", "BarcodeProductCacheEntry", "OffProduct", "BarcodeEnrichment", "DailyNutrition", "ChangeLog"]
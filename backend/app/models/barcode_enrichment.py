@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index, UniqueConstraint
+from app.core.database import Base
+
+
+class BarcodeEnrichment(Base):
+    __tablename__ = "barcode_enrichments"
+
+    __table_args__ = (
+        UniqueConstraint('barcode', 'model', 'prompt_version', name='uq_barcode_enrichments_key'),
+        Index('ix_barcode_enrichments_version', 'model', 'prompt_version'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    barcode = Column(String(14), nullable=False, index=True)
+    model = Column(String(100), nullable=False)
+    prompt_version = Column(String(32), nullable=False)
+    input_hash = Column(String(64), nullable=False)
+    product_json = Column(Text, nullable=False)
+
+    fiber = Column(Integer, nullable=True)
+    sugar = Column(Integer, nullable=True)
+    sodium = Column(Integer, nullable=True)
+    health_score = Column(Integer, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
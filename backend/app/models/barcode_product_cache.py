@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, DateTime, Text, Boolean, Index
+from app.core.database import Base
+
+
+class BarcodeProductCacheEntry(Base):
+    __tablename__ = "barcode_product_cache"
+
+    __table_args__ = (
+        Index('ix_barcode_product_cache_expires', 'expires_at'),
+    )
+
+    barcode = Column(String(14), primary_key=True)
+    found = Column(Boolean, nullable=False, default=False)
+    product_json = Column(Text, nullable=True)
+    source_host = Column(String(255), nullable=True)
+
+    fetched_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
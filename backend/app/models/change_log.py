@@ -0,0 +1,18 @@
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, ForeignKey, Index
+from app.core.database import Base
+
+
+class ChangeLog(Base):
+    __tablename__ = "change_log"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    entity = Column(String(20), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    op = Column(String(10), nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_change_log_user_id_id", "user_id", "id"),
+        {"mysql_charset": "utf8mb4", "mysql_collate": "utf8mb4_unicode_ci"},
+    )
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, Date, DateTime, Float, ForeignKey
+from app.core.database import Base
+
+
+class DailyNutrition(Base):
+    __tablename__ = "daily_nutrition"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    local_date = Column(Date, primary_key=True)
+
+    calories = Column(Integer, nullable=False, default=0)
+    protein = Column(Integer, nullable=False, default=0)
+    fat = Column(Integer, nullable=False, default=0)
+    carbs = Column(Integer, nullable=False, default=0)
+    fiber = Column(Integer, nullable=False, default=0)
+    sugar = Column(Integer, nullable=False, default=0)
+    sodium = Column(Integer, nullable=False, default=0)
+    meal_count = Column(Integer, nullable=False, default=0)
+    named_meal_count = Column(Integer, nullable=False, default=0)
+    named_calories = Column(Integer, nullable=False, default=0)
+    health_score_sum = Column(Float, nullable=False, default=0)
+    health_score_count = Column(Integer, nullable=False, default=0)
+    water_ml = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime(timezone=True), nullable=True)
+
+    @property
+    def health_score(self):
+        if not self.health_score_count:
+            return None
+        return round(self.health_score_sum / self.health_score_count, 1)
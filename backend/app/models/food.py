@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Date, Numeric, BigInteger, ForeignKey, Index
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, Numeric, BigInteger, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
@@ -13,9 +13,11 @@ class Food(Base):
     description_uz = Column(Text)
     food_category_id = Column(String(100))
     publication_date = Column(Date)
+    updated_at = Column(DateTime, nullable=True, index=True)
 
     nutrients = relationship("FoodNutrient", back_populates="food", cascade="all, delete-orphan")
     branded_info = relationship("BrandedFood", back_populates="food", uselist=False)
+    macros = relationship("FoodMacros", back_populates="food", uselist=False)
 
     def get_name(self, lang: str = 'en') -> str:
         if lang == 'ru' and self.description_ru:
@@ -60,6 +62,26 @@ class BrandedFood(Base):
     food = relationship("Food", back_populates="branded_info")
 
 
+class FoodMacros(Base):
+    __tablename__ = "food_macros"
+
+    fdc_id = Column(Integer, ForeignKey("foods.fdc_id", ondelete="CASCADE"), primary_key=True)
+    calories = Column(Numeric(12, 4))
+    protein = Column(Numeric(12, 4))
+    fat = Column(Numeric(12, 4))
+    carbs = Column(Numeric(12, 4))
+    fiber = Column(Numeric(12, 4))
+    calcium = Column(Numeric(12, 4))
+    iron = Column(Numeric(12, 4))
+    sodium = Column(Numeric(12, 4))
+    brand_owner = Column(String(255))
+    serving_size = Column(Numeric(10, 2))
+    serving_size_unit = Column(String(50))
+    updated_at = Column(DateTime, nullable=True)
+
+    food = relationship("Food", back_populates="macros")
+
+
 class NutrientName(Base):
     __tablename__ = "nutrient_names"
 
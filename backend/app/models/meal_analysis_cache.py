@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index
+from app.core.database import Base
+
+
+class MealAnalysisCacheEntry(Base):
+    __tablename__ = "meal_analysis_cache"
+
+    __table_args__ = (
+        Index('ix_meal_analysis_cache_user_content', 'user_id', 'content_hash'),
+        Index('ix_meal_analysis_cache_user_used', 'user_id', 'last_used_at'),
+        Index('ix_meal_analysis_cache_band0', 'dhash_band0'),
+        Index('ix_meal_analysis_cache_band1', 'dhash_band1'),
+        Index('ix_meal_analysis_cache_band2', 'dhash_band2'),
+        Index('ix_meal_analysis_cache_band3', 'dhash_band3'),
+        Index('ix_meal_analysis_cache_band4', 'dhash_band4'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    content_hash = Column(String(64), nullable=False, index=True)
+    dhash = Column(String(16), nullable=True)
+    dhash_band0 = Column(Integer, nullable=True)
+    dhash_band1 = Column(Integer, nullable=True)
+    dhash_band2 = Column(Integer, nullable=True)
+    dhash_band3 = Column(Integer, nullable=True)
+    dhash_band4 = Column(Integer, nullable=True)
+
+    model = Column(String(100), nullable=False)
+    prompt_version = Column(String(32), nullable=False, default="")
+    hint = Column(String(255), nullable=False, default="")
+    result_json = Column(Text, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    last_used_at = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, Text
+from sqlalchemy.orm import relationship, backref
+from app.core.database import Base
+import enum
+
+
+class AnalysisStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class MealAnalysisJob(Base):
+    __tablename__ = "meal_analysis_jobs"
+
+    __table_args__ = (
+        Index('ix_meal_analysis_jobs_user_status', 'user_id', 'status'),
+    )
+
+    id = Column(String(36), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    meal_photo_id = Column(Integer, ForeignKey("meal_photos.id", ondelete="CASCADE"), nullable=False, index=True)
+    status = Column(String(20), nullable=False, default=AnalysisStatus.PENDING.value)
+    error = Column(String(500), nullable=True)
+    partial_result = Column(Text, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+
+    meal_photo = relationship("MealPhoto", backref=backref("analysis_jobs", cascade="all, delete-orphan"))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index, UniqueConstraint
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship, backref
 from app.core.database import Base
@@ -9,6 +9,7 @@ class MealPhoto(Base):
     __table_args__ = (
         Index('ix_meal_photos_user_date', 'user_id', 'created_at'),
         Index('ix_meal_photos_user_barcode', 'user_id', 'barcode'),
+        UniqueConstraint('user_id', 'client_id', name='uq_meal_photos_user_client'),
     )
 
     id = Column(Integer, primary_key=True, index=True)
@@ -17,6 +18,8 @@ class MealPhoto(Base):
     file_name = Column(String(255), nullable=False)
     file_size = Column(Integer, nullable=False)
     mime_type = Column(String(100), nullable=False)
+    thumbnail_path = Column(String(500), nullable=True)
+    medium_path = Column(String(500), nullable=True)
 
     barcode = Column(String(100), nullable=True, index=True)
     meal_name = Column(String(255), nullable=True)
@@ -35,6 +38,9 @@ class MealPhoto(Base):
     
     recipe_id = Column(Integer, ForeignKey("recipes.id", ondelete="SET NULL"), nullable=True, index=True)
 
+    analysis_status = Column(String(20), nullable=True)
+    client_id = Column(String(64), nullable=True)
+
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
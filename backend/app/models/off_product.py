@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, DateTime, Numeric, BigInteger
+from app.core.database import Base
+
+
+class OffProduct(Base):
+    __tablename__ = "off_products"
+
+    code = Column(String(14), primary_key=True)
+    raw_code = Column(String(32), nullable=True)
+    product_name = Column(String(500), nullable=True)
+    generic_name = Column(String(500), nullable=True)
+    brands = Column(String(500), nullable=True)
+
+    calories = Column(Numeric(10, 3), nullable=True)
+    protein = Column(Numeric(10, 3), nullable=True)
+    fat = Column(Numeric(10, 3), nullable=True)
+    carbs = Column(Numeric(10, 3), nullable=True)
+    fiber = Column(Numeric(10, 3), nullable=True)
+    sugar = Column(Numeric(10, 3), nullable=True)
+    sodium = Column(Numeric(10, 3), nullable=True)
+
+    last_modified_t = Column(BigInteger, nullable=True, index=True)
+    imported_at = Column(DateTime(timezone=True), nullable=False)
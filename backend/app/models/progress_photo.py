@@ -13,6 +13,8 @@ class ProgressPhoto(Base):
     file_name = Column(String(255), nullable=False)
     file_size = Column(Integer, nullable=False)
     mime_type = Column(String(100), nullable=False)
+    thumbnail_path = Column(String(500), nullable=True)
+    medium_path = Column(String(500), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     
     user = relationship("User", backref=backref("progress_photos", cascade="all, delete-orphan"))
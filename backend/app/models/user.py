@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, BigInteger, String, Date, DateTime
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -20,6 +20,9 @@ class User(Base):
     
     streak_count = Column(Integer, nullable=True)
     last_streak_date = Column(DateTime(timezone=False), nullable=True)
+    tz_offset_minutes = Column(Integer, nullable=True)
+    rollup_stale_before = Column(Date, nullable=True)
+    data_version = Column(BigInteger, nullable=False, default=0, server_default="0")
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, UniqueConstraint
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship, backref
 from app.core.database import Base
@@ -7,9 +7,14 @@ from app.core.database import Base
 class WeightLog(Base):
     __tablename__ = "weight_logs"
 
+    __table_args__ = (
+        UniqueConstraint('user_id', 'client_id', name='uq_weight_logs_user_client'),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     weight = Column(Float, nullable=False)   
+    client_id = Column(String(64), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     
     user = relationship("User", backref=backref("weight_logs", cascade="all, delete-orphan"))
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, Optional
 
 class MealPhotoBase(BaseModel):
     meal_name: Optional[str] = None
@@ -27,6 +27,8 @@ class MealPhotoResponse(MealPhotoBase):
     mime_type: str
     created_at: datetime
     updated_at: Optional[datetime] = None
+    analysis_status: Optional[str] = None
+    image_url: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -34,3 +36,18 @@ class MealPhotoResponse(MealPhotoBase):
 class MealPhotoUploadResponse(BaseModel):
     photo: MealPhotoResponse
     url: str
+    job_id: Optional[str] = None
+
+class MealAnalysisJobResponse(BaseModel):
+    job_id: str
+    status: str
+    meal_photo_id: int
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    queue_wait_ms: Optional[int] = None
+    analysis_ms: Optional[int] = None
+    total_ms: Optional[int] = None
+    partial: Optional[Dict[str, Any]] = None
+    photo: Optional[MealPhotoResponse] = None
@@ -50,6 +50,7 @@ class ProgressPhotoResponse(BaseModel):
     file_path: str
     file_name: str
     created_at: datetime
+    url: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -0,0 +1,69 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+
+
+class SyncChange(BaseModel):
+    entity: str
+    id: int
+    op: str
+    data: Optional[Dict[str, Any]] = None
+
+
+class SyncResponse(BaseModel):
+    changes: List[SyncChange]
+    next_cursor: str
+    has_more: bool
+    data_version: int
+
+
+class BatchMealItem(BaseModel):
+    client_id: str = Field(..., min_length=1, max_length=64)
+    meal_name: str = Field(..., min_length=1, max_length=255)
+    barcode: Optional[str] = Field(default=None, max_length=100)
+    calories: Optional[int] = Field(default=None, ge=0)
+    protein: Optional[int] = Field(default=None, ge=0)
+    fat: Optional[int] = Field(default=None, ge=0)
+    carbs: Optional[int] = Field(default=None, ge=0)
+    fiber: Optional[int] = Field(default=None, ge=0)
+    sugar: Optional[int] = Field(default=None, ge=0)
+    sodium: Optional[int] = Field(default=None, ge=0)
+    health_score: Optional[int] = Field(default=None, ge=0)
+    created_at: Optional[datetime] = None
+
+
+class BatchWaterItem(BaseModel):
+    client_id: str = Field(..., min_length=1, max_length=64)
+    amount_ml: int = Field(..., ge=1)
+    goal_ml: Optional[int] = Field(default=None, ge=0)
+    created_at: Optional[datetime] = None
+
+
+class BatchWeightItem(BaseModel):
+    client_id: str = Field(..., min_length=1, max_length=64)
+    weight: float = Field(..., gt=0)
+    created_at: Optional[datetime] = None
+
+
+class SyncBatchRequest(BaseModel):
+    meals: List[Any] = []
+    water: List[Any] = []
+    weights: List[Any] = []
+
+
+class SyncBatchItemResult(BaseModel):
+    entity: str
+    index: int
+    client_id: Optional[str] = None
+    status: str
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class SyncBatchResponse(BaseModel):
+    results: List[SyncBatchItemResult]
+    created: int
+    duplicates: int
+    invalid: int
+    new_badges: List[str]
+    data_version: int
@@ -1,12 +1,55 @@
 
+import asyncio
 import json
+import logging
 import re
 import base64
-from pathlib import Path
-from typing import Any, Dict, Optional
+import hashlib
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
-from anthropic import AsyncAnthropic
+import httpx
+from anthropic import (
+    AsyncAnthropic,
+    APIConnectionError,
+    APIStatusError,
+    APITimeoutError,
+    InternalServerError,
+    RateLimitError,
+)
 from app.core.config import settings
+from app.services.resilience import CircuitBreaker, CircuitOpenError, jittered_backoff
+from app.services.streaming_json import IncrementalJSONObjectParser
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504, 529}
+RETRYABLE_ERROR_TYPES = {"overloaded_error", "api_error", "rate_limit_error"}
+
+MEAL_NUMERIC_FIELDS = ("calories", "protein", "fat", "carbs", "fiber", "sugar", "sodium", "health_score")
+
+RECENT_CALL_RECORDS = 50
+EPHEMERAL_CACHE = {"type": "ephemeral"}
+
+
+@dataclass
+class AICallRecord:
+    operation: str
+    model: str
+    streamed: bool
+    input_tokens: int
+    cache_creation_input_tokens: int
+    cache_read_input_tokens: int
+    output_tokens: int
+    latency_ms: float
+    ttft_ms: Optional[float]
+    request_bytes: int
+
+
+def _payload_size(params: Dict[str, Any]) -> int:
+    return len(json.dumps(params, ensure_ascii=False, default=str).encode("utf-8"))
 
 
 def _parse_number(val: Any) -> Optional[int]:
@@ -23,19 +66,232 @@ def _parse_number(val: Any) -> Optional[int]:
     return None
 
 
+_JSON_STRUCTURE = re.compile(r'[{}"\\]')
+_JSON_OBJECT_START = re.compile(r'\{\s*["}]')
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _skip_object(text: str, start: int) -> int:
+    depth = 0
+    in_string = False
+    skip_to = 0
+    for match in _JSON_STRUCTURE.finditer(text, start):
+        index = match.start()
+        if index < skip_to:
+            continue
+        ch = match.group()
+        if in_string:
+            if ch == "\\":
+                skip_to = index + 2
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return index + 1
+    return len(text)
+
+
 def _extract_json(text: str) -> Optional[Dict[str, Any]]:
     if not text:
         return None
-    try:
-        matches = re.findall(r"\{.*\}", text, flags=re.DOTALL)
-        for match in matches:
-            try:
-                return json.loads(match)
-            except json.JSONDecodeError:
-                continue
-    except Exception:
-        pass
-    return None
+
+    position = 0
+    while True:
+        match = _JSON_OBJECT_START.search(text, position)
+        if match is None:
+            return None
+        start = match.start()
+        try:
+            parsed, _ = _JSON_DECODER.raw_decode(text, start)
+        except ValueError:
+            parsed = None
+        if isinstance(parsed, dict):
+            return parsed
+        position = _skip_object(text, start)
+
+
+def _tool(name: str, description: str, properties: Dict[str, Any], required: List[str]) -> Dict[str, Any]:
+    return {
+        "name": name,
+        "description": description,
+        "input_schema": {
+            "type": "object",
+            "properties": properties,
+            "required": required,
+        },
+    }
+
+
+_INT = {"type": "integer"}
+_NUTRITION_PROPERTIES = {
+    "calories": {"type": "integer", "description": "kcal"},
+    "protein": {"type": "integer", "description": "grams"},
+    "fat": {"type": "integer", "description": "grams"},
+    "carbs": {"type": "integer", "description": "grams"},
+    "fiber": {"type": "integer", "description": "grams"},
+    "sugar": {"type": "integer", "description": "grams"},
+    "sodium": {"type": "integer", "description": "mg"},
+    "health_score": {"type": "integer", "description": "0-10"},
+}
+
+MEAL_NUTRITION_TOOL = _tool(
+    "record_meal_nutrition",
+    "Record the identified dish and its nutrition per portion shown in the photo.",
+    {"name": {"type": "string", "description": "Dish description in Russian"}, **_NUTRITION_PROPERTIES},
+    ["name", *_NUTRITION_PROPERTIES],
+)
+
+PRODUCT_NUTRITION_TOOL = _tool(
+    "record_product_nutrition",
+    "Record estimated nutrition per 100g for a packaged product.",
+    {
+        "fiber": _NUTRITION_PROPERTIES["fiber"],
+        "sugar": _NUTRITION_PROPERTIES["sugar"],
+        "sodium": _NUTRITION_PROPERTIES["sodium"],
+        "health_score": _NUTRITION_PROPERTIES["health_score"],
+    },
+    ["fiber", "sugar", "sodium", "health_score"],
+)
+
+MEAL_CORRECTION_TOOL = _tool(
+    "record_meal_correction",
+    "Record the corrected meal data.",
+    {
+        "name": {"type": "string", "description": "Dish name in Russian"},
+        **_NUTRITION_PROPERTIES,
+        "ingredients": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"name": {"type": "string"}, "calories": _INT},
+                "required": ["name", "calories"],
+            },
+        },
+    },
+    ["name", *_NUTRITION_PROPERTIES],
+)
+
+RECIPE_TOOL = _tool(
+    "record_recipe",
+    "Record the generated recipe, all values per serving.",
+    {
+        "name": {"type": "string"},
+        "description": {"type": "string"},
+        "meal_type": {"type": "string", "enum": ["завтрак", "обед", "ужин", "перекус"]},
+        **{k: v for k, v in _NUTRITION_PROPERTIES.items() if k != "health_score"},
+        "health_score": {"type": "number", "description": "0.0-10.0"},
+        "time": {"type": "integer", "description": "minutes"},
+        "difficulty": {"type": "string", "enum": ["Легко", "Средне", "Сложно"]},
+        "ingredients": {"type": "array", "items": {"type": "string"}},
+        "instructions": {"type": "array", "items": {"type": "string"}},
+    },
+    ["name", "meal_type", "calories", "protein", "fat", "carbs", "ingredients", "instructions"],
+)
+
+
+MEAL_PHOTO_SYSTEM_PROMPT = (
+    "You are an expert nutrition scientist and food analyst. Your task is to carefully and accurately identify "
+    "the specific food items in photos and estimate their nutritional values. Take your time to examine every detail. "
+    "Always respond with valid JSON only, no additional text or markdown."
+    "\n\n"
+    "CAREFULLY analyze this food photo and identify the EXACT food items. Take your time to examine every detail.\n\n"
+    "IDENTIFICATION CHECKLIST:\n"
+    "1. FRUIT/VEGETABLE TYPE: Look at color, texture, shape, size carefully\n"
+    "   - Coconut: white/cream flesh, large round brown shell, hairy appearance (NOT chocolate)\n"
+    "   - Chocolate: brown color, smooth shiny surface, often in rectangular shapes\n"
+    "   - Pomegranate: reddish-brown exterior, visible seeds, bumpy skin (NOT grapefruit)\n"
+    "   - Grapefruit: large round yellow/pink citrus, similar to orange but larger, smooth skin\n"
+    "2. EXAMINE EVERY VISIBLE ELEMENT: count items, measure portions, identify mixed items\n"
+    "3. LOOK FOR DISTINGUISHING FEATURES: seeds, skins, textures, leaves, stems\n"
+    "4. CROSS-CHECK YOUR IDENTIFICATION: does this really match what I see?\n\n"
+    "Respond ONLY with a JSON object in this exact format:\n"
+    '{"name": "detailed dish description in Russian with specific food items", "calories": number, "protein": number, "fat": number, '
+    '"carbs": number, "fiber": number, "sugar": number, "sodium": number, "health_score": number}\n'
+    "Rules:\n"
+    "- Use integers only, no decimal points\n"
+    "- Values should be per portion shown in the photo\n"
+    "- calories in kcal, protein/fat/carbs/fiber/sugar in grams, sodium in mg\n"
+    "- health_score: 0-3 unhealthy, 4-6 moderate, 7-10 healthy\n"
+    "- name in Russian language, be specific about what you see (e.g., 'Гранат нарезанный с семенами' not just 'фрукт')\n"
+    "- If uncertain about portion size, estimate based on visible reference objects\n"
+    "- If uncertain about specific identification, describe what you see in detail in the name field\n"
+    "- NEVER guess, use reasonable estimates based on actual identification, NOT 0"
+)
+
+
+MEAL_PROMPT_VERSION = hashlib.sha256(
+    json.dumps([MEAL_PHOTO_SYSTEM_PROMPT, MEAL_NUTRITION_TOOL], sort_keys=True).encode("utf-8")
+).hexdigest()[:12]
+
+
+RECIPE_SYSTEM_PROMPT = (
+    "You are an expert nutritionist and chef. Generate healthy, balanced recipes based on user's request. "
+    "Always respond with valid JSON only, no additional text or markdown."
+    "\n\n"
+    "Based on the user's request, create a recipe. Determine the meal type (завтрак/обед/ужин/перекус) automatically. "
+    "Respond with JSON in this exact format:\n"
+    '{"name": "recipe name in Russian", "description": "brief description in Russian", '
+    '"meal_type": "завтрак" | "обед" | "ужин" | "перекус", '
+    '"calories": int, "protein": int, "fat": int, "carbs": int, '
+    '"fiber": int, "sugar": int, "sodium": int, "health_score": float (0.0-10.0), '
+    '"time": int, "difficulty": "Легко" | "Средне" | "Сложно", '
+    '"ingredients": ["ingredient1 in Russian", "ingredient2", ...], '
+    '"instructions": ["step1 in Russian", "step2", ...]}\n'
+    "Rules:\n"
+    "- All values per serving\n"
+    "- calories in kcal, protein/fat/carbs/fiber/sugar in grams, sodium in mg\n"
+    "- health_score: 0.0-10.0 based on nutritional value (higher is healthier, use 1 decimal place)\n"
+    "- time in minutes\n"
+    "- difficulty: Легко (up to 20 min), Средне (20-40 min), Сложно (40+ min)\n"
+    "- All text in Russian\n"
+    "- If user specifies calorie target, try to match it\n"
+    "- If user lists ingredients, use them in the recipe\n"
+    "- Make it healthy and balanced"
+)
+
+
+PRODUCT_SYSTEM_PROMPT = (
+    "You are an expert nutritionist. Analyze food product data and estimate missing nutritional values. "
+    "Always respond with valid JSON only."
+    "\n\n"
+    "Estimate nutritional content per 100g. Respond with JSON: "
+    '{"fiber": int, "sugar": int, "sodium": int, "health_score": int}\n'
+    "fiber/sugar in grams, sodium in mg, health_score 0-10"
+)
+
+PRODUCT_PROMPT_VERSION = hashlib.sha256(
+    json.dumps([PRODUCT_SYSTEM_PROMPT, PRODUCT_NUTRITION_TOOL], sort_keys=True).encode("utf-8")
+).hexdigest()[:12]
+
+
+CORRECTION_SYSTEM_PROMPT = (
+    "You are an expert nutrition assistant. User wants to correct a meal's nutritional information. "
+    "Analyze their request and provide corrected values. Respond with valid JSON only."
+    "\n\n"
+    "Provide corrected data in JSON format:\n"
+    '{"name": "...", "calories": int, "protein": int, "fat": int, "carbs": int, '
+    '"fiber": int, "sugar": int, "sodium": int, "health_score": int, '
+    '"ingredients": [{"name": "...", "calories": int}]}\n'
+    "Only change values mentioned by user. Name in Russian."
+)
+
+
+def _message_text(message: Any) -> str:
+    return "".join(
+        block.text for block in (message.content or []) if getattr(block, "type", None) == "text"
+    )
+
+
+def _message_json(message: Any) -> Optional[Dict[str, Any]]:
+    for block in message.content or []:
+        if getattr(block, "type", None) == "tool_use" and isinstance(block.input, dict):
+            return block.input
+    return _extract_json(_message_text(message))
 
 
 class AIService:
@@ -44,165 +300,447 @@ class AIService:
         self.api_key = settings.anthropic_api_key
         self.model = getattr(settings, "anthropic_model", "claude-3-haiku-20240307")
         self.timeout = getattr(settings, "anthropic_timeout", 30)
+        self.max_concurrency = max(1, settings.anthropic_max_concurrency)
+        self.max_retries = max(0, settings.anthropic_max_retries)
+        self.breaker = CircuitBreaker(
+            "anthropic",
+            window=settings.anthropic_breaker_window,
+            min_calls=settings.anthropic_breaker_min_calls,
+            error_rate=settings.anthropic_breaker_error_rate,
+            slow_call_seconds=settings.anthropic_breaker_slow_call_seconds,
+            slow_call_rate=settings.anthropic_breaker_slow_call_rate,
+            open_seconds=settings.anthropic_breaker_open_seconds,
+        )
+        self._client: Optional[AsyncAnthropic] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._in_flight = 0
+        self._waiting = 0
+        self._counters = {
+            "calls": 0,
+            "failures": 0,
+            "retries": 0,
+            "rejected_open": 0,
+            "rejected_queue": 0,
+            "queue_wait_ms_total": 0.0,
+            "queue_wait_ms_max": 0.0,
+        }
+        self._recent_calls = deque(maxlen=RECENT_CALL_RECORDS)
+        self._usage: Dict[str, Dict[str, float]] = {}
     
     @property
     def is_configured(self) -> bool:
         return bool(self.api_key)
+
+    def _get_client(self) -> AsyncAnthropic:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = AsyncAnthropic(
+                api_key=self.api_key,
+                base_url=settings.anthropic_base_url or None,
+                timeout=self.timeout,
+                max_retries=0,
+                connection_pool_limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            try:
+                await self._client.close()
+            except Exception:
+                pass
+        self._client = None
+        self._semaphore = None
+        self._loop = None
+
+    def stats(self) -> Dict[str, Any]:
+        calls = self._counters["calls"]
+        waits = calls + self._counters["rejected_queue"]
+        return {
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "max_concurrency": self.max_concurrency,
+            "calls": calls,
+            "failures": self._counters["failures"],
+            "retries": self._counters["retries"],
+            "rejected_open": self._counters["rejected_open"],
+            "rejected_queue": self._counters["rejected_queue"],
+            "queue_wait_ms_avg": round(self._counters["queue_wait_ms_total"] / waits, 1) if waits else None,
+            "queue_wait_ms_max": round(self._counters["queue_wait_ms_max"], 1),
+            "breaker": self.breaker.stats(),
+            "usage": self.usage_stats(),
+        }
+
+    def usage_stats(self) -> Dict[str, Any]:
+        operations = {}
+        for operation, totals in self._usage.items():
+            calls = totals["calls"]
+            prompt_tokens = (
+                totals["input_tokens"]
+                + totals["cache_creation_input_tokens"]
+                + totals["cache_read_input_tokens"]
+            )
+            operations[operation] = {
+                "calls": int(calls),
+                "input_tokens": int(totals["input_tokens"]),
+                "cache_creation_input_tokens": int(totals["cache_creation_input_tokens"]),
+                "cache_read_input_tokens": int(totals["cache_read_input_tokens"]),
+                "output_tokens": int(totals["output_tokens"]),
+                "cache_read_ratio": round(totals["cache_read_input_tokens"] / prompt_tokens, 3) if prompt_tokens else None,
+                "latency_ms_avg": round(totals["latency_ms"] / calls, 1),
+                "ttft_ms_avg": round(totals["ttft_ms"] / totals["streamed"], 1) if totals["streamed"] else None,
+                "request_bytes_avg": int(totals["request_bytes"] / calls),
+            }
+        return {
+            "prompt_caching": settings.anthropic_prompt_caching,
+            "operations": operations,
+            "recent": [asdict(record) for record in list(self._recent_calls)[-10:]],
+        }
+
+    def recent_calls(self) -> List[AICallRecord]:
+        return list(self._recent_calls)
+
+    def _account(
+        self,
+        operation: str,
+        params: Dict[str, Any],
+        message: Any,
+        started: float,
+        request_bytes: int,
+        ttft: Optional[float] = None,
+    ) -> AICallRecord:
+        usage = getattr(message, "usage", None)
+        record = AICallRecord(
+            operation=operation,
+            model=params.get("model", self.model),
+            streamed=ttft is not None,
+            input_tokens=getattr(usage, "input_tokens", None) or 0,
+            cache_creation_input_tokens=getattr(usage, "cache_creation_input_tokens", None) or 0,
+            cache_read_input_tokens=getattr(usage, "cache_read_input_tokens", None) or 0,
+            output_tokens=getattr(usage, "output_tokens", None) or 0,
+            latency_ms=round((time.perf_counter() - started) * 1000, 1),
+            ttft_ms=round((ttft - started) * 1000, 1) if ttft is not None else None,
+            request_bytes=request_bytes,
+        )
+        self._recent_calls.append(record)
+        totals = self._usage.setdefault(operation, {
+            "calls": 0, "streamed": 0, "input_tokens": 0, "cache_creation_input_tokens": 0,
+            "cache_read_input_tokens": 0, "output_tokens": 0, "latency_ms": 0.0, "ttft_ms": 0.0,
+            "request_bytes": 0,
+        })
+        totals["calls"] += 1
+        totals["input_tokens"] += record.input_tokens
+        totals["cache_creation_input_tokens"] += record.cache_creation_input_tokens
+        totals["cache_read_input_tokens"] += record.cache_read_input_tokens
+        totals["output_tokens"] += record.output_tokens
+        totals["latency_ms"] += record.latency_ms
+        totals["request_bytes"] += record.request_bytes
+        if record.ttft_ms is not None:
+            totals["streamed"] += 1
+            totals["ttft_ms"] += record.ttft_ms
+        logger.info(
+            f"Claude call {operation}: input={record.input_tokens} "
+            f"cache_write={record.cache_creation_input_tokens} cache_read={record.cache_read_input_tokens} "
+            f"output={record.output_tokens} latency={record.latency_ms}ms ttft={record.ttft_ms}ms "
+            f"payload={record.request_bytes}B"
+        )
+        return record
+
+    def _record_wait(self, started: float):
+        wait_ms = (time.perf_counter() - started) * 1000
+        self._counters["queue_wait_ms_total"] += wait_ms
+        self._counters["queue_wait_ms_max"] = max(self._counters["queue_wait_ms_max"], wait_ms)
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        if isinstance(error, (APIConnectionError, APITimeoutError, RateLimitError, InternalServerError)):
+            return True
+        if not isinstance(error, APIStatusError):
+            return False
+        if error.status_code in RETRYABLE_STATUS_CODES:
+            return True
+        body = error.body if isinstance(error.body, dict) else {}
+        details = body.get("error") if isinstance(body.get("error"), dict) else body
+        return details.get("type") in RETRYABLE_ERROR_TYPES
+
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        delay = jittered_backoff(
+            attempt,
+            settings.anthropic_retry_base_delay,
+            settings.anthropic_retry_max_delay,
+        )
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                delay = max(delay, min(float(retry_after), settings.anthropic_retry_max_delay))
+            except ValueError:
+                pass
+        return delay
+
+    def _messages_api(self) -> Any:
+        client = self._get_client()
+        if settings.anthropic_prompt_caching:
+            return client.beta.prompt_caching.messages
+        return client.messages
+
+    async def _create_message(self, operation: str, **params) -> Any:
+        api = self._messages_api()
+        request_bytes = _payload_size(params)
+        started = time.perf_counter()
+        message = await self._guarded(lambda: api.create(**params))
+        self._account(operation, params, message, started, request_bytes)
+        return message
+
+    async def _stream_message(
+        self,
+        operation: str,
+        on_text: Callable[[str], Awaitable[None]],
+        on_attempt: Optional[Callable[[], None]] = None,
+        **params
+    ) -> Any:
+        api = self._messages_api()
+        request_bytes = _payload_size(params)
+        started = time.perf_counter()
+        first_token: Optional[float] = None
+
+        async def request():
+            nonlocal first_token
+            first_token = None
+            if on_attempt is not None:
+                on_attempt()
+            async with api.stream(**params) as stream:
+                async for event in stream:
+                    if event.type == "text":
+                        delta = event.text
+                    elif event.type == "input_json":
+                        delta = event.partial_json
+                    else:
+                        continue
+                    if first_token is None:
+                        first_token = time.perf_counter()
+                    await on_text(delta)
+                return await stream.get_final_message()
+
+        message = await self._guarded(request)
+        self._account(operation, params, message, started, request_bytes, first_token or time.perf_counter())
+        return message
+
+    async def _guarded(self, request: Callable[[], Awaitable[Any]]) -> Any:
+        self._get_client()
+        semaphore = self._semaphore
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.breaker.allow()
+            except CircuitOpenError:
+                self._counters["rejected_open"] += 1
+                raise
+
+            wait_started = time.perf_counter()
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(semaphore.acquire(), timeout=settings.anthropic_queue_timeout)
+            except asyncio.TimeoutError:
+                self._counters["rejected_queue"] += 1
+                self._record_wait(wait_started)
+                self.breaker.release_probe()
+                raise
+            except BaseException:
+                self.breaker.release_probe()
+                raise
+            finally:
+                self._waiting -= 1
+
+            self._record_wait(wait_started)
+            self._in_flight += 1
+            self._counters["calls"] += 1
+            call_started = time.monotonic()
+            try:
+                message = await request()
+            except asyncio.CancelledError:
+                self.breaker.release_probe()
+                raise
+            except Exception as e:
+                self._counters["failures"] += 1
+                retryable = self._is_retryable(e)
+                self.breaker.record(not retryable, time.monotonic() - call_started)
+                if attempt >= self.max_retries or not retryable:
+                    raise
+                error = e
+            else:
+                self.breaker.record(True, time.monotonic() - call_started)
+                return message
+            finally:
+                self._in_flight -= 1
+                semaphore.release()
+
+            self._counters["retries"] += 1
+            await asyncio.sleep(self._retry_delay(error, attempt))
     
-    async def _call_claude(
+    def _tool_params(self, tool: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        if tool is None or not settings.anthropic_structured_output:
+            return {}
+        return {
+            "tools": [tool],
+            "tool_choice": {"type": "tool", "name": tool["name"]},
+        }
+
+    @staticmethod
+    def _system_param(system_prompt: str) -> Any:
+        if not settings.anthropic_prompt_caching:
+            return system_prompt
+        return [{"type": "text", "text": system_prompt, "cache_control": EPHEMERAL_CACHE}]
+
+    def _request_params(
         self,
         system_prompt: str,
         user_content: Any,
-        max_tokens: int = 256,
-        temperature: float = 0.1
-    ) -> Optional[str]:
-        import logging
-        logger = logging.getLogger(__name__)
-        
+        max_tokens: int,
+        temperature: float,
+        tool: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "system": self._system_param(system_prompt),
+            "messages": [{"role": "user", "content": user_content}],
+            **self._tool_params(tool),
+        }
+
+    async def _send(
+        self,
+        system_prompt: str,
+        user_content: Any,
+        max_tokens: int,
+        temperature: float,
+        tool: Optional[Dict[str, Any]] = None,
+    ) -> Optional[Any]:
         if not self.is_configured:
             logger.error("Claude API not configured")
             return None
-        
+
         try:
             logger.info(f"Calling Claude API: model={self.model}, max_tokens={max_tokens}")
-            
-            async with AsyncAnthropic(
-                api_key=self.api_key,
-                timeout=self.timeout
-            ) as client:
-                # If user_content is a list (for vision), handle it directly
-                if isinstance(user_content, list):
-                    message = await client.messages.create(
-                        model=self.model,
-                        max_tokens=max_tokens,
-                        temperature=temperature,
-                        system=system_prompt,
-                        messages=[{"role": "user", "content": user_content}]
-                    )
-                else:
-                    # Simple text content
-                    message = await client.messages.create(
-                        model=self.model,
-                        max_tokens=max_tokens,
-                        temperature=temperature,
-                        system=system_prompt,
-                        messages=[{"role": "user", "content": user_content}]
-                    )
-            
-            if message.content and len(message.content) > 0:
-                response_text = message.content[0].text
-                logger.info(f"Claude response received: {len(response_text)} chars")
-                return response_text
-            
-            logger.warning("Claude returned empty response")
+
+            return await self._create_message(
+                tool["name"] if tool else "text",
+                **self._request_params(system_prompt, user_content, max_tokens, temperature, tool),
+            )
+
+        except CircuitOpenError:
+            logger.warning("Claude API circuit open, skipping call")
+            return None
+        except asyncio.TimeoutError:
+            logger.warning("Claude API concurrency limit reached, queue wait timed out")
             return None
-            
         except Exception as e:
             logger.error(f"Error calling Claude API: {str(e)}", exc_info=True)
             return None
+    
+    async def _call_claude(
+        self,
+        system_prompt: str,
+        user_content: Any,
+        max_tokens: int = 256,
+        temperature: float = 0.1
+    ) -> Optional[str]:
+        message = await self._send(system_prompt, user_content, max_tokens, temperature)
+        if message is None:
+            return None
 
-    async def analyze_meal_photo(
+        response_text = _message_text(message)
+        if response_text:
+            logger.info(f"Claude response received: {len(response_text)} chars")
+            return response_text
+
+        logger.warning("Claude returned empty response")
+        return None
+
+    async def _call_claude_json(
         self,
-        file_path: Path,
+        system_prompt: str,
+        user_content: Any,
+        tool: Dict[str, Any],
+        max_tokens: int = 256,
+        temperature: float = 0.1
+    ) -> Optional[Dict[str, Any]]:
+        message = await self._send(system_prompt, user_content, max_tokens, temperature, tool)
+        if message is None:
+            return None
+
+        extracted = _message_json(message)
+        if extracted is None:
+            logger.error(f"Failed to extract JSON from Claude response: {_message_text(message)[:500]}")
+        return extracted
+
+    def _meal_image_request(
+        self,
+        image_bytes: bytes,
+        mime_type: str,
+        meal_name_hint: Optional[str] = None
+    ):
+        b64_image = base64.b64encode(image_bytes).decode("utf-8")
+
+        user_prompt_text = "Analyze this food photo."
+        if meal_name_hint:
+            user_prompt_text += f"\n\nHint: the dish might be '{meal_name_hint}'"
+
+        user_content = [
+            {
+                "type": "image",
+                "source": {
+                    "type": "base64",
+                    "media_type": mime_type,
+                    "data": b64_image,
+                }
+            },
+            {"type": "text", "text": user_prompt_text},
+        ]
+
+        return MEAL_PHOTO_SYSTEM_PROMPT, user_content
+
+    @staticmethod
+    def _meal_image_result(extracted: Dict[str, Any], meal_name_hint: Optional[str]) -> Dict[str, Any]:
+        result = {field: _parse_number(extracted.get(field)) for field in MEAL_NUMERIC_FIELDS}
+        result["detected_meal_name"] = extracted.get("name") or meal_name_hint
+        return result
+
+    async def analyze_meal_image(
+        self,
+        image_bytes: bytes,
+        mime_type: str,
         meal_name_hint: Optional[str] = None
     ) -> Optional[Dict[str, Any]]:
-        import logging
-        logger = logging.getLogger(__name__)
-        
         if not self.is_configured:
             logger.error("AI service not configured - missing API key")
             return None
         
         try:
-            mime_types = {
-                ".png": "image/png",
-                ".webp": "image/webp",
-                ".heic": "image/heic",
-                ".heif": "image/heic",
-            }
-            suffix = file_path.suffix.lower()
-            mime_type = mime_types.get(suffix, "image/jpeg")
+            logger.info(f"Analyzing image: {len(image_bytes)} bytes, type: {mime_type}, hint: {meal_name_hint}")
             
-            with open(file_path, "rb") as f:
-                b64_image = base64.b64encode(f.read()).decode("utf-8")
+            system_prompt, user_content = self._meal_image_request(image_bytes, mime_type, meal_name_hint)
             
-            logger.info(f"Analyzing image: {file_path.name}, type: {mime_type}, hint: {meal_name_hint}")
-            
-            system_prompt = (
-                "You are an expert nutrition scientist and food analyst. Your task is to carefully and accurately identify "
-                "the specific food items in photos and estimate their nutritional values. Take your time to examine every detail. "
-                "Always respond with valid JSON only, no additional text or markdown."
-            )
-            
-            user_prompt_text = (
-                "CAREFULLY analyze this food photo and identify the EXACT food items. Take your time to examine every detail.\n\n"
-                "IDENTIFICATION CHECKLIST:\n"
-                "1. FRUIT/VEGETABLE TYPE: Look at color, texture, shape, size carefully\n"
-                "   - Coconut: white/cream flesh, large round brown shell, hairy appearance (NOT chocolate)\n"
-                "   - Chocolate: brown color, smooth shiny surface, often in rectangular shapes\n"
-                "   - Pomegranate: reddish-brown exterior, visible seeds, bumpy skin (NOT grapefruit)\n"
-                "   - Grapefruit: large round yellow/pink citrus, similar to orange but larger, smooth skin\n"
-                "2. EXAMINE EVERY VISIBLE ELEMENT: count items, measure portions, identify mixed items\n"
-                "3. LOOK FOR DISTINGUISHING FEATURES: seeds, skins, textures, leaves, stems\n"
-                "4. CROSS-CHECK YOUR IDENTIFICATION: does this really match what I see?\n\n"
-                "Respond ONLY with a JSON object in this exact format:\n"
-                '{"name": "detailed dish description in Russian with specific food items", "calories": number, "protein": number, "fat": number, '
-                '"carbs": number, "fiber": number, "sugar": number, "sodium": number, "health_score": number}\n'
-                "Rules:\n"
-                "- Use integers only, no decimal points\n"
-                "- Values should be per portion shown in the photo\n"
-                "- calories in kcal, protein/fat/carbs/fiber/sugar in grams, sodium in mg\n"
-                "- health_score: 0-3 unhealthy, 4-6 moderate, 7-10 healthy\n"
-                "- name in Russian language, be specific about what you see (e.g., 'Гранат нарезанный с семенами' not just 'фрукт')\n"
-                "- If uncertain about portion size, estimate based on visible reference objects\n"
-                "- If uncertain about specific identification, describe what you see in detail in the name field\n"
-                "- NEVER guess, use reasonable estimates based on actual identification, NOT 0"
-            )
-            
-            if meal_name_hint:
-                user_prompt_text += f"\n\nHint: the dish might be '{meal_name_hint}'"
-            
-            user_content = [
-                {"type": "text", "text": user_prompt_text},
-                {
-                    "type": "image",
-                    "source": {
-                        "type": "base64",
-                        "media_type": mime_type,
-                        "data": b64_image,
-                    }
-                }
-            ]
-            
-            generated_text = await self._call_claude(
+            extracted = await self._call_claude_json(
                 system_prompt,
                 user_content,
+                MEAL_NUTRITION_TOOL,
                 max_tokens=512,
                 temperature=0.1
             )
             
-            if not generated_text:
-                logger.error("Claude API returned no response")
-                return None
-            
-            logger.info(f"Claude response: {generated_text[:200]}...")
-            
-            extracted = _extract_json(generated_text)
             if not extracted:
-                logger.error(f"Failed to extract JSON from response: {generated_text}")
+                logger.error("Claude API returned no usable response")
                 return None
             
-            result = {
-                "calories": _parse_number(extracted.get("calories")),
-                "protein": _parse_number(extracted.get("protein")),
-                "fat": _parse_number(extracted.get("fat")),
-                "carbs": _parse_number(extracted.get("carbs")),
-                "fiber": _parse_number(extracted.get("fiber")),
-                "sugar": _parse_number(extracted.get("sugar")),
-                "sodium": _parse_number(extracted.get("sodium")),
-                "health_score": _parse_number(extracted.get("health_score")),
-                "detected_meal_name": extracted.get("name") or meal_name_hint,
-            }
+            result = self._meal_image_result(extracted, meal_name_hint)
             
             logger.info(f"Parsed nutrition data: {result}")
             return result
@@ -211,6 +749,67 @@ class AIService:
             logger.error(f"Error analyzing meal photo: {str(e)}", exc_info=True)
             return None
 
+    async def analyze_meal_image_stream(
+        self,
+        image_bytes: bytes,
+        mime_type: str,
+        meal_name_hint: Optional[str] = None,
+        on_field: Optional[Callable[[str, Any], Awaitable[None]]] = None,
+        on_retry: Optional[Callable[[], None]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        if not self.is_configured:
+            logger.error("AI service not configured - missing API key")
+            return None
+
+        system_prompt, user_content = self._meal_image_request(image_bytes, mime_type, meal_name_hint)
+        chunks = []
+        parser = IncrementalJSONObjectParser()
+        attempts = 0
+
+        def on_attempt():
+            nonlocal parser, attempts
+            attempts += 1
+            chunks.clear()
+            parser = IncrementalJSONObjectParser()
+            if attempts > 1 and on_retry is not None:
+                on_retry()
+
+        async def on_text(text: str):
+            chunks.append(text)
+            if on_field is None:
+                return
+            for key, value in parser.feed(text):
+                if key == "name" and isinstance(value, str) and value:
+                    await on_field("detected_meal_name", value)
+                elif key in MEAL_NUMERIC_FIELDS:
+                    number = _parse_number(value)
+                    if number is not None:
+                        await on_field(key, number)
+
+        try:
+            logger.info(f"Streaming image analysis: {len(image_bytes)} bytes, type: {mime_type}, hint: {meal_name_hint}")
+            message = await self._stream_message(
+                MEAL_NUTRITION_TOOL["name"],
+                on_text,
+                on_attempt,
+                **self._request_params(system_prompt, user_content, 512, 0.1, MEAL_NUTRITION_TOOL),
+            )
+        except CircuitOpenError:
+            logger.warning("Claude API circuit open, skipping call")
+            return None
+        except asyncio.TimeoutError:
+            logger.warning("Claude API concurrency limit reached, queue wait timed out")
+            return None
+        except Exception as e:
+            logger.error(f"Error streaming meal photo analysis: {str(e)}", exc_info=True)
+            return None
+
+        extracted = _message_json(message) or _extract_json("".join(chunks))
+        if not extracted:
+            logger.error(f"Failed to extract JSON from streamed response: {''.join(chunks)[:500]}")
+            return None
+        return self._meal_image_result(extracted, meal_name_hint)
+
     async def analyze_barcode_product(
         self,
         product_data: Dict[str, Any]
@@ -226,26 +825,13 @@ class AIService:
                 "Product"
             )
             
-            system_prompt = (
-                "You are an expert nutritionist. Analyze food product data and estimate missing nutritional values. "
-                "Always respond with valid JSON only."
-            )
-            
             user_prompt = (
                 f"Analyze this food product and estimate nutritional content per 100g:\n"
                 f"Product: {product_name}\n"
-                f"Nutriments: {json.dumps(nutriments)}\n\n"
-                "Respond with JSON: "
-                '{"fiber": int, "sugar": int, "sodium": int, "health_score": int}\n'
-                "fiber/sugar in grams, sodium in mg, health_score 0-10"
+                f"Nutriments: {json.dumps(nutriments)}"
             )
             
-            response_text = await self._call_claude(system_prompt, user_prompt)
-            if not response_text:
-                return None
-            
-            
-            extracted = _extract_json(response_text)
+            extracted = await self._call_claude_json(PRODUCT_SYSTEM_PROMPT, user_prompt, PRODUCT_NUTRITION_TOOL)
             if not extracted:
                 return None
             
@@ -268,33 +854,19 @@ class AIService:
             return None
         
         try:
-            system_prompt = (
-                "You are an expert nutrition assistant. User wants to correct a meal's nutritional information. "
-                "Analyze their request and provide corrected values. Respond with valid JSON only."
-            )
-            
             user_prompt = (
                 f"Current meal data: {json.dumps(current_data, ensure_ascii=False)}\n\n"
-                f"User's correction: {correction_text}\n\n"
-                "Provide corrected data in JSON format:\n"
-                '{"name": "...", "calories": int, "protein": int, "fat": int, "carbs": int, '
-                '"fiber": int, "sugar": int, "sodium": int, "health_score": int, '
-                '"ingredients": [{"name": "...", "calories": int}]}\n'
-                "Only change values mentioned by user. Name in Russian."
+                f"User's correction: {correction_text}"
             )
             
-            response_text = await self._call_claude(
-                system_prompt, 
+            extracted = await self._call_claude_json(
+                CORRECTION_SYSTEM_PROMPT, 
                 user_prompt, 
+                MEAL_CORRECTION_TOOL,
                 max_tokens=512,
                 temperature=0.2
             )
             
-            if not response_text:
-                return None
-            
-            
-            extracted = _extract_json(response_text)
             if not extracted:
                 return None
             
@@ -322,45 +894,16 @@ class AIService:
             return None
         
         try:
-            system_prompt = (
-                "You are an expert nutritionist and chef. Generate healthy, balanced recipes based on user's request. "
-                "Always respond with valid JSON only, no additional text or markdown."
-            )
+            user_prompt = f"User request: {user_request}"
             
-            user_prompt = (
-                f"User request: {user_request}\n\n"
-                "Based on the user's request, create a recipe. Determine the meal type (завтрак/обед/ужин/перекус) automatically. "
-                "Respond with JSON in this exact format:\n"
-                '{"name": "recipe name in Russian", "description": "brief description in Russian", '
-                '"meal_type": "завтрак" | "обед" | "ужин" | "перекус", '
-                '"calories": int, "protein": int, "fat": int, "carbs": int, '
-                '"fiber": int, "sugar": int, "sodium": int, "health_score": float (0.0-10.0), '
-                '"time": int, "difficulty": "Легко" | "Средне" | "Сложно", '
-                '"ingredients": ["ingredient1 in Russian", "ingredient2", ...], '
-                '"instructions": ["step1 in Russian", "step2", ...]}\n'
-                "Rules:\n"
-                "- All values per serving\n"
-                "- calories in kcal, protein/fat/carbs/fiber/sugar in grams, sodium in mg\n"
-                "- health_score: 0.0-10.0 based on nutritional value (higher is healthier, use 1 decimal place)\n"
-                "- time in minutes\n"
-                "- difficulty: Легко (up to 20 min), Средне (20-40 min), Сложно (40+ min)\n"
-                "- All text in Russian\n"
-                "- If user specifies calorie target, try to match it\n"
-                "- If user lists ingredients, use them in the recipe\n"
-                "- Make it healthy and balanced"
-            )
-            
-            response_text = await self._call_claude(
-                system_prompt,
+            extracted = await self._call_claude_json(
+                RECIPE_SYSTEM_PROMPT,
                 user_prompt,
+                RECIPE_TOOL,
                 max_tokens=1024,
                 temperature=0.7
             )
             
-            if not response_text:
-                return None
-            
-            extracted = _extract_json(response_text)
             if not extracted:
                 return None
             
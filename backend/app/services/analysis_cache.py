@@ -0,0 +1,280 @@
+import hashlib
+import io
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import or_
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.meal_analysis_cache import MealAnalysisCacheEntry
+from app.services.ai_service import MEAL_PROMPT_VERSION
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+# Two hashes within distance d agree on at least one of d + 1 bands, so
+# five bands find every match up to MAX_BAND_DISTANCE.
+DHASH_BAND_WIDTHS = (13, 13, 13, 13, 12)
+DHASH_BANDS = len(DHASH_BAND_WIDTHS)
+MAX_BAND_DISTANCE = DHASH_BANDS - 1
+PURGE_EVERY_STORES = 100
+# Hits leave the row alone unless last_used_at (the per-user eviction order)
+# is older than this.
+TOUCH_AFTER = timedelta(days=1)
+
+
+@dataclass
+class ImageFingerprint:
+    content_hash: str
+    dhash: Optional[int]
+
+    @property
+    def bands(self):
+        if self.dhash is None:
+            return [None] * DHASH_BANDS
+        bands, shift = [], 0
+        for width in DHASH_BAND_WIDTHS:
+            bands.append((self.dhash >> shift) & ((1 << width) - 1))
+            shift += width
+        return bands
+
+
+def compute_dhash(image_bytes: bytes, hash_size: int = 8) -> Optional[int]:
+    if not PIL_AVAILABLE:
+        return None
+    try:
+        img = Image.open(io.BytesIO(image_bytes))
+        img.draft("L", (hash_size * 8, hash_size * 8))
+        img = img.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS)
+    except Exception as e:
+        logger.warning(f"dHash failed: {e}")
+        return None
+    pixels = list(img.getdata())
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def image_fingerprint(image_bytes: bytes) -> ImageFingerprint:
+    return ImageFingerprint(
+        content_hash=hashlib.sha256(image_bytes).hexdigest(),
+        dhash=compute_dhash(image_bytes),
+    )
+
+
+def _hint_key(meal_name_hint: Optional[str]) -> str:
+    return (meal_name_hint or "").strip().lower()[:255]
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class AnalysisCache:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {
+            "exact_hits": 0,
+            "near_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "errors": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return settings.analysis_cache_enabled
+
+    @property
+    def is_global(self) -> bool:
+        return settings.analysis_cache_scope.lower() == "global"
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters["exact_hits"] + counters["near_hits"] + counters["misses"]
+        hits = counters["exact_hits"] + counters["near_hits"]
+        counters["hit_rate"] = round(hits / lookups, 4) if lookups else None
+        counters["scope"] = "global" if self.is_global else "user"
+        counters["max_distance"] = self.max_distance
+        counters["prompt_version"] = MEAL_PROMPT_VERSION
+        return counters
+
+    @property
+    def max_distance(self) -> int:
+        return min(settings.analysis_cache_max_distance, MAX_BAND_DISTANCE)
+
+    def _base_query(self, query, user_id: int, model: str, hint: str):
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.analysis_cache_ttl_hours)
+        query = query.filter(
+            MealAnalysisCacheEntry.model == model,
+            MealAnalysisCacheEntry.prompt_version == MEAL_PROMPT_VERSION,
+            MealAnalysisCacheEntry.hint == hint,
+            MealAnalysisCacheEntry.created_at >= cutoff,
+        )
+        if not self.is_global:
+            query = query.filter(MealAnalysisCacheEntry.user_id == user_id)
+        return query
+
+    def _find_near(self, db, user_id: int, fingerprint: ImageFingerprint, model: str, hint: str):
+        bands = fingerprint.bands
+        columns = (
+            MealAnalysisCacheEntry.id,
+            MealAnalysisCacheEntry.user_id,
+            MealAnalysisCacheEntry.dhash,
+        )
+        candidates = self._base_query(db.query(*columns), user_id, model, hint).filter(or_(
+            *(getattr(MealAnalysisCacheEntry, f"dhash_band{i}") == band for i, band in enumerate(bands))
+        ))
+
+        best, best_distance = None, None
+        for entry in candidates:
+            distance = hamming_distance(fingerprint.dhash, int(entry.dhash, 16))
+            if distance > self.max_distance:
+                continue
+            if (
+                best is None
+                or distance < best_distance
+                or (distance == best_distance and entry.user_id == user_id and best.user_id != user_id)
+            ):
+                best, best_distance = entry, distance
+        if best is None:
+            return None
+        return db.query(MealAnalysisCacheEntry).filter(MealAnalysisCacheEntry.id == best.id).first()
+
+    def lookup(
+        self,
+        user_id: int,
+        fingerprint: ImageFingerprint,
+        model: str,
+        meal_name_hint: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        hint = _hint_key(meal_name_hint)
+        db = SessionLocal()
+        try:
+            entry = (
+                self._base_query(db.query(MealAnalysisCacheEntry), user_id, model, hint)
+                .filter(MealAnalysisCacheEntry.content_hash == fingerprint.content_hash)
+                .order_by(MealAnalysisCacheEntry.user_id != user_id)
+                .first()
+            )
+            counter = "exact_hits"
+            if entry is None and fingerprint.dhash is not None:
+                entry = self._find_near(db, user_id, fingerprint, model, hint)
+                counter = "near_hits"
+
+            if entry is None:
+                self._count("misses")
+                return None
+
+            result = json.loads(entry.result_json)
+            now = datetime.now(timezone.utc)
+            if _as_utc(entry.last_used_at) < now - TOUCH_AFTER:
+                entry.last_used_at = now
+                db.commit()
+            self._count(counter)
+            return result
+        except Exception as e:
+            db.rollback()
+            self._count("errors")
+            logger.warning(f"Analysis cache lookup failed: {e}")
+            return None
+        finally:
+            db.close()
+
+    def store(
+        self,
+        user_id: int,
+        fingerprint: ImageFingerprint,
+        model: str,
+        result: Dict[str, Any],
+        meal_name_hint: Optional[str] = None,
+    ) -> None:
+        now = datetime.now(timezone.utc)
+        bands = fingerprint.bands
+        db = SessionLocal()
+        try:
+            db.add(MealAnalysisCacheEntry(
+                user_id=user_id,
+                content_hash=fingerprint.content_hash,
+                dhash=f"{fingerprint.dhash:016x}" if fingerprint.dhash is not None else None,
+                dhash_band0=bands[0],
+                dhash_band1=bands[1],
+                dhash_band2=bands[2],
+                dhash_band3=bands[3],
+                dhash_band4=bands[4],
+                model=model,
+                prompt_version=MEAL_PROMPT_VERSION,
+                hint=_hint_key(meal_name_hint),
+                result_json=json.dumps(result, ensure_ascii=False),
+                created_at=now,
+                last_used_at=now,
+            ))
+            db.commit()
+            self._count("stores")
+            self._evict_user(db, user_id)
+            if self._counters["stores"] % PURGE_EVERY_STORES == 0:
+                self.purge_expired(db)
+        except Exception as e:
+            db.rollback()
+            self._count("errors")
+            logger.warning(f"Analysis cache store failed: {e}")
+        finally:
+            db.close()
+
+    def _evict_user(self, db, user_id: int) -> None:
+        limit = settings.analysis_cache_max_entries_per_user
+        if limit <= 0:
+            return
+        stale_ids = [
+            row.id for row in (
+                db.query(MealAnalysisCacheEntry.id)
+                .filter(MealAnalysisCacheEntry.user_id == user_id)
+                .order_by(MealAnalysisCacheEntry.last_used_at.desc())
+                .offset(limit)
+                .all()
+            )
+        ]
+        if stale_ids:
+            db.query(MealAnalysisCacheEntry).filter(
+                MealAnalysisCacheEntry.id.in_(stale_ids)
+            ).delete(synchronize_session=False)
+            db.commit()
+            self._count("evictions", len(stale_ids))
+
+    def purge_expired(self, db) -> int:
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.analysis_cache_ttl_hours)
+        deleted = db.query(MealAnalysisCacheEntry).filter(
+            MealAnalysisCacheEntry.created_at < cutoff
+        ).delete(synchronize_session=False)
+        db.commit()
+        if deleted:
+            self._count("evictions", deleted)
+        return deleted
+
+
+analysis_cache = AnalysisCache()
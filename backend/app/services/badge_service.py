@@ -9,6 +9,8 @@ from app.models.meal_photo import MealPhoto
 from app.models.water_log import WaterLog
 from app.models.weight_log import WeightLog
 from app.models.onboarding_data import OnboardingData
+from app.services.change_log import record_changes
+from app.services.data_version import bump_data_versions
 
 
 ALL_BADGES = [
@@ -849,10 +851,18 @@ def check_and_award_badges(user: User, db: Session) -> List[UserBadge]:
 
 
 def mark_badges_seen(user_id: int, badge_ids: List[str], db: Session) -> int:
-    updated = db.query(UserBadge).filter(
-        UserBadge.user_id == user_id,
-        UserBadge.badge_id.in_(badge_ids)
-    ).update({"seen": True}, synchronize_session=False)
+    ids = [
+        row.id for row in db.query(UserBadge.id).filter(
+            UserBadge.user_id == user_id,
+            UserBadge.badge_id.in_(badge_ids),
+            UserBadge.seen.isnot(True),
+        )
+    ]
+    if not ids:
+        return 0
+    bump_data_versions(db.connection(), [user_id])
+    updated = db.query(UserBadge).filter(UserBadge.id.in_(ids)).update({"seen": True}, synchronize_session=False)
+    record_changes(db.connection(), user_id, "badge", ids)
     db.commit()
     return updated
 
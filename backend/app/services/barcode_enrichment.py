@@ -0,0 +1,247 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, not_
+from sqlalchemy.exc import IntegrityError
+
+from app.core.database import SessionLocal
+from app.models.barcode_enrichment import BarcodeEnrichment
+from app.services.ai_service import PRODUCT_PROMPT_VERSION, ai_service
+from app.services.barcode_lookup import canonical_gtin
+
+logger = logging.getLogger(__name__)
+
+
+ENRICHMENT_FIELDS = ("fiber", "sugar", "sodium", "health_score")
+
+
+def payload_hash(payload: Dict[str, Any]) -> str:
+    return hashlib.sha256(
+        json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+def _result(entry: BarcodeEnrichment) -> Dict[str, Any]:
+    return {field: getattr(entry, field) for field in ENRICHMENT_FIELDS}
+
+
+class BarcodeEnrichmentService:
+
+    def __init__(self):
+        self._inflight: Dict[Tuple[str, str, str], asyncio.Task] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._background = set()
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "ai_calls": 0,
+            "ai_failures": 0,
+            "coalesced": 0,
+            "reenrichments": 0,
+        }
+
+    @property
+    def version(self) -> Tuple[str, str]:
+        return ai_service.model, PRODUCT_PROMPT_VERSION
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters["hits"] + counters["stale_hits"] + counters["misses"]
+        counters["hit_rate"] = round((lookups - counters["misses"]) / lookups, 4) if lookups else None
+        counters["model"], counters["prompt_version"] = self.version
+        return counters
+
+    def _read(self, barcode: str) -> Optional[Dict[str, Any]]:
+        model, prompt_version = self.version
+        db = SessionLocal()
+        try:
+            entries = (
+                db.query(BarcodeEnrichment)
+                .filter(BarcodeEnrichment.barcode == barcode)
+                .order_by(BarcodeEnrichment.updated_at.desc())
+                .all()
+            )
+            if not entries:
+                return None
+            entry = next(
+                (e for e in entries if e.model == model and e.prompt_version == prompt_version),
+                entries[0],
+            )
+            return {
+                "result": _result(entry),
+                "current": entry.model == model and entry.prompt_version == prompt_version,
+                "input_hash": entry.input_hash,
+            }
+        except Exception as e:
+            logger.warning(f"Barcode enrichment read failed for {barcode}: {e}")
+            return None
+        finally:
+            db.close()
+
+    def _write(self, barcode: str, model: str, prompt_version: str, payload: Dict[str, Any], result: Dict[str, Any]) -> None:
+        now = datetime.now(timezone.utc)
+        db = SessionLocal()
+        try:
+            entry = db.query(BarcodeEnrichment).filter(
+                BarcodeEnrichment.barcode == barcode,
+                BarcodeEnrichment.model == model,
+                BarcodeEnrichment.prompt_version == prompt_version,
+            ).first()
+            if entry is None:
+                entry = BarcodeEnrichment(
+                    barcode=barcode,
+                    model=model,
+                    prompt_version=prompt_version,
+                    created_at=now,
+                )
+                db.add(entry)
+            entry.input_hash = payload_hash(payload)
+            entry.product_json = json.dumps(payload, ensure_ascii=False, default=str)
+            for field in ENRICHMENT_FIELDS:
+                setattr(entry, field, result.get(field))
+            entry.updated_at = now
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Barcode enrichment write failed for {barcode}: {e}")
+        finally:
+            db.close()
+
+    async def _enrich(self, barcode: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        model, prompt_version = self.version
+        self._count("ai_calls")
+        result = await ai_service.analyze_barcode_product(payload)
+        if not result:
+            self._count("ai_failures")
+            return None
+        await asyncio.to_thread(self._write, barcode, model, prompt_version, payload, result)
+        return result
+
+    async def _single_flight(self, barcode: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._inflight = {}
+        key = (barcode, *self.version)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._enrich(barcode, payload))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self._count("coalesced")
+        return await asyncio.shield(task)
+
+    def _reenrich(self, barcode: str, payload: Dict[str, Any]):
+        if (barcode, *self.version) in self._inflight:
+            return
+        self._count("reenrichments")
+        task = asyncio.create_task(self._single_flight(barcode, payload))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def get_enrichment(self, code: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        barcode = canonical_gtin(code)
+        if not barcode:
+            return await ai_service.analyze_barcode_product(payload)
+
+        entry = await asyncio.to_thread(self._read, barcode)
+        if entry is not None:
+            if entry["current"] and entry["input_hash"] == payload_hash(payload):
+                self._count("hits")
+                return entry["result"]
+            self._count("stale_hits")
+            if ai_service.is_configured:
+                self._reenrich(barcode, payload)
+            return entry["result"]
+
+        if not ai_service.is_configured:
+            return None
+        self._count("misses")
+        return await self._single_flight(barcode, payload)
+
+    def stale_entries(self, limit: int, after_id: int = 0) -> List[Tuple[int, str, Dict[str, Any]]]:
+        model, prompt_version = self.version
+        db = SessionLocal()
+        try:
+            current = db.query(BarcodeEnrichment.barcode).filter(
+                BarcodeEnrichment.model == model,
+                BarcodeEnrichment.prompt_version == prompt_version,
+            )
+            rows = (
+                db.query(BarcodeEnrichment.id, BarcodeEnrichment.barcode, BarcodeEnrichment.product_json)
+                .filter(
+                    BarcodeEnrichment.id > after_id,
+                    BarcodeEnrichment.barcode.notin_(current),
+                )
+                .order_by(BarcodeEnrichment.id)
+                .limit(limit)
+                .all()
+            )
+            return [(row.id, row.barcode, json.loads(row.product_json)) for row in rows]
+        finally:
+            db.close()
+
+    async def reenrich(self, entries: List[Tuple[int, str, Dict[str, Any]]], concurrency: int = 4) -> Dict[str, int]:
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        outcome = {"enriched": 0, "failed": 0}
+
+        async def run(barcode: str, payload: Dict[str, Any]):
+            async with semaphore:
+                result = await self._single_flight(barcode, payload)
+            outcome["enriched" if result else "failed"] += 1
+
+        seen = {}
+        for _, barcode, payload in entries:
+            seen.setdefault(barcode, payload)
+        await asyncio.gather(*(run(barcode, payload) for barcode, payload in seen.items()))
+        return outcome
+
+    def prune(self) -> int:
+        model, prompt_version = self.version
+        db = SessionLocal()
+        try:
+            current = [
+                barcode for (barcode,) in db.query(BarcodeEnrichment.barcode).filter(
+                    BarcodeEnrichment.model == model,
+                    BarcodeEnrichment.prompt_version == prompt_version,
+                )
+            ]
+            deleted = 0
+            for start in range(0, len(current), 1000):
+                deleted += db.query(BarcodeEnrichment).filter(
+                    BarcodeEnrichment.barcode.in_(current[start:start + 1000]),
+                    not_(and_(
+                        BarcodeEnrichment.model == model,
+                        BarcodeEnrichment.prompt_version == prompt_version,
+                    )),
+                ).delete(synchronize_session=False)
+            db.commit()
+            return deleted
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def close(self):
+        for task in list(self._background):
+            task.cancel()
+        self._inflight = {}
+
+
+barcode_enrichment_service = BarcodeEnrichmentService()
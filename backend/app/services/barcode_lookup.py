@@ -0,0 +1,263 @@
+import logging
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.core.database import SessionLocal
+from app.models.food import BrandedFood, Food, FoodNutrient
+from app.models.off_product import OffProduct
+
+logger = logging.getLogger(__name__)
+
+
+GTIN_LENGTHS = (8, 12, 13, 14)
+
+NUTRIENT_FIELDS = {
+    1008: "calories",
+    2047: "calories",
+    1003: "protein",
+    1004: "fat",
+    1005: "carbs",
+    1079: "fiber",
+    2000: "sugar",
+    1063: "sugar",
+    1093: "sodium",
+}
+NUTRIENT_PRIORITY = {1008: 0, 2047: 1, 2000: 0, 1063: 1}
+
+
+def gtin_check_digit(body: str) -> str:
+    total = 0
+    for index, digit in enumerate(reversed(body)):
+        total += int(digit) * (3 if index % 2 == 0 else 1)
+    return str((10 - total % 10) % 10)
+
+
+def is_valid_gtin(code: str) -> bool:
+    return len(code) in GTIN_LENGTHS and code.isdigit() and gtin_check_digit(code[:-1]) == code[-1]
+
+
+def expand_upc_e(code: str) -> Optional[str]:
+    if len(code) == 6:
+        code = "0" + code
+    if len(code) == 8:
+        code = code[:7]
+    if len(code) != 7 or code[0] not in "01":
+        return None
+    number, d = code[0], code[1:]
+    last = d[5]
+    if last in "012":
+        body = d[0:2] + last + "0000" + d[2:5]
+    elif last == "3":
+        body = d[0:3] + "00000" + d[3:5]
+    elif last == "4":
+        body = d[0:4] + "00000" + d[4]
+    else:
+        body = d[0:5] + "0000" + last
+    body = number + body
+    return body + gtin_check_digit(body)
+
+
+def canonical_gtin(code: str) -> str:
+    digits = "".join(ch for ch in code if ch.isdigit())
+    return digits.lstrip("0").zfill(14) if digits else ""
+
+
+def _digits(code: str) -> str:
+    return "".join(ch for ch in code if ch.isdigit())
+
+
+def _gtin_cores(digits: str) -> Tuple[Set[str], Optional[str]]:
+    cores = {digits.lstrip("0") or "0"}
+    stripped = None
+    if is_valid_gtin(digits) or is_valid_gtin(digits.zfill(14)):
+        stripped = digits[:-1].lstrip("0") or None
+    else:
+        cores.add((digits + gtin_check_digit(digits)).lstrip("0"))
+    if len(digits) in (6, 7, 8):
+        expanded = expand_upc_e(digits)
+        if expanded and expanded != digits:
+            cores.add(expanded.lstrip("0"))
+    if stripped in cores:
+        stripped = None
+    return cores, stripped
+
+
+def gtin_candidates(code: str) -> List[str]:
+    digits = _digits(code)
+    if not digits:
+        return []
+
+    cores, stripped = _gtin_cores(digits)
+    candidates = {digits}
+    for core in cores | {stripped}:
+        if not core:
+            continue
+        candidates.add(core)
+        for length in GTIN_LENGTHS:
+            if len(core) <= length:
+                candidates.add(core.zfill(length))
+    return sorted(candidates)
+
+
+def is_stripped_match(code: str, gtin_upc: str) -> bool:
+    stored = _digits(gtin_upc or "")
+    _, stripped = _gtin_cores(_digits(code))
+    return stripped is not None and stored.lstrip("0") == stripped and is_valid_gtin(stored)
+
+
+@dataclass
+class BarcodeProduct:
+    barcode: str
+    name: str
+    brand: Optional[str] = None
+    calories: Optional[int] = None
+    protein: Optional[int] = None
+    fat: Optional[int] = None
+    carbs: Optional[int] = None
+    fiber: Optional[int] = None
+    sugar: Optional[int] = None
+    sodium: Optional[int] = None
+    source: str = "openfoodfacts"
+    fdc_id: Optional[int] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def ai_payload(self) -> Dict[str, Any]:
+        return {
+            "product_name": self.name,
+            "brands": self.brand,
+            "nutriments": {
+                "energy-kcal_100g": self.calories,
+                "proteins_100g": self.protein,
+                "fat_100g": self.fat,
+                "carbohydrates_100g": self.carbs,
+                "fiber_100g": self.fiber,
+                "sugars_100g": self.sugar,
+                "sodium_mg_100g": self.sodium,
+            },
+        }
+
+
+def _int(value: Any) -> Optional[int]:
+    try:
+        if value is None:
+            return None
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _sodium_mg(grams: Any) -> Optional[int]:
+    try:
+        if grams is None or grams == "":
+            return None
+        return int(float(grams) * 1000)
+    except (TypeError, ValueError):
+        return None
+
+
+def _branded_brand(branded: BrandedFood) -> Optional[str]:
+    return branded.brand_name or branded.brand_owner or None
+
+
+def find_branded_product(db, code: str) -> Optional[BarcodeProduct]:
+    candidates = gtin_candidates(code)
+    if not candidates:
+        return None
+
+    rows = (
+        db.query(BrandedFood, Food)
+        .join(Food, Food.fdc_id == BrandedFood.fdc_id)
+        .filter(BrandedFood.gtin_upc.in_(candidates))
+        .all()
+    )
+    # A complete GTIN that matched only the check-digit-stripped core is another product.
+    rows = [row for row in rows if not is_stripped_match(code, row[0].gtin_upc)]
+    if not rows:
+        return None
+
+    canonical = canonical_gtin(code)
+    branded, food = max(
+        rows,
+        key=lambda row: (
+            canonical_gtin(row[0].gtin_upc or "") == canonical,
+            row[1].publication_date.toordinal() if row[1].publication_date else 0,
+            row[0].fdc_id,
+        ),
+    )
+
+    product = BarcodeProduct(
+        barcode=code,
+        name=food.description,
+        brand=_branded_brand(branded),
+        source="usda_branded",
+        fdc_id=food.fdc_id,
+    )
+    nutrients = (
+        db.query(FoodNutrient.nutrient_id, FoodNutrient.amount)
+        .filter(
+            FoodNutrient.fdc_id == food.fdc_id,
+            FoodNutrient.nutrient_id.in_(NUTRIENT_FIELDS.keys()),
+        )
+        .all()
+    )
+    for nutrient_id, amount in sorted(nutrients, key=lambda n: NUTRIENT_PRIORITY.get(n[0], 0), reverse=True):
+        value = _int(amount)
+        if value is not None:
+            setattr(product, NUTRIENT_FIELDS[nutrient_id], value)
+    return product
+
+
+def find_off_product(db, code: str) -> Optional[BarcodeProduct]:
+    key = canonical_gtin(code)
+    if not key:
+        return None
+    row = db.query(OffProduct).filter(OffProduct.code == key).first()
+    if row is None:
+        return None
+    return BarcodeProduct(
+        barcode=code,
+        name=row.product_name or row.generic_name or "Product",
+        brand=row.brands,
+        calories=_int(row.calories),
+        protein=_int(row.protein),
+        fat=_int(row.fat),
+        carbs=_int(row.carbs),
+        fiber=_int(row.fiber),
+        sugar=_int(row.sugar),
+        sodium=_sodium_mg(row.sodium),
+        source="openfoodfacts_local",
+    )
+
+
+def lookup_local_product(code: str) -> Optional[BarcodeProduct]:
+    db = SessionLocal()
+    try:
+        return find_branded_product(db, code) or find_off_product(db, code)
+    except Exception as e:
+        logger.warning(f"Local barcode lookup failed for {code}: {e}")
+        return None
+    finally:
+        db.close()
+
+
+def product_from_openfoodfacts(code: str, product: Dict[str, Any]) -> BarcodeProduct:
+    nutriments = product.get("nutriments", {}) if isinstance(product, dict) else {}
+    return BarcodeProduct(
+        barcode=code,
+        name=product.get("product_name") or product.get("generic_name") or "Product",
+        brand=product.get("brands"),
+        calories=_int(
+            nutriments.get("energy-kcal_100g")
+            or nutriments.get("energy_kcal_value")
+            or nutriments.get("energy_kcal")
+        ),
+        protein=_int(nutriments.get("proteins_100g") or nutriments.get("proteins_serving")),
+        fat=_int(nutriments.get("fat_100g") or nutriments.get("fat_serving")),
+        carbs=_int(nutriments.get("carbohydrates_100g") or nutriments.get("carbohydrates_serving")),
+        fiber=_int(nutriments.get("fiber_100g") or nutriments.get("fiber_serving")),
+        sugar=_int(nutriments.get("sugars_100g") or nutriments.get("sugars_serving")),
+        sodium=_sodium_mg(nutriments.get("sodium_100g") or nutriments.get("sodium_serving")),
+        source="openfoodfacts",
+    )
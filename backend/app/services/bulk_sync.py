@@ -0,0 +1,193 @@
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+
+from app.models.meal_photo import MealPhoto
+from app.models.onboarding_data import OnboardingData
+from app.models.user import User
+from app.models.water_log import WaterLog
+from app.models.weight_log import WeightLog
+from app.schemas.sync import BatchMealItem, BatchWaterItem, BatchWeightItem, SyncBatchRequest
+from app.services.badge_service import check_and_award_badges
+from app.services.change_log import record_changes
+from app.services.daily_nutrition import MACRO_FIELDS, TRACKED, DayKey, apply_deltas, local_date, remember_timezone
+from app.services.data_version import bump_data_versions
+from app.services.streak_service import recompute_user
+
+logger = logging.getLogger(__name__)
+
+
+MAX_BATCH_ITEMS = 500
+
+STATUS_CREATED = "created"
+STATUS_DUPLICATE = "duplicate"
+STATUS_INVALID = "invalid"
+
+
+def _meal_row(item: BatchMealItem) -> Dict[str, Any]:
+    row = {
+        "file_path": "manual",
+        "file_name": "manual",
+        "file_size": 0,
+        "mime_type": "manual",
+        "meal_name": item.meal_name,
+        "detected_meal_name": item.meal_name,
+        "barcode": item.barcode,
+        "health_score": item.health_score,
+    }
+    row.update({field: getattr(item, field) for field in MACRO_FIELDS})
+    return row
+
+
+def _water_row(item: BatchWaterItem) -> Dict[str, Any]:
+    return {"amount_ml": item.amount_ml, "goal_ml": item.goal_ml}
+
+
+def _weight_row(item: BatchWeightItem) -> Dict[str, Any]:
+    return {"weight": item.weight}
+
+
+BATCH_ENTITIES = {
+    "meal": (MealPhoto, BatchMealItem, "meals", _meal_row),
+    "water": (WaterLog, BatchWaterItem, "water", _water_row),
+    "weight": (WeightLog, BatchWeightItem, "weights", _weight_row),
+}
+
+
+def batch_size(payload: SyncBatchRequest) -> int:
+    return sum(len(getattr(payload, key)) for _, _, key, _ in BATCH_ENTITIES.values())
+
+
+def _created_at(value: Optional[datetime], tz_offset_minutes: int, now: datetime) -> datetime:
+    if value is None:
+        return now
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone(timedelta(minutes=tz_offset_minutes)))
+    return value.astimezone(timezone.utc)
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'item'}: {err['msg']}"
+        for err in error.errors()
+    )
+
+
+def _existing_ids(connection, model, user_id: int, client_ids: List[str]) -> Dict[str, int]:
+    table = model.__table__
+    rows = connection.execute(
+        select(table.c.client_id, table.c.id).where(table.c.user_id == user_id, table.c.client_id.in_(client_ids))
+    )
+    return {row.client_id: row.id for row in rows}
+
+
+def _latest_weight(connection, user_id: int) -> Optional[float]:
+    table = WeightLog.__table__
+    return connection.execute(
+        select(table.c.weight)
+        .where(table.c.user_id == user_id)
+        .order_by(table.c.created_at.desc(), table.c.id.desc())
+        .limit(1)
+    ).scalar()
+
+
+def write_batch(db, user: User, payload: SyncBatchRequest, tz_offset_minutes: Optional[int]) -> Dict[str, Any]:
+    remember_timezone(db, user, tz_offset_minutes)
+    offset = user.tz_offset_minutes or 0
+    client_offset = offset if tz_offset_minutes is None else tz_offset_minutes
+    now = datetime.now(timezone.utc)
+
+    results: List[Dict[str, Any]] = []
+    pending: Dict[str, List[Tuple[Dict[str, Any], Dict[str, Any]]]] = defaultdict(list)
+    repeated: List[Tuple[str, Dict[str, Any]]] = []
+    for entity, (model, schema, key, to_row) in BATCH_ENTITIES.items():
+        seen = set()
+        for index, raw in enumerate(getattr(payload, key)):
+            result = {
+                "entity": entity,
+                "index": index,
+                "client_id": raw.get("client_id") if isinstance(raw, dict) else None,
+                "status": STATUS_INVALID,
+                "id": None,
+                "error": None,
+            }
+            results.append(result)
+            try:
+                item = schema.model_validate(raw)
+            except ValidationError as e:
+                result["error"] = _validation_message(e)
+                continue
+            if item.client_id in seen:
+                result["status"] = STATUS_DUPLICATE
+                repeated.append((entity, result))
+                continue
+            seen.add(item.client_id)
+            row = to_row(item)
+            row.update(user_id=user.id, client_id=item.client_id, created_at=_created_at(item.created_at, client_offset, now))
+            pending[entity].append((result, row))
+
+    created = 0
+    ids_by_client: Dict[Tuple[str, str], int] = {}
+    if pending:
+        db.flush()
+        connection = db.connection()
+        # Taking the users row lock first serializes retries of the same batch,
+        # so the client_id lookup below cannot race a concurrent insert.
+        bump_data_versions(connection, [user.id])
+        deltas: Dict[DayKey, Dict[str, Any]] = defaultdict(dict)
+        for entity, items in pending.items():
+            model = BATCH_ENTITIES[entity][0]
+            existing = _existing_ids(connection, model, user.id, [row["client_id"] for _, row in items])
+            fresh = [(result, row) for result, row in items if row["client_id"] not in existing]
+            fresh_ids = {row["client_id"] for _, row in fresh}
+            if fresh:
+                connection.execute(insert(model.__table__), [row for _, row in fresh])
+                existing.update(_existing_ids(connection, model, user.id, [row["client_id"] for _, row in fresh]))
+                record_changes(connection, user.id, entity, [existing[row["client_id"]] for _, row in fresh])
+                created += len(fresh)
+                if model in TRACKED:
+                    contribution = TRACKED[model][1]
+                    for _, row in fresh:
+                        bucket = deltas[(user.id, local_date(row["created_at"], offset))]
+                        for field, value in contribution(row).items():
+                            bucket[field] = bucket.get(field, 0) + value
+            for result, row in items:
+                result["id"] = existing[row["client_id"]]
+                result["status"] = STATUS_CREATED if row["client_id"] in fresh_ids else STATUS_DUPLICATE
+                ids_by_client[(entity, row["client_id"])] = result["id"]
+        apply_deltas(connection, deltas)
+
+        if any(entity == "weight" for entity in pending):
+            onboarding = db.query(OnboardingData).filter(OnboardingData.user_id == user.id).first()
+            if onboarding:
+                onboarding.weight = _latest_weight(connection, user.id)
+        if created:
+            recompute_user(db, user)
+
+    for entity, result in repeated:
+        result["id"] = ids_by_client.get((entity, result["client_id"]))
+
+    db.commit()
+
+    new_badges = []
+    if created:
+        try:
+            new_badges = [badge.badge_id for badge in check_and_award_badges(user, db)]
+        except Exception as e:
+            logger.warning(f"Badge check after batch sync failed for user {user.id}: {e}")
+
+    counts = defaultdict(int)
+    for result in results:
+        counts[result["status"]] += 1
+    return {
+        "results": results,
+        "created": counts[STATUS_CREATED],
+        "duplicates": counts[STATUS_DUPLICATE],
+        "invalid": counts[STATUS_INVALID],
+        "new_badges": new_badges,
+        "data_version": user.data_version or 0,
+    }
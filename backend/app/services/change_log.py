@@ -0,0 +1,161 @@
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, insert, literal, select
+
+from app.core.database import SessionLocal, startup_lock
+from app.models.change_log import ChangeLog
+from app.models.meal_photo import MealPhoto
+from app.models.user_badge import UserBadge
+from app.models.water_log import WaterLog
+from app.models.weight_log import WeightLog
+from app.schemas.badge import UserBadgeResponse
+from app.schemas.meal_photo import MealPhotoResponse
+from app.schemas.progress import WeightLogResponse
+from app.schemas.water import WaterEntry
+from app.services.photo_variants import meal_image_url
+
+logger = logging.getLogger(__name__)
+
+
+OP_UPSERT = "upsert"
+OP_DELETE = "delete"
+
+ENTITIES = {
+    "meal": MealPhoto,
+    "water": WaterLog,
+    "weight": WeightLog,
+    "badge": UserBadge,
+}
+ENTITY_NAMES = {model: name for name, model in ENTITIES.items()}
+
+MAX_SYNC_PAGE = 1000
+
+
+def record_changes(connection, user_id: int, entity: str, entity_ids: Iterable[int], op: str = OP_UPSERT) -> None:
+    now = datetime.now(timezone.utc)
+    rows = [
+        {"user_id": user_id, "entity": entity, "entity_id": entity_id, "op": op, "created_at": now}
+        for entity_id in entity_ids
+    ]
+    if rows:
+        connection.execute(insert(ChangeLog.__table__), rows)
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _log_changes(session, flush_context):
+    # Runs after the before_flush data_version bump, which holds the users row
+    # lock until commit, so per-user change_log ids are assigned in commit order
+    # and a keyset cursor never skips a late-committing write.
+    now = datetime.now(timezone.utc)
+    rows = []
+
+    def log(obj, op):
+        if obj.id is not None and obj.user_id is not None:
+            rows.append({
+                "user_id": obj.user_id,
+                "entity": ENTITY_NAMES[type(obj)],
+                "entity_id": obj.id,
+                "op": op,
+                "created_at": now,
+            })
+
+    for obj in session.new:
+        if type(obj) in ENTITY_NAMES:
+            log(obj, OP_UPSERT)
+    for obj in session.dirty:
+        if type(obj) in ENTITY_NAMES and session.is_modified(obj, include_collections=False):
+            log(obj, OP_UPSERT)
+    for obj in session.deleted:
+        if type(obj) in ENTITY_NAMES:
+            log(obj, OP_DELETE)
+
+    if rows:
+        session.connection().execute(insert(ChangeLog.__table__), rows)
+
+
+def seed_change_log() -> int:
+    # Same seed as migration 016: when change_log is empty but history exists
+    # (e.g. the table came from create_all), log every row once as an upsert so
+    # a sync from cursor 0 returns the full history.
+    table = ChangeLog.__table__
+    with startup_lock("change_log_seed"):
+        with SessionLocal() as db:
+            if db.query(table.c.id).first() is not None:
+                return 0
+            now = datetime.now(timezone.utc)
+            seeded = 0
+            for entity, model in ENTITIES.items():
+                source = model.__table__
+                result = db.execute(insert(table).from_select(
+                    ["user_id", "entity", "entity_id", "op", "created_at"],
+                    select(source.c.user_id, literal(entity), source.c.id, literal(OP_UPSERT), literal(now))
+                    .order_by(source.c.id),
+                ))
+                seeded += result.rowcount or 0
+            db.commit()
+    if seeded:
+        logger.info(f"change_log seeded with {seeded} existing rows")
+    return seeded
+
+
+def parse_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    value = int(cursor)
+    if value < 0:
+        raise ValueError("cursor must not be negative")
+    return value
+
+
+def _payload(entity: str, obj) -> Dict[str, Any]:
+    if entity == "meal":
+        item = MealPhotoResponse.model_validate(obj)
+        item.image_url = meal_image_url(obj, "thumb")
+    elif entity == "water":
+        item = WaterEntry.model_validate(obj)
+    elif entity == "weight":
+        item = WeightLogResponse.model_validate(obj)
+    else:
+        item = UserBadgeResponse.model_validate(obj)
+    return item.model_dump(mode="json")
+
+
+def changes_since(db, user_id: int, since: int, limit: int) -> Tuple[List[Dict[str, Any]], int, bool]:
+    table = ChangeLog.__table__
+    rows = db.connection().execute(
+        select(table.c.id, table.c.entity, table.c.entity_id, table.c.op)
+        .where(table.c.user_id == user_id, table.c.id > since)
+        .order_by(table.c.id)
+        .limit(limit + 1)
+    ).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if not rows:
+        return [], since, False
+
+    latest: Dict[Tuple[str, int], str] = {}
+    for row in rows:
+        key = (row.entity, row.entity_id)
+        latest.pop(key, None)
+        latest[key] = row.op
+
+    wanted: Dict[str, List[int]] = {}
+    for (entity, entity_id), op in latest.items():
+        if op == OP_UPSERT and entity in ENTITIES:
+            wanted.setdefault(entity, []).append(entity_id)
+    loaded: Dict[Tuple[str, int], Any] = {}
+    for entity, ids in wanted.items():
+        model = ENTITIES[entity]
+        for obj in db.query(model).filter(model.user_id == user_id, model.id.in_(ids)):
+            loaded[(entity, obj.id)] = obj
+
+    changes = []
+    for (entity, entity_id), op in latest.items():
+        obj = loaded.get((entity, entity_id))
+        if op == OP_UPSERT and obj is not None:
+            changes.append({"entity": entity, "id": entity_id, "op": OP_UPSERT, "data": _payload(entity, obj)})
+        else:
+            changes.append({"entity": entity, "id": entity_id, "op": OP_DELETE, "data": None})
+    return changes, rows[-1].id, has_more
@@ -0,0 +1,352 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, event, insert, select, union, update
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.core.database import SessionLocal, startup_lock
+from app.models.daily_nutrition import DailyNutrition
+from app.models.meal_photo import MealPhoto
+from app.models.user import User
+from app.models.water_log import WaterLog
+
+logger = logging.getLogger(__name__)
+
+
+MACRO_FIELDS = ("calories", "protein", "fat", "carbs", "fiber", "sugar", "sodium")
+ROLLUP_FIELDS = MACRO_FIELDS + (
+    "meal_count", "named_meal_count", "named_calories", "health_score_sum", "health_score_count", "water_ml",
+)
+
+MEAL_COLUMNS = ("user_id", "created_at", "meal_name", "health_score") + MACRO_FIELDS
+WATER_COLUMNS = ("user_id", "created_at", "amount_ml")
+
+ROLLUP_USERS_KEY = "daily_nutrition_users"
+# Days rebuilt inside the request when the tz offset changes; covers the
+# 180-day progress window, older days are left to RollupRebuilder.
+RECENT_REBUILD_DAYS = 190
+
+DayKey = Tuple[int, date]
+
+
+def format_health_score(score: Optional[int]) -> Optional[float]:
+    if score is None:
+        return None
+    score_float = float(score)
+    if score_float > 100:
+        score_float = 10.0
+    elif score_float > 10:
+        score_float = score_float / 10.0
+    return round(min(max(score_float, 0), 10), 1)
+
+
+def _aware(value: Optional[datetime]) -> datetime:
+    if value is None:
+        return datetime.now(timezone.utc)
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def local_date(created_at: Optional[datetime], tz_offset_minutes: Optional[int]) -> date:
+    return (_aware(created_at) + timedelta(minutes=tz_offset_minutes or 0)).date()
+
+
+def meal_contribution(values: Dict[str, Any]) -> Dict[str, Any]:
+    score = format_health_score(values.get("health_score"))
+    contribution = {field: values.get(field) or 0 for field in MACRO_FIELDS}
+    contribution["meal_count"] = 1
+    named = values.get("meal_name") is not None
+    contribution["named_meal_count"] = 1 if named else 0
+    contribution["named_calories"] = contribution["calories"] if named else 0
+    contribution["health_score_sum"] = score or 0.0
+    contribution["health_score_count"] = 0 if score is None else 1
+    return contribution
+
+
+def water_contribution(values: Dict[str, Any]) -> Dict[str, Any]:
+    return {"water_ml": values.get("amount_ml") or 0}
+
+
+TRACKED = {
+    MealPhoto: (MEAL_COLUMNS, meal_contribution),
+    WaterLog: (WATER_COLUMNS, water_contribution),
+}
+
+
+def _user_offsets(connection, user_ids: Iterable[int]) -> Dict[int, int]:
+    user_ids = list(set(user_ids))
+    if not user_ids:
+        return {}
+    rows = connection.execute(
+        select(User.__table__.c.id, User.__table__.c.tz_offset_minutes).where(User.__table__.c.id.in_(user_ids))
+    )
+    return {row.id: row.tz_offset_minutes or 0 for row in rows}
+
+
+def _add(deltas: Dict[DayKey, Dict[str, Any]], key: DayKey, contribution: Dict[str, Any], sign: int):
+    bucket = deltas[key]
+    for field, value in contribution.items():
+        bucket[field] = bucket.get(field, 0) + sign * value
+
+
+def apply_deltas(connection, deltas: Dict[DayKey, Dict[str, Any]]) -> None:
+    table = DailyNutrition.__table__
+    now = datetime.now(timezone.utc)
+    for (user_id, day), changes in deltas.items():
+        changes = {field: value for field, value in changes.items() if value}
+        if not changes:
+            continue
+        where = and_(table.c.user_id == user_id, table.c.local_date == day)
+        values = {field: table.c[field] + value for field, value in changes.items()}
+        if connection.execute(update(table).where(where).values(updated_at=now, **values)).rowcount:
+            continue
+        if all(value < 0 for value in changes.values()):
+            continue
+        try:
+            connection.execute(insert(table).values(user_id=user_id, local_date=day, updated_at=now, **changes))
+        except IntegrityError:
+            connection.execute(update(table).where(where).values(updated_at=now, **values))
+
+
+@event.listens_for(SessionLocal, "before_flush")
+def _track_rollup_changes(session, flush_context, instances):
+    added: List[Tuple[type, Dict[str, Any]]] = []
+    previous: Dict[type, List[int]] = defaultdict(list)
+
+    with session.no_autoflush:
+        for obj in session.new:
+            if type(obj) in TRACKED:
+                columns = TRACKED[type(obj)][0]
+                added.append((type(obj), {column: getattr(obj, column) for column in columns}))
+
+        for obj in session.dirty:
+            if type(obj) not in TRACKED or obj.id is None:
+                continue
+            columns = TRACKED[type(obj)][0]
+            state = obj._sa_instance_state
+            if any(state.attrs[column].history.has_changes() for column in columns):
+                previous[type(obj)].append(obj.id)
+                added.append((type(obj), {column: getattr(obj, column) for column in columns}))
+
+        for obj in session.deleted:
+            if type(obj) in TRACKED and obj.id is not None:
+                previous[type(obj)].append(obj.id)
+
+    if not added and not previous:
+        return
+
+    connection = session.connection()
+    removed: List[Tuple[type, Dict[str, Any]]] = []
+    for model, ids in previous.items():
+        table = model.__table__
+        columns = TRACKED[model][0]
+        rows = connection.execute(select(*(table.c[column] for column in columns)).where(table.c.id.in_(ids)))
+        removed.extend((model, dict(row._mapping)) for row in rows)
+
+    offsets = _user_offsets(connection, [values["user_id"] for _, values in added + removed])
+    deltas: Dict[DayKey, Dict[str, Any]] = defaultdict(dict)
+    for sign, items in ((-1, removed), (1, added)):
+        for model, values in items:
+            if values["user_id"] is None:
+                continue
+            key = (values["user_id"], local_date(values["created_at"], offsets.get(values["user_id"], 0)))
+            _add(deltas, key, TRACKED[model][1](values), sign)
+    apply_deltas(connection, deltas)
+    session.info.setdefault(ROLLUP_USERS_KEY, set()).update(user_id for user_id, _ in deltas)
+
+
+def aggregate_user(
+    connection, user_id: int, tz_offset_minutes: Optional[int], since: Optional[datetime] = None
+) -> Dict[date, Dict[str, Any]]:
+    days: Dict[date, Dict[str, Any]] = defaultdict(dict)
+    for model, (columns, contribution) in TRACKED.items():
+        table = model.__table__
+        query = select(*(table.c[column] for column in columns)).where(table.c.user_id == user_id)
+        if since is not None:
+            query = query.where(table.c.created_at >= since)
+        rows = connection.execute(query)
+        for row in rows:
+            values = dict(row._mapping)
+            bucket = days[local_date(values["created_at"], tz_offset_minutes)]
+            for field, value in contribution(values).items():
+                bucket[field] = bucket.get(field, 0) + value
+    return days
+
+
+def rebuild_user(
+    db, user_id: int, tz_offset_minutes: Optional[int] = None, from_day: Optional[date] = None
+) -> int:
+    db.flush()
+    connection = db.connection()
+    if tz_offset_minutes is None:
+        tz_offset_minutes = _user_offsets(connection, [user_id]).get(user_id, 0)
+    table = DailyNutrition.__table__
+    rows = table.c.user_id == user_id
+    since = None
+    if from_day is not None:
+        rows = and_(rows, table.c.local_date >= from_day)
+        since = datetime.combine(from_day, time.min, tzinfo=timezone.utc) - timedelta(minutes=tz_offset_minutes)
+    days = aggregate_user(connection, user_id, tz_offset_minutes, since)
+    connection.execute(delete(table).where(rows))
+    if days:
+        now = datetime.now(timezone.utc)
+        connection.execute(insert(table), [
+            {
+                "user_id": user_id,
+                "local_date": day,
+                "updated_at": now,
+                **{field: values.get(field, 0) for field in ROLLUP_FIELDS},
+            }
+            for day, values in days.items()
+        ])
+    users = User.__table__
+    connection.execute(update(users).where(users.c.id == user_id).values(rollup_stale_before=from_day))
+    db.info.setdefault(ROLLUP_USERS_KEY, set()).add(user_id)
+    return len(days)
+
+
+def backfill(force: bool = False) -> int:
+    with startup_lock("daily_nutrition_backfill"):
+        db = SessionLocal()
+        try:
+            if force:
+                db.execute(delete(DailyNutrition.__table__))
+            elif db.query(DailyNutrition.user_id).first() is not None:
+                return 0
+            user_ids = db.execute(union(
+                select(MealPhoto.__table__.c.user_id),
+                select(WaterLog.__table__.c.user_id),
+            )).scalars().all()
+            for user_id in user_ids:
+                rebuild_user(db, user_id)
+                db.commit()
+            if user_ids:
+                logger.info(f"Daily nutrition rollup rebuilt for {len(user_ids)} users")
+            return len(user_ids)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+def verify_user(db, user_id: int) -> List[Dict[str, Any]]:
+    connection = db.connection()
+    offset = _user_offsets(connection, [user_id]).get(user_id, 0)
+    expected = aggregate_user(connection, user_id, offset)
+    table = DailyNutrition.__table__
+    stored = {
+        row.local_date: row._mapping
+        for row in connection.execute(select(table).where(table.c.user_id == user_id))
+    }
+
+    mismatches = []
+    for day in sorted(set(expected) | set(stored)):
+        want = expected.get(day, {})
+        have = stored.get(day, {})
+        for field in ROLLUP_FIELDS:
+            a, b = have.get(field) or 0, want.get(field) or 0
+            if abs(a - b) > 1e-6:
+                mismatches.append({"date": day.isoformat(), "field": field, "stored": a, "expected": b})
+    return mismatches
+
+
+def remember_timezone(db, user: User, tz_offset_minutes: Optional[int]) -> bool:
+    if tz_offset_minutes is None or user.tz_offset_minutes == tz_offset_minutes:
+        return False
+    had_offset = user.tz_offset_minutes is not None
+    db.flush()
+    user.tz_offset_minutes = tz_offset_minutes
+    db.flush()
+    if had_offset or tz_offset_minutes:
+        today = local_date(datetime.now(timezone.utc), tz_offset_minutes)
+        rebuild_user(db, user.id, tz_offset_minutes, today - timedelta(days=RECENT_REBUILD_DAYS))
+        db.expire(user, ["rollup_stale_before"])
+    return True
+
+
+def rollup_covers(user: User, tz_offset_minutes: int, start: date) -> bool:
+    if (user.tz_offset_minutes or 0) != tz_offset_minutes:
+        return False
+    return user.rollup_stale_before is None or start >= user.rollup_stale_before
+
+
+def get_days(db, user_id: int, start: date, end: date) -> Dict[date, DailyNutrition]:
+    rows = (
+        db.query(DailyNutrition)
+        .filter(
+            DailyNutrition.user_id == user_id,
+            DailyNutrition.local_date >= start,
+            DailyNutrition.local_date < end,
+        )
+        .all()
+    )
+    return {row.local_date: row for row in rows}
+
+
+def user_today(user: User) -> date:
+    return local_date(datetime.now(timezone.utc), user.tz_offset_minutes)
+
+
+class RollupRebuilder:
+
+    def __init__(self, interval_seconds: int):
+        self.interval = max(0, interval_seconds)
+        self._task: Optional[asyncio.Task] = None
+        self.last_run: Optional[datetime] = None
+        self.rebuilt = 0
+
+    def _rebuild_next(self) -> Optional[int]:
+        db = SessionLocal()
+        try:
+            user = (
+                db.query(User)
+                .filter(User.rollup_stale_before.isnot(None))
+                .order_by(User.id)
+                .with_for_update(skip_locked=True)
+                .first()
+            )
+            if user is None:
+                return None
+            rebuild_user(db, user.id, user.tz_offset_minutes or 0)
+            db.commit()
+            return user.id
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def _run(self):
+        while True:
+            try:
+                while await asyncio.to_thread(self._rebuild_next) is not None:
+                    self.rebuilt += 1
+                self.last_run = datetime.now(timezone.utc)
+            except Exception as e:
+                logger.warning(f"Daily nutrition rebuild failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def start(self):
+        if self._task is None and self.interval:
+            self._task = asyncio.create_task(self._run(), name="daily-nutrition-rebuild")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "interval_seconds": self.interval,
+            "last_run": self.last_run.isoformat() if self.last_run else None,
+            "rebuilt": self.rebuilt,
+        }
+
+
+rollup_rebuilder = RollupRebuilder(settings.daily_nutrition_rebuild_seconds)
@@ -0,0 +1,95 @@
+import hashlib
+import json
+from typing import Any, Iterable, Optional
+
+from fastapi import HTTPException, Request, Response, status
+from sqlalchemy import event, update
+
+from app.core.database import SessionLocal
+from app.models.meal_photo import MealPhoto
+from app.models.onboarding_data import OnboardingData
+from app.models.user import User
+from app.models.user_badge import UserBadge
+from app.models.water_log import WaterLog
+from app.models.weight_log import WeightLog
+from app.services.daily_nutrition import user_today
+
+
+VERSIONED_MODELS = (MealPhoto, WaterLog, WeightLog, UserBadge, OnboardingData)
+CACHE_CONTROL = "private, no-cache"
+
+
+def _owner_id(obj) -> Optional[int]:
+    if isinstance(obj, User):
+        return obj.id
+    if isinstance(obj, VERSIONED_MODELS):
+        return obj.user_id
+    return None
+
+
+def bump_data_versions(connection, user_ids: Iterable[int]) -> None:
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return
+    table = User.__table__
+    connection.execute(
+        update(table)
+        .where(table.c.id.in_(user_ids))
+        .values(data_version=table.c.data_version + 1)
+    )
+
+
+@event.listens_for(SessionLocal, "before_flush")
+def _track_data_versions(session, flush_context, instances):
+    user_ids = set()
+    with session.no_autoflush:
+        for obj in session.new:
+            if isinstance(obj, VERSIONED_MODELS):
+                user_ids.add(obj.user_id)
+        for obj in session.dirty:
+            if isinstance(obj, (User,) + VERSIONED_MODELS) and session.is_modified(obj, include_collections=False):
+                user_ids.add(_owner_id(obj))
+        for obj in session.deleted:
+            if isinstance(obj, VERSIONED_MODELS):
+                user_ids.add(obj.user_id)
+    user_ids.discard(None)
+    if user_ids:
+        bump_data_versions(session.connection(), user_ids)
+
+
+def etag_for(user: User, request: Request, extra: Any = None) -> str:
+    seed = json.dumps(
+        [
+            user.id,
+            user.data_version or 0,
+            user_today(user).isoformat(),
+            request.url.path,
+            sorted(request.query_params.multi_items()),
+            extra,
+        ],
+        default=str,
+        sort_keys=True,
+    )
+    return '"' + hashlib.sha256(seed.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def require_modified(request: Request, response: Response, etag: str) -> str:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return etag
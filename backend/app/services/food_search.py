@@ -0,0 +1,125 @@
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, func, or_, select, union_all
+from sqlalchemy.orm import Session
+
+from app.models.food import Food
+from app.services.food_search_index import SOURCE_TYPES, food_search_index
+from app.services.food_spelling import food_spelling
+
+
+COUNT_CAP = 1000
+SCORE_DIGITS = 6
+
+CURSOR_INDEX = "i"
+CURSOR_FULLTEXT = "f"
+
+FULLTEXT_COLUMNS = {"en": Food.description, "ru": Food.description_ru, "uz": Food.description_uz}
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+# 'Chicken, "breast"' -> '+chicken* +breast*'; only word characters reach FULLTEXT.
+def boolean_terms(term: str) -> str:
+    return " ".join(f"+{word}*" for word in _WORD.findall(term.lower()))
+
+
+def encode_cursor(kind: str, rank, fdc_or_doc: int) -> str:
+    return f"{kind}:{rank}:{fdc_or_doc}"
+
+
+def parse_cursor(cursor: Optional[str]) -> Optional[Tuple[str, float, int]]:
+    if not cursor:
+        return None
+    try:
+        kind, rank, key = cursor.split(":")
+        if kind == CURSOR_INDEX:
+            return kind, int(rank), int(key)
+        if kind == CURSOR_FULLTEXT:
+            return kind, float(rank), int(key)
+    except ValueError:
+        pass
+    raise InvalidCursorError(f"invalid search cursor {cursor!r}")
+
+
+def fulltext_search(
+    db: Session,
+    term: str,
+    lang: str,
+    source: str,
+    limit: int,
+    offset: int = 0,
+    after: Optional[Tuple[float, int]] = None,
+) -> Tuple[List[int], int, Optional[Tuple[float, int]]]:
+    # ru/uz: one UNION ALL branch per column so each uses its FULLTEXT index.
+    terms = boolean_terms(term)
+    if not terms:
+        return [], 0, None
+
+    branches = []
+    for column in (FULLTEXT_COLUMNS["en"],) if lang == "en" else (FULLTEXT_COLUMNS[lang], FULLTEXT_COLUMNS["en"]):
+        branch = select(Food.fdc_id, column.match(terms).label("score")).where(column.match(terms))
+        if source in SOURCE_TYPES:
+            branch = branch.where(Food.data_type.in_(SOURCE_TYPES[source]))
+        branches.append(branch)
+    matches = (branches[0] if len(branches) == 1 else union_all(*branches)).subquery()
+
+    score = func.round(func.max(matches.c.score), SCORE_DIGITS)
+    page = select(matches.c.fdc_id, score.label("score")).group_by(matches.c.fdc_id)
+    if after is not None:
+        page = page.having(or_(score < after[0], and_(score == after[0], matches.c.fdc_id > after[1])))
+    page = page.order_by(score.desc(), matches.c.fdc_id).offset(offset).limit(limit + 1)
+    rows = db.execute(page).all()
+
+    counted = select(matches.c.fdc_id).group_by(matches.c.fdc_id).limit(COUNT_CAP + 1).subquery()
+    total = min(db.execute(select(func.count()).select_from(counted)).scalar() or 0, COUNT_CAP)
+
+    next_key = (float(rows[limit - 1].score), rows[limit - 1].fdc_id) if len(rows) > limit else None
+    return [row.fdc_id for row in rows[:limit]], total, next_key
+
+
+def search_food_ids(
+    db: Session,
+    term: str,
+    lang: str = "en",
+    source: str = "all",
+    limit: int = 50,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+) -> Tuple[List[int], int, Optional[str], Optional[str]]:
+    parsed = parse_cursor(cursor)
+    fdc_ids, total, next_cursor = _search_page(db, term, lang, source, limit, offset, parsed)
+    if total:
+        return fdc_ids, total, next_cursor, None
+    corrected = food_spelling.correct_query(term, lang)
+    if corrected is None:
+        return fdc_ids, total, next_cursor, None
+    return (*_search_page(db, corrected, lang, source, limit, offset, parsed), corrected)
+
+
+def _search_page(
+    db: Session,
+    term: str,
+    lang: str,
+    source: str,
+    limit: int,
+    offset: int,
+    parsed: Optional[Tuple[str, float, int]],
+) -> Tuple[List[int], int, Optional[str]]:
+    if parsed is None or parsed[0] == CURSOR_INDEX:
+        after = parsed[1:] if parsed else None
+        indexed = food_search_index.search(term, lang, source, limit, 0 if after else offset, after)
+        if indexed is not None:
+            fdc_ids, total, next_key = indexed
+            return fdc_ids, total, encode_cursor(CURSOR_INDEX, *next_key) if next_key else None
+        if parsed is not None:
+            raise InvalidCursorError("search index is not available for this cursor")
+
+    after = parsed[1:] if parsed else None
+    fdc_ids, total, next_key = fulltext_search(db, term, lang, source, limit, 0 if after else offset, after)
+    return fdc_ids, total, encode_cursor(CURSOR_FULLTEXT, *next_key) if next_key else None
@@ -0,0 +1,475 @@
+import asyncio
+import bisect
+import heapq
+import logging
+import os
+import pickle
+import re
+import threading
+import time
+from array import array
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func, or_, select
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.food import Food
+
+logger = logging.getLogger(__name__)
+
+
+LANGUAGES = ("en", "ru", "uz")
+LANGUAGE_COLUMNS = {"en": "description", "ru": "description_ru", "uz": "description_uz"}
+SOURCE_TYPES = {
+    "foundation": ("foundation_food",),
+    "branded": ("branded_food",),
+    "survey": ("survey_fndds_food", "sample_food"),
+}
+
+SNAPSHOT_VERSION = 2
+FETCH_SIZE = 10000
+REFRESH_BATCH = 1000
+MAX_CANDIDATES = 2000
+ESTIMATE_SAMPLE = 500
+
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def normalize(value: Optional[str]) -> str:
+    if not value:
+        return ""
+    return _NON_WORD.sub(" ", value.lower().replace("ё", "е")).strip()
+
+
+def text_trigrams(normalized: str) -> Set[str]:
+    grams = set()
+    for token in normalized.split():
+        padded = f" {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def query_trigrams(tokens: List[str]) -> Optional[Set[str]]:
+    # Two-letter tokens only match at a word start; one-letter tokens can't be indexed.
+    grams = set()
+    for token in tokens:
+        if len(token) >= 3:
+            grams.update(token[i:i + 3] for i in range(len(token) - 2))
+        elif len(token) == 2:
+            grams.add(f" {token}")
+    return grams or None
+
+
+def _contains(postings: array, doc: int) -> bool:
+    position = bisect.bisect_left(postings, doc)
+    return position < len(postings) and postings[position] == doc
+
+
+def _verifies(index: "_LanguageIndex", doc: int, phrase: str, tokens: List[str]) -> bool:
+    text = index.text(doc)
+    return phrase in text or (len(tokens) > 1 and all(token in text for token in tokens))
+
+
+# Bulk texts live in one joined string; refresh() edits go to the overlay.
+class _LanguageIndex:
+    __slots__ = ("postings", "base", "offsets", "overlay")
+
+    def __init__(self):
+        self.postings: Dict[str, array] = {}
+        self.base = ""
+        self.offsets = array("I", [0])
+        self.overlay: Dict[int, str] = {}
+
+    def text(self, doc: int) -> str:
+        if doc in self.overlay:
+            return self.overlay[doc]
+        if doc + 1 < len(self.offsets):
+            return self.base[self.offsets[doc]:self.offsets[doc + 1]]
+        return ""
+
+    def freeze(self, texts: List[str]):
+        offsets = array("I", [0])
+        total = 0
+        for value in texts:
+            total += len(value)
+            offsets.append(total)
+        self.base = "".join(texts)
+        self.offsets = offsets
+        self.overlay = {}
+
+    def set_text(self, doc: int, normalized: str, appended: bool):
+        old = self.text(doc)
+        if old == normalized:
+            return
+        for gram in text_trigrams(normalized) - text_trigrams(old):
+            postings = self.postings.get(gram)
+            if postings is None:
+                self.postings[gram] = array("I", [doc])
+            elif appended:
+                postings.append(doc)
+            elif not _contains(postings, doc):
+                postings.insert(bisect.bisect_left(postings, doc), doc)
+        self.overlay[doc] = normalized
+
+
+# Docs are numbered by description length, so a lower doc is a better match
+# and postings stay sorted; every candidate is verified against its text.
+class FoodSearchIndex:
+    def __init__(self, enabled: bool, snapshot_path: str, refresh_seconds: int):
+        self.enabled = enabled
+        self.snapshot_path = snapshot_path
+        self.refresh_seconds = max(0, refresh_seconds)
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.ready = False
+        self.fdc_ids = array("i")
+        self.types = array("B")
+        self.type_names: List[str] = []
+        self.fdc_sorted = array("i")
+        self.doc_sorted = array("I")
+        self.added: Dict[int, int] = {}
+        self.removed: Set[int] = set()
+        self.max_fdc_id = 0
+        self.languages = {code: _LanguageIndex() for code in LANGUAGES}
+        self.refreshed_at: Optional[datetime] = None
+        self.stats_data = {"searches": 0, "last_search_ms": None, "build_seconds": None,
+                           "last_refresh": None, "last_refresh_changes": 0, "snapshot_loaded": False}
+
+    def _type_code(self, data_type: str) -> int:
+        if data_type not in self.type_names:
+            self.type_names.append(data_type)
+        return self.type_names.index(data_type)
+
+    def build(self):
+        started = time.perf_counter()
+        fdc_ids = array("i")
+        types = array("B")
+        type_names: List[str] = []
+        postings = {code: defaultdict(lambda: array("I")) for code in LANGUAGES}
+        texts = {code: [] for code in LANGUAGES}
+
+        db = SessionLocal()
+        try:
+            refreshed_at = db.execute(select(func.current_timestamp())).scalar()
+            table = Food.__table__
+            result = db.connection().execution_options(stream_results=True, max_row_buffer=FETCH_SIZE).execute(
+                select(table.c.fdc_id, table.c.data_type, *(table.c[column] for column in LANGUAGE_COLUMNS.values()))
+                .order_by(func.length(table.c.description), table.c.fdc_id)
+            )
+            for doc, row in enumerate(result):
+                fdc_ids.append(row.fdc_id)
+                if row.data_type not in type_names:
+                    type_names.append(row.data_type)
+                types.append(type_names.index(row.data_type))
+                for code, column in LANGUAGE_COLUMNS.items():
+                    normalized = normalize(getattr(row, column))
+                    texts[code].append(normalized)
+                    for gram in text_trigrams(normalized):
+                        postings[code][gram].append(doc)
+        finally:
+            db.close()
+
+        languages = {}
+        for code in LANGUAGES:
+            index = _LanguageIndex()
+            index.postings = dict(postings[code])
+            index.freeze(texts[code])
+            languages[code] = index
+            texts[code] = None
+        by_fdc = sorted(range(len(fdc_ids)), key=fdc_ids.__getitem__)
+
+        with self._lock:
+            self.fdc_ids, self.types, self.type_names = fdc_ids, types, type_names
+            self.fdc_sorted = array("i", (fdc_ids[doc] for doc in by_fdc))
+            self.doc_sorted = array("I", by_fdc)
+            self.added = {}
+            self.removed = set()
+            self.max_fdc_id = self.fdc_sorted[-1] if by_fdc else 0
+            self.languages = languages
+            self.refreshed_at = refreshed_at
+            self.ready = True
+        self.stats_data["build_seconds"] = round(time.perf_counter() - started, 1)
+        logger.info(f"Food search index built: {len(fdc_ids)} foods in {self.stats_data['build_seconds']}s")
+
+    def refresh(self) -> int:
+        if not self.ready:
+            return 0
+        db = SessionLocal()
+        try:
+            refreshed_at = db.execute(select(func.current_timestamp())).scalar()
+            table = Food.__table__
+            changed = table.c.fdc_id > self.max_fdc_id
+            if self.refreshed_at is not None:
+                changed = or_(changed, table.c.updated_at >= self.refreshed_at)
+            rows = db.execute(
+                select(table.c.fdc_id, table.c.data_type, *(table.c[column] for column in LANGUAGE_COLUMNS.values()))
+                .where(changed)
+                .order_by(table.c.fdc_id)
+            ).all()
+
+            for start in range(0, len(rows), REFRESH_BATCH):
+                with self._lock:
+                    for row in rows[start:start + REFRESH_BATCH]:
+                        self._apply(row)
+            changes = len(rows)
+
+            # Deletes (and inserts below max_fdc_id) leave no updated_at behind; a
+            # count/sum mismatch with the indexed foods means the id sets differ,
+            # and only then are all ids read.
+            count, id_sum = db.execute(select(func.count(), func.coalesce(func.sum(table.c.fdc_id), 0))).one()
+            if (count, id_sum) != (len(self.fdc_ids) - len(self.removed), sum(self.fdc_ids) - sum(self.removed)):
+                present = set(db.execute(select(table.c.fdc_id)).scalars())
+                indexed = set(self.fdc_ids) - self.removed
+                gone = sorted(indexed - present)
+                arrived = sorted(present - indexed)
+                for start in range(0, len(gone), REFRESH_BATCH):
+                    with self._lock:
+                        for fdc_id in gone[start:start + REFRESH_BATCH]:
+                            self._remove(fdc_id)
+                for start in range(0, len(arrived), REFRESH_BATCH):
+                    batch = db.execute(
+                        select(table.c.fdc_id, table.c.data_type,
+                               *(table.c[column] for column in LANGUAGE_COLUMNS.values()))
+                        .where(table.c.fdc_id.in_(arrived[start:start + REFRESH_BATCH]))
+                    ).all()
+                    with self._lock:
+                        for row in batch:
+                            self._apply(row)
+                changes += len(gone) + len(arrived)
+        finally:
+            db.close()
+
+        self.refreshed_at = refreshed_at
+        self.stats_data["last_refresh"] = datetime.now().isoformat(timespec="seconds")
+        self.stats_data["last_refresh_changes"] = changes
+        return changes
+
+    def _doc_for(self, fdc_id: int) -> Optional[int]:
+        position = bisect.bisect_left(self.fdc_sorted, fdc_id)
+        if position < len(self.fdc_sorted) and self.fdc_sorted[position] == fdc_id:
+            return self.doc_sorted[position]
+        return self.added.get(fdc_id)
+
+    def _apply(self, row):
+        doc = self._doc_for(row.fdc_id)
+        appended = doc is None
+        if appended:
+            # New foods rank after everything built in bulk until the next full build.
+            doc = len(self.fdc_ids)
+            self.fdc_ids.append(row.fdc_id)
+            self.types.append(self._type_code(row.data_type))
+            self.added[row.fdc_id] = doc
+            self.max_fdc_id = max(self.max_fdc_id, row.fdc_id)
+        self.removed.discard(row.fdc_id)
+        for code, column in LANGUAGE_COLUMNS.items():
+            self.languages[code].set_text(doc, normalize(getattr(row, column)), appended)
+
+    def _remove(self, fdc_id: int):
+        # An empty text never verifies, so the doc drops out of every result.
+        doc = self._doc_for(fdc_id)
+        if doc is None:
+            return
+        self.removed.add(fdc_id)
+        for index in self.languages.values():
+            index.set_text(doc, "", False)
+
+    def search(
+        self,
+        term: str,
+        lang: str = "en",
+        source: str = "all",
+        limit: int = 50,
+        offset: int = 0,
+        after: Optional[Tuple[int, int]] = None,
+    ) -> Optional[Tuple[List[int], int, Optional[Tuple[int, int]]]]:
+        if not self.ready:
+            return None
+        phrase = normalize(term)
+        tokens = phrase.split()
+        if not tokens:
+            return [], 0, None
+        grams = query_trigrams(tokens)
+        if grams is None:
+            return None
+
+        started = time.perf_counter()
+        allowed = None
+        with self._lock:
+            if source in SOURCE_TYPES:
+                allowed = {self.type_names.index(name) for name in SOURCE_TYPES[source] if name in self.type_names}
+            matched: Dict[int, int] = {}
+            previous: List[_LanguageIndex] = []
+            unverified = 0.0
+            for code in (("en",) if lang == "en" else (lang, "en")):
+                index = self.languages[code]
+                unverified += self._match(index, grams, phrase, tokens, allowed, matched, previous)
+                previous.append(index)
+            total = len(matched) + int(unverified)
+            keys = ((tier, doc) for doc, tier in matched.items())
+            if after is not None:
+                keys = (key for key in keys if key > after)
+            page = heapq.nsmallest(offset + limit + 1, keys)[offset:]
+            next_key = page[limit - 1] if len(page) > limit else None
+            fdc_ids = [self.fdc_ids[doc] for _, doc in page[:limit]]
+
+        self.stats_data["searches"] += 1
+        self.stats_data["last_search_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return fdc_ids, total, next_key
+
+    def _match(self, index: _LanguageIndex, grams: Set[str], phrase: str, tokens: List[str],
+               allowed: Optional[Set[int]], matched: Dict[int, int], previous: List[_LanguageIndex]) -> float:
+        # matched: doc -> tier (0 prefix, 1 word start, 2 infix, 3 all words); returns
+        # the estimated matches past MAX_CANDIDATES not counted in `matched` or `previous`.
+        lists = []
+        for gram in grams:
+            postings = index.postings.get(gram)
+            if postings is None:
+                return 0
+            lists.append(postings)
+        # Verifying a candidate costs about as much as one bisect into another
+        # postings list, so the rarest list is verified directly.
+        candidates = min(lists, key=len)
+
+        base, offsets, overlay, types = index.base, index.offsets, index.overlay, self.types
+        frozen = len(offsets) - 1
+        multi = len(tokens) > 1
+
+        def tier(doc: int) -> Optional[int]:
+            if allowed is not None and types[doc] not in allowed:
+                return None
+            if doc in overlay:
+                text = overlay[doc]
+            elif doc < frozen:
+                text = base[offsets[doc]:offsets[doc + 1]]
+            else:
+                return None
+            position = text.find(phrase)
+            if position == 0:
+                return 0
+            if position > 0:
+                return 1 if text[position - 1] == " " else 2
+            if multi and all(token in text for token in tokens):
+                return 3
+            return None
+
+        for doc in candidates[:MAX_CANDIDATES]:
+            rank = tier(doc)
+            if rank is not None and rank < matched.get(doc, 4):
+                matched[doc] = rank
+        rest = len(candidates) - MAX_CANDIDATES
+        if rest <= 0:
+            return 0
+        # Documents are ordered by length, so the head is not representative of
+        # the tail; estimate the tail's hit rate from an evenly spaced sample.
+        step = max(1, rest // ESTIMATE_SAMPLE)
+        sample = candidates[MAX_CANDIDATES::step]
+        hits = sum(
+            1 for doc in sample
+            if doc not in matched and tier(doc) is not None
+            and not any(_verifies(other, doc, phrase, tokens) for other in previous)
+        )
+        return rest * hits / len(sample)
+
+    def save_snapshot(self, path: Optional[str] = None):
+        path = path or self.snapshot_path
+        if not path or not self.ready:
+            return
+        with self._lock:
+            payload = {
+                "version": SNAPSHOT_VERSION,
+                "fdc_ids": self.fdc_ids,
+                "types": self.types,
+                "type_names": self.type_names,
+                "fdc_sorted": self.fdc_sorted,
+                "doc_sorted": self.doc_sorted,
+                "added": self.added,
+                "removed": self.removed,
+                "max_fdc_id": self.max_fdc_id,
+                "refreshed_at": self.refreshed_at,
+                "languages": {
+                    code: (index.postings, index.base, index.offsets, index.overlay)
+                    for code, index in self.languages.items()
+                },
+            }
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def load_snapshot(self, path: Optional[str] = None) -> bool:
+        path = path or self.snapshot_path
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            with open(path, "rb") as f:
+                payload = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Food search snapshot {path} unreadable: {e}")
+            return False
+        if payload.get("version") != SNAPSHOT_VERSION:
+            return False
+        languages = {}
+        for code, (postings, base, offsets, overlay) in payload["languages"].items():
+            index = _LanguageIndex()
+            index.postings, index.base, index.offsets, index.overlay = postings, base, offsets, overlay
+            languages[code] = index
+        with self._lock:
+            self.fdc_ids, self.types, self.type_names = payload["fdc_ids"], payload["types"], payload["type_names"]
+            self.fdc_sorted, self.doc_sorted = payload["fdc_sorted"], payload["doc_sorted"]
+            self.added, self.removed, self.max_fdc_id = payload["added"], payload["removed"], payload["max_fdc_id"]
+            self.languages = languages
+            self.refreshed_at = payload["refreshed_at"]
+            self.ready = True
+        self.stats_data["snapshot_loaded"] = True
+        return True
+
+    def _prepare(self):
+        if not self.load_snapshot():
+            self.build()
+            self.save_snapshot()
+        elif self.refresh():
+            self.save_snapshot()
+
+    async def _run(self):
+        try:
+            await asyncio.to_thread(self._prepare)
+        except Exception as e:
+            logger.warning(f"Food search index build failed: {e}")
+            return
+        while self.refresh_seconds:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                if await asyncio.to_thread(self.refresh):
+                    await asyncio.to_thread(self.save_snapshot)
+            except Exception as e:
+                logger.warning(f"Food search index refresh failed: {e}")
+
+    async def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run(), name="food-search-index")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "enabled": self.enabled,
+            "ready": self.ready,
+            "foods": len(self.fdc_ids),
+            "trigrams": {code: len(index.postings) for code, index in self.languages.items()},
+            **self.stats_data,
+        }
+
+
+food_search_index = FoodSearchIndex(
+    settings.food_search_index_enabled,
+    settings.food_search_index_snapshot,
+    settings.food_search_index_refresh_seconds,
+)
@@ -0,0 +1,275 @@
+import asyncio
+import bisect
+import itertools
+import logging
+import threading
+import time
+import zlib
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.food import Food
+from app.services.food_search_index import FETCH_SIZE, LANGUAGE_COLUMNS, LANGUAGES, normalize
+
+logger = logging.getLogger(__name__)
+
+
+MAX_EDIT_DISTANCE = 2
+PREFIX_LENGTH = 7
+MIN_WORD_LENGTH = 3
+MIN_WORD_COUNT = 2
+MAX_CANDIDATES = 200
+
+
+def max_distance(token: str) -> int:
+    if len(token) < MIN_WORD_LENGTH:
+        return 0
+    return 1 if len(token) <= 5 else MAX_EDIT_DISTANCE
+
+
+def deletes(word: str, distance: int) -> Set[str]:
+    key = word[:PREFIX_LENGTH]
+    found = {key}
+    frontier = {key}
+    for _ in range(distance):
+        frontier = {
+            variant[:i] + variant[i + 1:]
+            for variant in frontier if len(variant) > 1
+            for i in range(len(variant))
+        } - found
+        found |= frontier
+    return found
+
+
+# One insertion, deletion, substitution or adjacent transposition, in linear time.
+def within_one(a: str, b: str) -> bool:
+    if abs(len(a) - len(b)) > 1:
+        return False
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    if len(a) == len(b):
+        return (
+            a[start + 1:] == b[start + 1:]
+            or (a[start + 2:] == b[start + 2:] and a[start:start + 2] == b[start:start + 2][::-1])
+        )
+    if len(a) > len(b):
+        return a[start + 1:] == b[start:]
+    return a[start:] == b[start + 1:]
+
+
+# Optimal string alignment distance, capped at limit + 1.
+def edit_distance(a: str, b: str, limit: int) -> int:
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(a) - start and end < len(b) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a, b = a[start:len(a) - end], b[start:len(b) - end]
+    if not a or not b:
+        return min(max(len(a), len(b)), limit + 1)
+    # Only cells within `limit` of the diagonal can stay under the limit.
+    over = limit + 1
+    previous2: List[int] = []
+    previous = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [over] * (len(b) + 1)
+        if i <= limit:
+            current[0] = i
+        row_min = current[0]
+        char = a[i - 1]
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            value = previous[j - 1] if char == b[j - 1] else previous[j - 1] + 1
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if i > 1 and j > 1 and char == b[j - 2] and a[i - 2] == b[j - 1] and previous2[j - 2] + 1 < value:
+                value = previous2[j - 2] + 1
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > limit:
+            return over
+        previous2, previous = previous, current
+    return min(previous[-1], over)
+
+
+def _hash(value: str) -> int:
+    return zlib.crc32(value.encode("utf-8"))
+
+
+# Sorted words (position = word id) and SymSpell delete keys stored as
+# crc32 << 32 | word_id in a sorted uint64 array.
+class _Vocabulary:
+    __slots__ = ("words", "counts", "keys")
+
+    def __init__(self, counter: Optional[Counter] = None):
+        self.words: List[str] = []
+        self.counts = array("I")
+        self.keys = array("Q")
+        if counter:
+            self.words = sorted(
+                word for word, count in counter.items()
+                if count >= MIN_WORD_COUNT and len(word) >= MIN_WORD_LENGTH and word.isalpha()
+            )
+            self.counts = array("I", (counter[word] for word in self.words))
+            self.keys = array("Q", sorted(
+                _hash(variant) << 32 | word_id
+                for word_id, word in enumerate(self.words)
+                for variant in deletes(word, max_distance(word))
+            ))
+
+    def known(self, token: str) -> bool:
+        position = bisect.bisect_left(self.words, token)
+        return position < len(self.words) and self.words[position].startswith(token)
+
+    def _word_ids(self, variant: str) -> Iterable[int]:
+        hashed = _hash(variant)
+        position = bisect.bisect_left(self.keys, hashed << 32)
+        while position < len(self.keys) and self.keys[position] >> 32 == hashed:
+            yield self.keys[position] & 0xFFFFFFFF
+            position += 1
+
+    def correct(self, token: str) -> Optional[Tuple[int, int, str]]:
+        # (distance, -count, word); single edits are tried first with within_one().
+        limit = max_distance(token)
+        if not limit:
+            return None
+        key = token[:PREFIX_LENGTH]
+        variants = sorted(deletes(token, limit), key=len, reverse=True)
+        seen: Dict[int, None] = {}
+        best = None
+        for variant in variants:
+            if len(key) - len(variant) > 1:
+                break
+            for word_id in self._word_ids(variant):
+                if word_id in seen:
+                    continue
+                seen[word_id] = None
+                if within_one(token, self.words[word_id]):
+                    candidate = (1, -self.counts[word_id], self.words[word_id])
+                    if best is None or candidate < best:
+                        best = candidate
+        if best is not None or limit == 1:
+            return best
+
+        for variant in variants:
+            if len(seen) >= MAX_CANDIDATES:
+                break
+            if len(key) - len(variant) > 1:
+                seen.update(dict.fromkeys(self._word_ids(variant)))
+        for word_id in itertools.islice(seen, MAX_CANDIDATES):
+            word = self.words[word_id]
+            if edit_distance(token, word, limit) <= limit:
+                candidate = (limit, -self.counts[word_id], word)
+                if best is None or candidate < best:
+                    best = candidate
+        return best
+
+    def memory_bytes(self) -> int:
+        return self.keys.itemsize * len(self.keys) + self.counts.itemsize * len(self.counts) + sum(
+            len(word) for word in self.words
+        )
+
+
+class FoodSpelling:
+    def __init__(self, enabled: bool, refresh_seconds: int):
+        self.enabled = enabled
+        self.refresh_seconds = max(0, refresh_seconds)
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.ready = False
+        self.vocabularies: Dict[str, _Vocabulary] = {code: _Vocabulary() for code in LANGUAGES}
+        self.stats_data = {"corrections": 0, "last_correct_ms": None, "build_seconds": None}
+
+    def build_from(self, rows: Iterable) -> None:
+        counters = {code: Counter() for code in LANGUAGES}
+        for row in rows:
+            for code, column in LANGUAGE_COLUMNS.items():
+                counters[code].update(set(normalize(getattr(row, column)).split()))
+        vocabularies = {code: _Vocabulary(counters[code]) for code in LANGUAGES}
+        with self._lock:
+            self.vocabularies = vocabularies
+            self.ready = True
+
+    def build(self):
+        started = time.perf_counter()
+        db = SessionLocal()
+        try:
+            table = Food.__table__
+            result = db.connection().execution_options(stream_results=True, max_row_buffer=FETCH_SIZE).execute(
+                select(*(table.c[column] for column in LANGUAGE_COLUMNS.values()))
+            )
+            self.build_from(result)
+        finally:
+            db.close()
+        self.stats_data["build_seconds"] = round(time.perf_counter() - started, 1)
+        logger.info(
+            f"Food spelling vocabulary built in {self.stats_data['build_seconds']}s: "
+            + ", ".join(f"{code} {len(v.words)} words" for code, v in self.vocabularies.items())
+        )
+
+    def correct_query(self, term: str, lang: str = "en") -> Optional[str]:
+        if not self.ready:
+            return None
+        started = time.perf_counter()
+        with self._lock:
+            vocabularies = [self.vocabularies[code] for code in dict.fromkeys((lang, "en")) if code in self.vocabularies]
+        tokens = normalize(term).split()
+        changed = False
+        for position, token in enumerate(tokens):
+            if not max_distance(token) or any(vocabulary.known(token) for vocabulary in vocabularies):
+                continue
+            options = [option for option in (vocabulary.correct(token) for vocabulary in vocabularies) if option]
+            if options:
+                tokens[position] = min(options)[2]
+                changed = True
+        self.stats_data["corrections"] += 1
+        self.stats_data["last_correct_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        return " ".join(tokens) if changed else None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.build)
+            except Exception as e:
+                logger.warning(f"Food spelling vocabulary build failed: {e}")
+            if not self.refresh_seconds:
+                return
+            await asyncio.sleep(self.refresh_seconds)
+
+    async def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run(), name="food-spelling")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "enabled": self.enabled,
+            "ready": self.ready,
+            "words": {code: len(v.words) for code, v in self.vocabularies.items()},
+            "delete_keys": {code: len(v.keys) for code, v in self.vocabularies.items()},
+            "memory_mb": round(sum(v.memory_bytes() for v in self.vocabularies.values()) / 1024 / 1024, 1),
+            **self.stats_data,
+        }
+
+
+food_spelling = FoodSpelling(
+    settings.food_spelling_enabled,
+    settings.food_spelling_refresh_seconds,
+)
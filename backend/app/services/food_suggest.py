@@ -0,0 +1,230 @@
+import asyncio
+import bisect
+import heapq
+import logging
+import threading
+import time
+from array import array
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.food import Food
+from app.models.meal_photo import MealPhoto
+from app.services.food_search_index import FETCH_SIZE, LANGUAGE_COLUMNS, LANGUAGES, normalize
+
+logger = logging.getLogger(__name__)
+
+
+TOP_K = 20
+HOT_PREFIX_LENGTH = 3
+SCAN_LIMIT = 2000
+MAX_NAME_LENGTH = 120
+LOG_WEIGHT = 5
+BUDGET_MS = 5.0
+
+
+# Read-only list of strings in one joined str; bisect works on it directly.
+class _Strings:
+    __slots__ = ("base", "offsets")
+
+    def __init__(self, values: Iterable[str] = ()):
+        offsets = array("I", [0])
+        parts = []
+        total = 0
+        for value in values:
+            parts.append(value)
+            total += len(value)
+            offsets.append(total)
+        self.base = "".join(parts)
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, position: int) -> str:
+        return self.base[self.offsets[position]:self.offsets[position + 1]]
+
+
+# Sorted names; a prefix is a contiguous range. Hot or long ranges keep their
+# top TOP_K precomputed in `cached`, the rest are scanned per request.
+class _PrefixIndex:
+    __slots__ = ("keys", "names", "fdc_ids", "weights", "cached")
+
+    def __init__(self, entries: Optional[Dict[str, List]] = None):
+        entries = entries or {}
+        ordered = sorted(entries)
+        self.keys = _Strings(ordered)
+        self.names = _Strings(entries[key][1] for key in ordered)
+        self.fdc_ids = array("i", (entries[key][2] for key in ordered))
+        self.weights = array("I", (entries[key][0] for key in ordered))
+        self.cached: Dict[str, array] = {}
+        self._precompute()
+
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        low = bisect.bisect_left(self.keys, prefix)
+        return low, bisect.bisect_left(self.keys, prefix + "\U0010ffff", low)
+
+    def _top(self, low: int, high: int, limit: int) -> List[int]:
+        return heapq.nlargest(limit, range(low, high), key=self.weights.__getitem__)
+
+    def _children(self, prefix: str, low: int, high: int) -> List[str]:
+        children = []
+        position = low
+        while position < high:
+            key = self.keys[position]
+            if len(key) == len(prefix):
+                position += 1
+                continue
+            child = key[:len(prefix) + 1]
+            children.append(child)
+            position = self._range(child)[1]
+        return children
+
+    def _precompute(self):
+        pending = self._children("", 0, len(self.keys))
+        while pending:
+            prefix = pending.pop()
+            low, high = self._range(prefix)
+            if high - low > SCAN_LIMIT or len(prefix) <= HOT_PREFIX_LENGTH:
+                self.cached[prefix] = array("I", self._top(low, high, TOP_K))
+                pending.extend(self._children(prefix, low, high))
+
+    def suggest(self, prefix: str, limit: int) -> List[int]:
+        if prefix in self.cached:
+            return list(self.cached[prefix][:limit])
+        low, high = self._range(prefix)
+        return self._top(low, high, limit)
+
+
+# Popularity = foods with the name + LOG_WEIGHT per meal logged under it.
+class FoodSuggest:
+    def __init__(self, enabled: bool, refresh_seconds: int):
+        self.enabled = enabled
+        self.refresh_seconds = max(0, refresh_seconds)
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.ready = False
+        self.indexes: Dict[str, _PrefixIndex] = {code: _PrefixIndex() for code in LANGUAGES}
+        self.stats_data = {"suggests": 0, "cached_hits": 0, "over_budget": 0,
+                           "last_suggest_ms": None, "build_seconds": None}
+
+    def build(self):
+        started = time.perf_counter()
+        entries = {code: {} for code in LANGUAGES}
+        db = SessionLocal()
+        try:
+            table = Food.__table__
+            result = db.connection().execution_options(stream_results=True, max_row_buffer=FETCH_SIZE).execute(
+                select(table.c.fdc_id, *(table.c[column] for column in LANGUAGE_COLUMNS.values()))
+                .order_by(table.c.fdc_id)
+            )
+            for row in result:
+                for code, column in LANGUAGE_COLUMNS.items():
+                    name = getattr(row, column)
+                    if not name or len(name) > MAX_NAME_LENGTH:
+                        continue
+                    key = normalize(name)
+                    if not key:
+                        continue
+                    entry = entries[code].get(key)
+                    if entry is None:
+                        entries[code][key] = [1, name.strip(), row.fdc_id]
+                    else:
+                        entry[0] += 1
+
+            logged = defaultdict(int)
+            for meal_name, count in db.execute(
+                select(MealPhoto.meal_name, func.count()).where(MealPhoto.meal_name.isnot(None)).group_by(MealPhoto.meal_name)
+            ):
+                logged[normalize(meal_name)] += count
+        finally:
+            db.close()
+
+        for code in LANGUAGES:
+            for key, count in logged.items():
+                entry = entries[code].get(key)
+                if entry is not None:
+                    entry[0] += LOG_WEIGHT * count
+        indexes = {code: _PrefixIndex(entries[code]) for code in LANGUAGES}
+        with self._lock:
+            self.indexes = indexes
+            self.ready = True
+        self.stats_data["build_seconds"] = round(time.perf_counter() - started, 1)
+        logger.info(
+            f"Food suggest index built in {self.stats_data['build_seconds']}s: "
+            + ", ".join(f"{code} {len(index.keys)} names" for code, index in indexes.items())
+        )
+
+    def suggest(self, prefix: str, lang: str = "en", limit: int = 10) -> Optional[List[Dict[str, object]]]:
+        if not self.ready:
+            return None
+        started = time.perf_counter()
+        key = normalize(prefix)
+        limit = min(limit, TOP_K)
+        with self._lock:
+            indexes = [self.indexes[code] for code in dict.fromkeys((lang, "en"))]
+        suggestions = []
+        seen = set()
+        cached = False
+        if key:
+            for index in indexes:
+                cached = cached or key in index.cached
+                for position in index.suggest(key, limit):
+                    fdc_id = index.fdc_ids[position]
+                    if fdc_id in seen:
+                        continue
+                    seen.add(fdc_id)
+                    suggestions.append({
+                        "name": index.names[position],
+                        "fdc_id": fdc_id,
+                        "popularity": index.weights[position],
+                    })
+                if len(suggestions) >= limit:
+                    break
+
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stats_data["suggests"] += 1
+        self.stats_data["cached_hits"] += cached
+        self.stats_data["over_budget"] += elapsed > BUDGET_MS
+        self.stats_data["last_suggest_ms"] = round(elapsed, 3)
+        return suggestions[:limit]
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.build)
+            except Exception as e:
+                logger.warning(f"Food suggest index build failed: {e}")
+            if not self.refresh_seconds:
+                return
+            await asyncio.sleep(self.refresh_seconds)
+
+    async def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run(), name="food-suggest")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "enabled": self.enabled,
+            "ready": self.ready,
+            "names": {code: len(index.keys) for code, index in self.indexes.items()},
+            "cached_prefixes": {code: len(index.cached) for code, index in self.indexes.items()},
+            **self.stats_data,
+        }
+
+
+food_suggest = FoodSuggest(
+    settings.food_suggest_enabled,
+    settings.food_suggest_refresh_seconds,
+)
@@ -0,0 +1,141 @@
+import asyncio
+import io
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from app.core.config import settings
+
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+try:
+    from pillow_heif import register_heif_opener
+    register_heif_opener()
+    HEIF_AVAILABLE = True
+except ImportError:
+    HEIF_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+OUTPUT_FORMATS = {
+    "jpeg": ("JPEG", "image/jpeg", ".jpg"),
+    "webp": ("WEBP", "image/webp", ".webp"),
+}
+
+VARIANT_SIZES = ("thumb", "medium")
+
+
+class ImageDecodeError(Exception):
+    pass
+
+
+@dataclass
+class NormalizedImage:
+    data: bytes
+    content_type: str
+    extension: str
+    width: int
+    height: int
+    ai_data: bytes
+    ai_content_type: str
+    variants: Dict[str, bytes] = field(default_factory=dict)
+
+
+def output_format():
+    return OUTPUT_FORMATS.get(settings.image_output_format.lower(), OUTPUT_FORMATS["jpeg"])
+
+
+def _to_rgb(img: "Image.Image") -> "Image.Image":
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        rgba = img.convert("RGBA")
+        background = Image.new("RGB", rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.split()[-1])
+        return background
+    if img.mode != "RGB":
+        return img.convert("RGB")
+    return img
+
+
+def _fit(img: "Image.Image", long_edge: int) -> "Image.Image":
+    if max(img.size) <= long_edge:
+        return img
+    resized = img.copy()
+    resized.thumbnail((long_edge, long_edge), Image.LANCZOS)
+    return resized
+
+
+def _encode(img: "Image.Image", pil_format: str, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    options = {"quality": quality}
+    if pil_format == "JPEG":
+        options.update(optimize=True, progressive=True)
+    elif pil_format == "WEBP":
+        options.update(method=4)
+    img.save(buffer, format=pil_format, **options)
+    return buffer.getvalue()
+
+
+def _variant_long_edge(size: str) -> int:
+    if size == "thumb":
+        return settings.image_thumbnail_long_edge
+    return settings.image_medium_long_edge
+
+
+def _decode(contents: bytes, draft_edge: int) -> "Image.Image":
+    try:
+        img = Image.open(io.BytesIO(contents))
+        if img.format == "JPEG":
+            img.draft("RGB", (draft_edge, draft_edge))
+        img = ImageOps.exif_transpose(img)
+        return _to_rgb(img)
+    except Exception as e:
+        raise ImageDecodeError(str(e))
+
+
+def _encode_variants(img: "Image.Image", pil_format: str) -> Dict[str, bytes]:
+    variants = {}
+    source = img
+    for size in reversed(VARIANT_SIZES):
+        source = _fit(source, _variant_long_edge(size))
+        variants[size] = _encode(source, pil_format, settings.image_variant_quality)
+    return variants
+
+
+def normalize_image(contents: bytes) -> Optional[NormalizedImage]:
+    if not PIL_AVAILABLE:
+        return None
+
+    img = _decode(contents, settings.image_max_long_edge)
+    pil_format, content_type, extension = output_format()
+
+    stored = _fit(img, settings.image_max_long_edge)
+    ai_variant = _fit(stored, settings.image_ai_long_edge)
+
+    return NormalizedImage(
+        data=_encode(stored, pil_format, settings.image_quality),
+        content_type=content_type,
+        extension=extension,
+        width=stored.width,
+        height=stored.height,
+        ai_data=_encode(ai_variant, pil_format, settings.image_ai_quality),
+        ai_content_type=content_type,
+        variants=_encode_variants(ai_variant, pil_format),
+    )
+
+
+def build_variants(contents: bytes) -> Optional[Dict[str, bytes]]:
+    if not PIL_AVAILABLE:
+        return None
+
+    img = _decode(contents, settings.image_medium_long_edge)
+    pil_format, _, _ = output_format()
+    return _encode_variants(img, pil_format)
+
+
+async def normalize_image_async(contents: bytes) -> Optional[NormalizedImage]:
+    return await asyncio.to_thread(normalize_image, contents)
@@ -0,0 +1,424 @@
+import asyncio
+import json
+import logging
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.meal_photo import MealPhoto
+from app.models.meal_analysis_job import MealAnalysisJob, AnalysisStatus
+from app.models.user import User
+from app.services.ai_service import ai_service
+from app.services.analysis_cache import analysis_cache, image_fingerprint
+from app.services.badge_service import check_and_award_badges
+
+logger = logging.getLogger(__name__)
+
+
+FALLBACK_NUTRITION = {
+    "calories": 250,
+    "protein": 10,
+    "fat": 8,
+    "carbs": 30,
+    "fiber": 2,
+    "sugar": 5,
+    "sodium": 200,
+    "health_score": 5,
+}
+
+PARTIAL_FLUSH_SECONDS = 0.5
+
+
+async def analyze_meal_bytes(
+    image_bytes: bytes,
+    media_type: str,
+    meal_name_hint: Optional[str] = None,
+    user_id: Optional[int] = None,
+    on_field: Optional[Callable[[str, Any], Awaitable[None]]] = None,
+    on_retry: Optional[Callable[[], None]] = None,
+) -> Optional[Dict[str, Any]]:
+    fingerprint = None
+    if user_id is not None and analysis_cache.enabled:
+        fingerprint = await asyncio.to_thread(image_fingerprint, image_bytes)
+        cached = await asyncio.to_thread(
+            analysis_cache.lookup, user_id, fingerprint, ai_service.model, meal_name_hint
+        )
+        if cached is not None:
+            return cached
+
+    if on_field is not None and settings.meal_analysis_streaming:
+        nutrition = await ai_service.analyze_meal_image_stream(
+            image_bytes=image_bytes,
+            mime_type=media_type,
+            meal_name_hint=meal_name_hint,
+            on_field=on_field,
+            on_retry=on_retry,
+        )
+    else:
+        nutrition = await ai_service.analyze_meal_image(
+            image_bytes=image_bytes,
+            mime_type=media_type,
+            meal_name_hint=meal_name_hint,
+        )
+
+    if nutrition is not None and fingerprint is not None:
+        await asyncio.to_thread(
+            analysis_cache.store, user_id, fingerprint, ai_service.model, nutrition, meal_name_hint
+        )
+    return nutrition
+
+
+def apply_nutrition(
+    meal_photo: MealPhoto,
+    nutrition: Optional[Dict[str, Any]],
+    meal_name_hint: Optional[str] = None,
+) -> None:
+    if nutrition:
+        meal_photo.detected_meal_name = nutrition.get("detected_meal_name")
+        for field in FALLBACK_NUTRITION:
+            setattr(meal_photo, field, nutrition.get(field))
+    else:
+        meal_photo.detected_meal_name = meal_name_hint or "Блюдо"
+        for field, value in FALLBACK_NUTRITION.items():
+            setattr(meal_photo, field, value)
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _ms_between(start: Optional[datetime], end: Optional[datetime]) -> Optional[int]:
+    start, end = _as_utc(start), _as_utc(end)
+    if start is None or end is None:
+        return None
+    return int((end - start).total_seconds() * 1000)
+
+
+def job_timings(job: MealAnalysisJob) -> Dict[str, Optional[int]]:
+    return {
+        "queue_wait_ms": _ms_between(job.created_at, job.started_at),
+        "analysis_ms": _ms_between(job.started_at, job.finished_at),
+        "total_ms": _ms_between(job.created_at, job.finished_at),
+    }
+
+
+class AnalysisEventBroker:
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(job_id)
+        if not queues:
+            return
+        queues.discard(queue)
+        if not queues:
+            self._subscribers.pop(job_id, None)
+
+    def publish(self, job_id: str, event: str, data: Optional[Dict[str, Any]] = None) -> None:
+        for queue in list(self._subscribers.get(job_id, ())):
+            queue.put_nowait((event, data or {}))
+
+
+analysis_events = AnalysisEventBroker()
+
+
+@dataclass
+class _QueuedAnalysis:
+    job_id: str
+    user_id: int
+    image_bytes: bytes
+    media_type: str
+    meal_name_hint: Optional[str]
+
+
+class MealAnalysisWorkerPool:
+
+    def __init__(self, workers: int, queue_size: int, stale_seconds: int):
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.stale_seconds = max(0, stale_seconds)
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._reserved = 0
+        self._owned: Set[str] = set()
+        self.recovered = 0
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._tasks)
+
+    @property
+    def is_full(self) -> bool:
+        return self._queue is None or self._queue.qsize() + self._reserved >= self.queue_size
+
+    def reserve(self) -> bool:
+        if self.is_full:
+            return False
+        self._reserved += 1
+        return True
+
+    def release(self) -> None:
+        self._reserved = max(0, self._reserved - 1)
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [
+            asyncio.create_task(self._worker(i), name=f"meal-analysis-{i}")
+            for i in range(self.workers)
+        ]
+        if self.stale_seconds:
+            self._tasks.append(asyncio.create_task(self._recover(), name="meal-analysis-recovery"))
+        else:
+            logger.warning("Meal analysis recovery disabled; jobs of a crashed worker stay pending")
+
+    async def stop(self):
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=settings.meal_analysis_shutdown_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Meal analysis queue not drained before shutdown")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        leftover = []
+        while not self._queue.empty():
+            leftover.append(self._queue.get_nowait().job_id)
+        for job_id in leftover:
+            await asyncio.to_thread(self._fail, job_id, "Interrupted by server shutdown", None)
+        self._owned.clear()
+
+    def create_job(self, db: Session, meal_photo: MealPhoto) -> MealAnalysisJob:
+        now = datetime.now(timezone.utc)
+        job = MealAnalysisJob(
+            id=uuid.uuid4().hex,
+            user_id=meal_photo.user_id,
+            meal_photo_id=meal_photo.id,
+            status=AnalysisStatus.PENDING.value,
+            created_at=now,
+            heartbeat_at=now,
+        )
+        db.add(job)
+        return job
+
+    def enqueue(
+        self,
+        job_id: str,
+        user_id: int,
+        image_bytes: bytes,
+        media_type: str,
+        meal_name_hint: Optional[str] = None,
+    ) -> None:
+        if self._queue is None:
+            raise RuntimeError("Meal analysis pool is not running")
+        self.release()
+        self._queue.put_nowait(_QueuedAnalysis(job_id, user_id, image_bytes, media_type, meal_name_hint))
+        self._owned.add(job_id)
+
+    @property
+    def heartbeat_seconds(self) -> float:
+        return self.stale_seconds / 3
+
+    def _heartbeat(self) -> None:
+        # Every process keeps its own queued and running jobs alive, however long
+        # they wait in the queue; only jobs whose process stopped beating go stale.
+        job_ids = list(self._owned)
+        if not job_ids:
+            return
+        now = datetime.now(timezone.utc)
+        db = SessionLocal()
+        try:
+            for start in range(0, len(job_ids), 500):
+                db.query(MealAnalysisJob).filter(
+                    MealAnalysisJob.id.in_(job_ids[start:start + 500]),
+                    MealAnalysisJob.status.in_((AnalysisStatus.PENDING.value, AnalysisStatus.RUNNING.value)),
+                ).update({"heartbeat_at": now}, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def _fail_stale(self) -> int:
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.stale_seconds)
+        db = SessionLocal()
+        try:
+            job_ids = [job_id for (job_id,) in db.query(MealAnalysisJob.id).filter(
+                MealAnalysisJob.status.in_((AnalysisStatus.PENDING.value, AnalysisStatus.RUNNING.value)),
+                func.coalesce(MealAnalysisJob.heartbeat_at, MealAnalysisJob.created_at) < cutoff,
+            ).limit(500)]
+        finally:
+            db.close()
+        job_ids = [job_id for job_id in job_ids if job_id not in self._owned]
+        for job_id in job_ids:
+            self._fail(job_id, "Interrupted by server restart", None)
+        return len(job_ids)
+
+    async def _recover(self):
+        while True:
+            try:
+                await asyncio.to_thread(self._heartbeat)
+                failed = await asyncio.to_thread(self._fail_stale)
+                self.recovered += failed
+                if failed:
+                    logger.info(f"Failed {failed} stale meal analysis jobs")
+            except Exception as e:
+                logger.warning(f"Meal analysis recovery failed: {e}")
+            await asyncio.sleep(self.heartbeat_seconds)
+
+    async def _worker(self, index: int):
+        while True:
+            item = await self._queue.get()
+            try:
+                await self._process(item)
+            except Exception as e:
+                logger.error(f"Meal analysis worker {index} crashed on job {item.job_id}: {e}", exc_info=True)
+            finally:
+                self._owned.discard(item.job_id)
+                self._queue.task_done()
+
+    async def _process(self, item: _QueuedAnalysis):
+        if not await asyncio.to_thread(self._claim, item.job_id):
+            return
+        analysis_events.publish(item.job_id, "status", {"status": AnalysisStatus.RUNNING.value})
+
+        partial: Dict[str, Any] = {}
+        dirty = asyncio.Event()
+
+        async def flush_partial():
+            while True:
+                await dirty.wait()
+                dirty.clear()
+                try:
+                    await asyncio.to_thread(self._save_partial, item.job_id, dict(partial))
+                except Exception as e:
+                    logger.warning(f"Saving partial result of job {item.job_id} failed: {e}")
+                await asyncio.sleep(PARTIAL_FLUSH_SECONDS)
+
+        async def on_field(field: str, value: Any):
+            partial[field] = value
+            analysis_events.publish(item.job_id, "partial", {field: value})
+            dirty.set()
+
+        def on_retry():
+            partial.clear()
+            analysis_events.publish(item.job_id, "reset")
+            dirty.set()
+
+        writer = asyncio.create_task(flush_partial())
+        try:
+            nutrition = await analyze_meal_bytes(
+                item.image_bytes, item.media_type, item.meal_name_hint, item.user_id, on_field, on_retry
+            )
+        except Exception as e:
+            await asyncio.to_thread(self._fail, item.job_id, f"Analysis error: {e}", item.meal_name_hint)
+            analysis_events.publish(item.job_id, AnalysisStatus.FAILED.value)
+            return
+        finally:
+            writer.cancel()
+            await asyncio.gather(writer, return_exceptions=True)
+
+        if nutrition is None:
+            await asyncio.to_thread(self._fail, item.job_id, "AI analysis returned no result", item.meal_name_hint)
+            analysis_events.publish(item.job_id, AnalysisStatus.FAILED.value)
+            return
+
+        await asyncio.to_thread(self._complete, item.job_id, nutrition, item.meal_name_hint)
+        analysis_events.publish(item.job_id, AnalysisStatus.COMPLETED.value)
+
+    def _claim(self, job_id: str) -> bool:
+        db = SessionLocal()
+        try:
+            claimed = db.query(MealAnalysisJob).filter(
+                MealAnalysisJob.id == job_id,
+                MealAnalysisJob.status == AnalysisStatus.PENDING.value,
+            ).update({
+                "status": AnalysisStatus.RUNNING.value,
+                "started_at": datetime.now(timezone.utc),
+            }, synchronize_session=False)
+            if claimed:
+                meal_photo_id = db.query(MealAnalysisJob.meal_photo_id).filter(MealAnalysisJob.id == job_id).scalar()
+                db.query(MealPhoto).filter(MealPhoto.id == meal_photo_id).update(
+                    {"analysis_status": AnalysisStatus.RUNNING.value}, synchronize_session=False
+                )
+            db.commit()
+            return bool(claimed)
+        finally:
+            db.close()
+
+    def _save_partial(self, job_id: str, partial: Dict[str, Any]):
+        db = SessionLocal()
+        try:
+            db.query(MealAnalysisJob).filter(MealAnalysisJob.id == job_id).update(
+                {"partial_result": json.dumps(partial, ensure_ascii=False) if partial else None},
+                synchronize_session=False,
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _complete(self, job_id: str, nutrition: Dict[str, Any], meal_name_hint: Optional[str]):
+        self._finish(job_id, AnalysisStatus.COMPLETED, nutrition, None, meal_name_hint)
+
+    def _fail(self, job_id: str, reason: str, meal_name_hint: Optional[str]):
+        logger.warning(f"Meal analysis job {job_id} failed: {reason}")
+        self._finish(job_id, AnalysisStatus.FAILED, None, reason, meal_name_hint)
+
+    def _finish(
+        self,
+        job_id: str,
+        outcome: AnalysisStatus,
+        nutrition: Optional[Dict[str, Any]],
+        reason: Optional[str],
+        meal_name_hint: Optional[str],
+    ):
+        db = SessionLocal()
+        try:
+            job = db.query(MealAnalysisJob).filter(MealAnalysisJob.id == job_id).first()
+            if not job or job.status in (AnalysisStatus.COMPLETED.value, AnalysisStatus.FAILED.value):
+                return
+            photo = db.query(MealPhoto).filter(MealPhoto.id == job.meal_photo_id).first()
+            if photo:
+                apply_nutrition(photo, nutrition, meal_name_hint or photo.meal_name)
+                photo.analysis_status = outcome.value
+
+            job.status = outcome.value
+            job.error = reason[:500] if reason else None
+            job.finished_at = datetime.now(timezone.utc)
+            if job.started_at is None:
+                job.started_at = job.finished_at
+            db.commit()
+
+            user = db.query(User).filter(User.id == job.user_id).first()
+            if user:
+                try:
+                    check_and_award_badges(user, db)
+                except Exception:
+                    pass
+        finally:
+            db.close()
+
+
+meal_analysis_pool = MealAnalysisWorkerPool(
+    workers=settings.meal_analysis_workers,
+    queue_size=settings.meal_analysis_queue_size,
+    stale_seconds=settings.meal_analysis_stale_seconds,
+)
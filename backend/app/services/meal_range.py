@@ -0,0 +1,94 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from app.services.daily_nutrition import MACRO_FIELDS, format_health_score
+
+SECONDS_PER_DAY = 86400
+MAX_RANGE_DAYS = 400
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def day_origin(start: date, tz_offset_minutes: int) -> int:
+    local_midnight = datetime(start.year, start.month, start.day, tzinfo=timezone.utc)
+    return int((local_midnight - _EPOCH).total_seconds()) - tz_offset_minutes * 60
+
+
+def day_index(created_at: datetime, origin: int) -> int:
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return (int((created_at - _EPOCH).total_seconds()) - origin) // SECONDS_PER_DAY
+
+
+class DayTotals:
+    __slots__ = ("day", "totals", "meal_count", "score_sum", "score_count", "meals")
+
+    def __init__(self, day: date):
+        self.day = day
+        self.totals = dict.fromkeys(MACRO_FIELDS, 0)
+        self.meal_count = 0
+        self.score_sum = 0.0
+        self.score_count = 0
+        self.meals: List[Dict[str, Any]] = []
+
+    def add(self, values: Any, meal: Optional[Dict[str, Any]] = None):
+        totals = self.totals
+        for field in MACRO_FIELDS:
+            totals[field] += getattr(values, field) or 0
+        self.meal_count += 1
+        score = format_health_score(values.health_score)
+        if score is not None:
+            self.score_sum += score
+            self.score_count += 1
+        if meal is not None:
+            self.meals.append(meal)
+
+    def summary(self, include_meals: bool) -> Dict[str, Any]:
+        result = {"date": self.day.isoformat()}
+        for field in MACRO_FIELDS:
+            result[f"total_{field}"] = self.totals[field]
+        result["meal_count"] = self.meal_count
+        result["health_score"] = round(self.score_sum / self.score_count, 1) if self.score_count else None
+        if include_meals:
+            result["meals"] = self.meals[::-1]
+        return result
+
+
+def iter_day_summaries(
+    rows: Iterable[Any],
+    start: date,
+    days: int,
+    tz_offset_minutes: int,
+    meal_payload: Optional[Callable[[Any], Dict[str, Any]]] = None,
+) -> Iterator[Dict[str, Any]]:
+    # rows must be ordered by created_at; every day is yielded, empty ones too
+    origin = day_origin(start, tz_offset_minutes)
+    include_meals = meal_payload is not None
+    current = DayTotals(start)
+    index = 0
+    for row in rows:
+        row_index = day_index(row.created_at, origin)
+        if row_index < index or row_index >= days:
+            continue
+        while index < row_index:
+            yield current.summary(include_meals)
+            index += 1
+            current = DayTotals(start + timedelta(days=index))
+        current.add(row, meal_payload(row) if include_meals else None)
+    while index < days:
+        yield current.summary(include_meals)
+        index += 1
+        current = DayTotals(start + timedelta(days=index))
+
+
+def rollup_totals(row: Any) -> Dict[str, Any]:
+    result = {f"total_{field}": getattr(row, field) if row else 0 for field in MACRO_FIELDS}
+    result["meal_count"] = row.meal_count if row else 0
+    result["health_score"] = row.health_score if row else None
+    return result
+
+
+def rollup_day_summaries(rollups: Dict[date, Any], start: date, days: int) -> Iterator[Dict[str, Any]]:
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        yield {"date": day.isoformat(), **rollup_totals(rollups.get(day))}
@@ -0,0 +1,223 @@
+import asyncio
+import json
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.barcode_product_cache import BarcodeProductCacheEntry
+from app.services.barcode_lookup import canonical_gtin
+
+logger = logging.getLogger(__name__)
+
+
+PRODUCT_FIELDS = ("code", "product_name", "generic_name", "brands", "nutriments", "last_modified_t")
+
+FOUND = "found"
+MISSING = "missing"
+ERROR = "error"
+
+
+def _aware(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _trim_product(product: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: product[field] for field in PRODUCT_FIELDS if field in product}
+
+
+class OpenFoodFactsService:
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._background = set()
+        self._lock = threading.Lock()
+        self._counters = {
+            "fresh_hits": 0,
+            "negative_hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "fetches": 0,
+            "fetch_errors": 0,
+            "coalesced": 0,
+            "revalidations": 0,
+        }
+        self._wins: Dict[str, int] = {}
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            counters["wins_by_host"] = dict(self._wins)
+        lookups = counters["fresh_hits"] + counters["negative_hits"] + counters["stale_hits"] + counters["misses"]
+        counters["hit_rate"] = round((lookups - counters["misses"]) / lookups, 4) if lookups else None
+        return counters
+
+    def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                timeout=settings.openfoodfacts_timeout,
+                limits=httpx.Limits(
+                    max_connections=settings.openfoodfacts_max_connections,
+                    max_keepalive_connections=settings.openfoodfacts_max_connections,
+                ),
+                headers={"User-Agent": "caloriesapp/1.0 (barcode lookup)"},
+            )
+            self._loop = loop
+            self._inflight = {}
+        return self._client
+
+    async def close(self):
+        for task in list(self._background):
+            task.cancel()
+        if self._client is not None:
+            try:
+                await self._client.aclose()
+            except Exception:
+                pass
+        self._client = None
+        self._loop = None
+        self._inflight = {}
+
+    async def _fetch_host(self, client: httpx.AsyncClient, host: str, code: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        resp = await client.get(
+            f"{host}/api/v2/product/{code}.json",
+            params={"fields": ",".join(PRODUCT_FIELDS)},
+        )
+        if resp.status_code == 404:
+            return MISSING, None
+        resp.raise_for_status()
+        data = resp.json()
+        if data.get("status") == 1 and data.get("product"):
+            return FOUND, data["product"]
+        return MISSING, None
+
+    async def fetch(self, code: str) -> Tuple[str, Optional[Dict[str, Any]], Optional[str]]:
+        client = self._get_client()
+        self._count("fetches")
+        tasks = {
+            asyncio.create_task(self._fetch_host(client, host, code)): host
+            for host in settings.openfoodfacts_hosts_list
+        }
+        outcome = ERROR
+        try:
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    try:
+                        status, product = task.result()
+                    except Exception as e:
+                        logger.info(f"OpenFoodFacts {tasks[task]} failed for {code}: {type(e).__name__}: {e}")
+                        continue
+                    if status == FOUND:
+                        with self._lock:
+                            self._wins[tasks[task]] = self._wins.get(tasks[task], 0) + 1
+                        return FOUND, product, tasks[task]
+                    outcome = MISSING
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        if outcome == ERROR:
+            self._count("fetch_errors")
+        return outcome, None, None
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        db = SessionLocal()
+        try:
+            entry = db.query(BarcodeProductCacheEntry).filter(BarcodeProductCacheEntry.barcode == key).first()
+            if entry is None:
+                return None
+            return {
+                "found": entry.found,
+                "product": json.loads(entry.product_json) if entry.product_json else None,
+                "expires_at": _aware(entry.expires_at),
+            }
+        except Exception as e:
+            logger.warning(f"Barcode cache read failed for {key}: {e}")
+            return None
+        finally:
+            db.close()
+
+    def _write(self, key: str, status: str, product: Optional[Dict[str, Any]], host: Optional[str]) -> None:
+        now = datetime.now(timezone.utc)
+        ttl_hours = settings.openfoodfacts_cache_ttl_hours if status == FOUND else settings.openfoodfacts_negative_ttl_hours
+        db = SessionLocal()
+        try:
+            entry = db.query(BarcodeProductCacheEntry).filter(BarcodeProductCacheEntry.barcode == key).first()
+            if entry is None:
+                entry = BarcodeProductCacheEntry(barcode=key)
+                db.add(entry)
+            entry.found = status == FOUND
+            entry.product_json = json.dumps(_trim_product(product), ensure_ascii=False) if product else None
+            entry.source_host = host
+            entry.fetched_at = now
+            entry.expires_at = now + timedelta(hours=ttl_hours)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Barcode cache write failed for {key}: {e}")
+        finally:
+            db.close()
+
+    async def _refresh(self, key: str, code: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        status, product, host = await self.fetch(code)
+        if status != ERROR:
+            await asyncio.to_thread(self._write, key, status, product, host)
+        return status, _trim_product(product) if product else None
+
+    async def _single_flight(self, key: str, code: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        self._get_client()
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._refresh(key, code))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self._count("coalesced")
+        return await asyncio.shield(task)
+
+    def _revalidate(self, key: str, code: str):
+        if key in self._inflight:
+            return
+        self._count("revalidations")
+        task = asyncio.create_task(self._single_flight(key, code))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def get_product(self, code: str) -> Optional[Dict[str, Any]]:
+        key = canonical_gtin(code)
+        if not key:
+            return None
+
+        entry = await asyncio.to_thread(self._read, key)
+        now = datetime.now(timezone.utc)
+        if entry is not None:
+            if entry["expires_at"] > now:
+                self._count("fresh_hits" if entry["found"] else "negative_hits")
+                return entry["product"] if entry["found"] else None
+            if now - entry["expires_at"] < timedelta(hours=settings.openfoodfacts_stale_hours):
+                self._count("stale_hits")
+                self._revalidate(key, code)
+                return entry["product"] if entry["found"] else None
+
+        self._count("misses")
+        status, product = await self._single_flight(key, code)
+        if status == ERROR and entry is not None and entry["found"]:
+            return entry["product"]
+        return product
+
+
+openfoodfacts_service = OpenFoodFactsService()
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+from pathlib import PurePosixPath
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.services.storage import storage_service
+
+logger = logging.getLogger(__name__)
+
+
+PHOTO_SIZES = ("thumb", "medium", "original")
+PHOTO_SIZE_PATTERN = "^(thumb|medium|original)$"
+
+SIZE_COLUMNS = {
+    "thumb": "thumbnail_path",
+    "medium": "medium_path",
+}
+
+
+def variant_object_name(object_name: str, size: str, extension: Optional[str] = None) -> str:
+    path = PurePosixPath(object_name)
+    suffix = extension or path.suffix or ".jpg"
+    return str(path.with_name(f"{path.stem}_{size}{suffix}"))
+
+
+def is_stored_file(photo) -> bool:
+    return bool(photo.file_path) and photo.file_path != "manual" and photo.mime_type != "manual"
+
+
+def photo_path_for_size(photo, size: Optional[str]) -> Optional[str]:
+    if size == "thumb":
+        return photo.thumbnail_path or photo.medium_path or photo.file_path
+    if size == "medium":
+        return photo.medium_path or photo.file_path
+    return photo.file_path
+
+
+def photo_object_paths(photo) -> List[str]:
+    paths = [photo.file_path, photo.medium_path, photo.thumbnail_path]
+    return [path for path in paths if path and path != "manual" and not path.startswith("http")]
+
+
+def sized_url(url: str, size: Optional[str]) -> str:
+    if not size or size == "original":
+        return url
+    separator = "&" if "?" in url else "?"
+    return f"{url}{separator}size={size}"
+
+
+def meal_image_url(photo, size: Optional[str]) -> Optional[str]:
+    if not photo.file_path:
+        return None
+    if photo.file_path.startswith("http"):
+        return photo.file_path
+    if not is_stored_file(photo):
+        return f"{settings.api_domain}/api/v1/meals/photos/{photo.id}"
+    return sized_url(f"{settings.api_domain}/api/v1/meals/photos/{photo.id}", size)
+
+
+def progress_image_url(photo, size: Optional[str] = None) -> str:
+    return sized_url(f"{settings.api_domain}/api/v1/progress/photos/{photo.id}", size)
+
+
+def variant_paths(object_name: str, variants: Dict[str, bytes], extension: Optional[str] = None) -> Dict[str, str]:
+    return {size: variant_object_name(object_name, size, extension) for size in variants}
+
+
+def apply_variant_paths(photo, paths: Dict[str, str]) -> None:
+    for size, path in paths.items():
+        column = SIZE_COLUMNS.get(size)
+        if column:
+            setattr(photo, column, path)
+
+
+async def upload_photo_objects(objects: Dict[str, bytes], content_type: str) -> None:
+    await asyncio.gather(*(
+        storage_service.upload_file_async(
+            file_content=data,
+            object_name=object_name,
+            content_type=content_type,
+        )
+        for object_name, data in objects.items()
+    ))
+
+
+async def delete_photo_objects(paths: List[str]) -> None:
+    results = await asyncio.gather(
+        *(storage_service.delete_file_async(path) for path in paths),
+        return_exceptions=True,
+    )
+    for path, result in zip(paths, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Failed to delete photo object {path}: {result}")
+
+
+def delete_photo_objects_sync(paths: List[str]) -> None:
+    for path in paths:
+        try:
+            storage_service.delete_file(path)
+        except Exception as e:
+            logger.warning(f"Failed to delete photo object {path}: {e}")
@@ -1,6 +1,9 @@
+import asyncio
 import boto3
 from botocore.client import Config
 from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import BinaryIO, Optional
 import logging
 from pathlib import Path
@@ -20,9 +23,17 @@ class StorageService:
             aws_access_key_id=settings.yandex_storage_access_key,
             aws_secret_access_key=settings.yandex_storage_secret_key,
             region_name=settings.yandex_storage_region,
-            config=Config(signature_version='s3v4')
+            config=Config(
+                signature_version='s3v4',
+                max_pool_connections=settings.storage_max_connections,
+                s3={'addressing_style': settings.storage_addressing_style},
+            )
         )
         self.bucket_name = settings.yandex_storage_bucket_name
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.storage_max_connections,
+            thread_name_prefix="storage",
+        )
         self._ensure_bucket_exists()
     
     def _ensure_bucket_exists(self):
@@ -126,5 +137,29 @@ class StorageService:
         except ClientError as e:
             raise Exception(f"Failed to generate URL: {str(e)}")
 
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    async def upload_file_async(
+        self,
+        file_content: bytes,
+        object_name: str,
+        content_type: Optional[str] = None
+    ) -> str:
+        return await self._run(self.upload_file, file_content, object_name, content_type)
+
+    async def download_file_async(self, object_name: str) -> bytes:
+        return await self._run(self.download_file, object_name)
+
+    async def delete_file_async(self, object_name: str) -> bool:
+        return await self._run(self.delete_file, object_name)
+
+    async def file_exists_async(self, object_name: str) -> bool:
+        return await self._run(self.file_exists, object_name)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
 
 storage_service = StorageService()
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import event, func, or_, select, update
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.daily_nutrition import DailyNutrition
+from app.models.onboarding_data import OnboardingData
+from app.models.user import User
+from app.services.daily_nutrition import ROLLUP_USERS_KEY, local_date, user_today
+
+logger = logging.getLogger(__name__)
+
+
+HISTORY_PAGE_DAYS = 64
+
+
+def _as_date(value) -> Optional[date]:
+    if value is None:
+        return None
+    return value.date() if isinstance(value, datetime) else value
+
+
+def target_calories(connection, user_id: int) -> Optional[int]:
+    table = OnboardingData.__table__
+    return connection.execute(
+        select(table.c.target_calories)
+        .where(table.c.user_id == user_id, table.c.target_calories.isnot(None))
+        .order_by(table.c.id.desc())
+        .limit(1)
+    ).scalar()
+
+
+def achieved_days(connection, user_id: int, target: int, until: date) -> Iterable[date]:
+    table = DailyNutrition.__table__
+    before = until + timedelta(days=1)
+    while True:
+        days = connection.execute(
+            select(table.c.local_date)
+            .where(
+                table.c.user_id == user_id,
+                table.c.local_date < before,
+                table.c.calories >= target,
+            )
+            .order_by(table.c.local_date.desc())
+            .limit(HISTORY_PAGE_DAYS)
+        ).scalars().all()
+        yield from days
+        if len(days) < HISTORY_PAGE_DAYS:
+            return
+        before = days[-1]
+
+
+def compute_streak(connection, user_id: int, today: date) -> Optional[Tuple[int, Optional[date]]]:
+    target = target_calories(connection, user_id)
+    if not target or target <= 0:
+        return None
+
+    count = 0
+    last_day = None
+    expected = None
+    for day in achieved_days(connection, user_id, target, today):
+        if last_day is None:
+            last_day = day
+            if day < today - timedelta(days=1):
+                return 0, last_day
+        elif day != expected:
+            break
+        count += 1
+        expected = day - timedelta(days=1)
+    return count, last_day
+
+
+def current_streak(user: User) -> int:
+    last_day = _as_date(user.last_streak_date)
+    if not user.streak_count or last_day is None:
+        return 0
+    if last_day < user_today(user) - timedelta(days=1):
+        return 0
+    return user.streak_count
+
+
+def recompute_user(db, user: User) -> bool:
+    result = compute_streak(db.connection(), user.id, user_today(user))
+    if result is None:
+        count, last_day = current_streak(user), _as_date(user.last_streak_date)
+    else:
+        count, last_day = result
+    last_value = datetime.combine(last_day, datetime.min.time()) if last_day else None
+    if (user.streak_count or 0) == count and _as_date(user.last_streak_date) == last_day:
+        return False
+    user.streak_count = count
+    user.last_streak_date = last_value
+    return True
+
+
+@event.listens_for(SessionLocal, "after_flush_postexec")
+def _advance_streaks(session, flush_context):
+    user_ids = session.info.pop(ROLLUP_USERS_KEY, None)
+    if not user_ids:
+        return
+    for user_id in user_ids:
+        user = session.get(User, user_id)
+        if user is None:
+            continue
+        try:
+            recompute_user(session, user)
+        except Exception as e:
+            logger.warning(f"Streak update failed for user {user_id}: {e}")
+
+
+def expire_lapsed_streaks(db, now: Optional[datetime] = None) -> int:
+    now = now or datetime.now(timezone.utc)
+    table = User.__table__
+    offset = func.coalesce(table.c.tz_offset_minutes, 0)
+    offsets = db.execute(
+        select(offset.label("offset")).where(table.c.streak_count > 0).distinct()
+    ).scalars().all()
+
+    expired = 0
+    for minutes in offsets:
+        yesterday = local_date(now, minutes) - timedelta(days=1)
+        result = db.execute(
+            update(table)
+            .where(
+                table.c.streak_count > 0,
+                offset == minutes,
+                or_(
+                    table.c.last_streak_date.is_(None),
+                    table.c.last_streak_date < datetime.combine(yesterday, datetime.min.time()),
+                ),
+            )
+            .values(streak_count=0, data_version=table.c.data_version + 1)
+        )
+        expired += result.rowcount or 0
+    return expired
+
+
+class StreakSweeper:
+
+    def __init__(self, interval_minutes: int):
+        self.interval = max(0, interval_minutes) * 60
+        self._task: Optional[asyncio.Task] = None
+        self.last_run: Optional[datetime] = None
+        self.last_expired = 0
+
+    def _sweep(self) -> int:
+        db = SessionLocal()
+        try:
+            expired = expire_lapsed_streaks(db)
+            db.commit()
+            return expired
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def _run(self):
+        while True:
+            try:
+                self.last_expired = await asyncio.to_thread(self._sweep)
+                self.last_run = datetime.now(timezone.utc)
+                if self.last_expired:
+                    logger.info(f"Streak sweep reset {self.last_expired} lapsed streaks")
+            except Exception as e:
+                logger.warning(f"Streak sweep failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def start(self):
+        if self._task is None and self.interval:
+            self._task = asyncio.create_task(self._run(), name="streak-sweep")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "interval_seconds": self.interval,
+            "last_run": self.last_run.isoformat() if self.last_run else None,
+            "last_expired": self.last_expired,
+        }
+
+
+streak_sweeper = StreakSweeper(settings.streak_sweep_interval_minutes)
@@ -0,0 +1,116 @@
+import json
+from typing import Any, Dict, List, Tuple
+
+
+_SEEK = 0
+_KEY_WAIT = 1
+_KEY = 2
+_COLON = 3
+_VALUE_WAIT = 4
+_VALUE = 5
+_AFTER_VALUE = 6
+_DONE = 7
+
+
+class IncrementalJSONObjectParser:
+
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self._state = _SEEK
+        self._key: List[str] = []
+        self._value: List[str] = []
+        self._current_key = ""
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def done(self) -> bool:
+        return self._state == _DONE
+
+    def _finish_value(self, completed: List[Tuple[str, Any]]):
+        raw = "".join(self._value).strip()
+        self._value = []
+        try:
+            value = json.loads(raw)
+        except (json.JSONDecodeError, ValueError):
+            return
+        self.fields[self._current_key] = value
+        completed.append((self._current_key, value))
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        completed: List[Tuple[str, Any]] = []
+        for ch in chunk:
+            state = self._state
+            if state == _DONE:
+                break
+
+            if state == _SEEK:
+                if ch == "{":
+                    self._state = _KEY_WAIT
+            elif state == _KEY_WAIT:
+                if ch == '"':
+                    self._key = []
+                    self._escape = False
+                    self._state = _KEY
+                elif ch == "}":
+                    self._state = _DONE
+            elif state == _KEY:
+                if self._escape:
+                    self._key.append(ch)
+                    self._escape = False
+                elif ch == "\\":
+                    self._key.append(ch)
+                    self._escape = True
+                elif ch == '"':
+                    try:
+                        self._current_key = json.loads('"' + "".join(self._key) + '"')
+                    except (json.JSONDecodeError, ValueError):
+                        self._current_key = "".join(self._key)
+                    self._state = _COLON
+                else:
+                    self._key.append(ch)
+            elif state == _COLON:
+                if ch == ":":
+                    self._state = _VALUE_WAIT
+            elif state == _VALUE_WAIT:
+                if ch.isspace():
+                    continue
+                self._value = [ch]
+                self._depth = 1 if ch in "{[" else 0
+                self._in_string = ch == '"'
+                self._escape = False
+                self._state = _VALUE
+            elif state == _VALUE:
+                if self._in_string:
+                    self._value.append(ch)
+                    if self._escape:
+                        self._escape = False
+                    elif ch == "\\":
+                        self._escape = True
+                    elif ch == '"':
+                        self._in_string = False
+                        if self._depth == 0:
+                            self._finish_value(completed)
+                            self._state = _AFTER_VALUE
+                    continue
+                if self._depth == 0 and ch in ",}":
+                    self._finish_value(completed)
+                    self._state = _KEY_WAIT if ch == "," else _DONE
+                    continue
+                self._value.append(ch)
+                if ch == '"':
+                    self._in_string = True
+                elif ch in "{[":
+                    self._depth += 1
+                elif ch in "}]":
+                    self._depth -= 1
+                    if self._depth == 0:
+                        self._finish_value(completed)
+                        self._state = _AFTER_VALUE
+            elif state == _AFTER_VALUE:
+                if ch == ",":
+                    self._state = _KEY_WAIT
+                elif ch == "}":
+                    self._state = _DONE
+        return completed
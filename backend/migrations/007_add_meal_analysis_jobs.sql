@@ -0,0 +1,33 @@
+-- Migration: async meal analysis jobs
+-- Date: 2026-10-17
+
+CREATE TABLE IF NOT EXISTS meal_analysis_jobs (
+    id VARCHAR(36) PRIMARY KEY,
+    user_id INT NOT NULL,
+    meal_photo_id INT NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    error VARCHAR(500) NULL,
+    created_at DATETIME(6) NOT NULL,
+    started_at DATETIME(6) NULL,
+    finished_at DATETIME(6) NULL,
+    heartbeat_at DATETIME(6) NULL,
+
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    FOREIGN KEY (meal_photo_id) REFERENCES meal_photos(id) ON DELETE CASCADE,
+    INDEX ix_meal_analysis_jobs_user_id (user_id),
+    INDEX ix_meal_analysis_jobs_meal_photo_id (meal_photo_id),
+    INDEX ix_meal_analysis_jobs_user_status (user_id, status)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+SET @dbname = DATABASE();
+SET @preparedStatement = (SELECT IF(
+  (
+    SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE table_name = 'meal_photos' AND table_schema = @dbname AND column_name = 'analysis_status'
+  ) > 0,
+  'SELECT 1',
+  'ALTER TABLE meal_photos ADD COLUMN analysis_status VARCHAR(20) NULL'
+));
+PREPARE alterIfNotExists FROM @preparedStatement;
+EXECUTE alterIfNotExists;
+DEALLOCATE PREPARE alterIfNotExists;
@@ -0,0 +1,28 @@
+-- Migration: thumbnail/medium variants for meal and progress photos
+-- Date: 2026-10-17
+
+SET @dbname = DATABASE();
+
+SET @preparedStatement = (SELECT IF(
+  (
+    SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE table_name = 'meal_photos' AND table_schema = @dbname AND column_name = 'thumbnail_path'
+  ) > 0,
+  'SELECT 1',
+  'ALTER TABLE meal_photos ADD COLUMN thumbnail_path VARCHAR(500) NULL, ADD COLUMN medium_path VARCHAR(500) NULL'
+));
+PREPARE alterIfNotExists FROM @preparedStatement;
+EXECUTE alterIfNotExists;
+DEALLOCATE PREPARE alterIfNotExists;
+
+SET @preparedStatement = (SELECT IF(
+  (
+    SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE table_name = 'progress_photos' AND table_schema = @dbname AND column_name = 'thumbnail_path'
+  ) > 0,
+  'SELECT 1',
+  'ALTER TABLE progress_photos ADD COLUMN thumbnail_path VARCHAR(500) NULL, ADD COLUMN medium_path VARCHAR(500) NULL'
+));
+PREPARE alterIfNotExists FROM @preparedStatement;
+EXECUTE alterIfNotExists;
+DEALLOCATE PREPARE alterIfNotExists;
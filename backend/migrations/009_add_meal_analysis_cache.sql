@@ -0,0 +1,30 @@
+-- Migration: perceptual-hash cache of meal photo analysis results
+-- Date: 2026-10-17
+
+CREATE TABLE IF NOT EXISTS meal_analysis_cache (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    content_hash VARCHAR(64) NOT NULL,
+    dhash VARCHAR(16) NULL,
+    dhash_band0 INT NULL,
+    dhash_band1 INT NULL,
+    dhash_band2 INT NULL,
+    dhash_band3 INT NULL,
+    dhash_band4 INT NULL,
+    model VARCHAR(100) NOT NULL,
+    prompt_version VARCHAR(32) NOT NULL DEFAULT '',
+    hint VARCHAR(255) NOT NULL DEFAULT '',
+    result_json TEXT NOT NULL,
+    created_at DATETIME(6) NOT NULL,
+    last_used_at DATETIME(6) NOT NULL,
+
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    INDEX ix_meal_analysis_cache_content_hash (content_hash),
+    INDEX ix_meal_analysis_cache_user_content (user_id, content_hash),
+    INDEX ix_meal_analysis_cache_user_used (user_id, last_used_at),
+    INDEX ix_meal_analysis_cache_band0 (dhash_band0),
+    INDEX ix_meal_analysis_cache_band1 (dhash_band1),
+    INDEX ix_meal_analysis_cache_band2 (dhash_band2),
+    INDEX ix_meal_analysis_cache_band3 (dhash_band3),
+    INDEX ix_meal_analysis_cache_band4 (dhash_band4)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,15 @@
+-- Migration: streamed partial results for async meal analysis jobs
+-- Date: 2026-10-17
+
+SET @dbname = DATABASE();
+SET @preparedStatement = (SELECT IF(
+  (
+    SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE table_name = 'meal_analysis_jobs' AND table_schema = @dbname AND column_name = 'partial_result'
+  ) > 0,
+  'SELECT 1',
+  'ALTER TABLE meal_analysis_jobs ADD COLUMN partial_result TEXT NULL'
+));
+PREPARE alterIfNotExists FROM @preparedStatement;
+EXECUTE alterIfNotExists;
+DEALLOCATE PREPARE alterIfNotExists;
@@ -0,0 +1,13 @@
+-- Migration: persistent OpenFoodFacts product cache with negative entries
+-- Date: 2026-10-17
+
+CREATE TABLE IF NOT EXISTS barcode_product_cache (
+    barcode VARCHAR(14) NOT NULL PRIMARY KEY,
+    found TINYINT(1) NOT NULL DEFAULT 0,
+    product_json TEXT NULL,
+    source_host VARCHAR(255) NULL,
+    fetched_at DATETIME(6) NOT NULL,
+    expires_at DATETIME(6) NOT NULL,
+
+    INDEX ix_barcode_product_cache_expires (expires_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,21 @@
+-- Migration: local copy of the OpenFoodFacts dump for offline barcode lookup
+-- Date: 2026-10-17
+
+CREATE TABLE IF NOT EXISTS off_products (
+    code VARCHAR(14) NOT NULL PRIMARY KEY,
+    raw_code VARCHAR(32) NULL,
+    product_name VARCHAR(500) NULL,
+    generic_name VARCHAR(500) NULL,
+    brands VARCHAR(500) NULL,
+    calories DECIMAL(10, 3) NULL,
+    protein DECIMAL(10, 3) NULL,
+    fat DECIMAL(10, 3) NULL,
+    carbs DECIMAL(10, 3) NULL,
+    fiber DECIMAL(10, 3) NULL,
+    sugar DECIMAL(10, 3) NULL,
+    sodium DECIMAL(10, 3) NULL,
+    last_modified_t BIGINT NULL,
+    imported_at DATETIME(6) NOT NULL,
+
+    INDEX ix_off_products_last_modified_t (last_modified_t)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,21 @@
+-- Migration: per-barcode AI enrichment keyed by model and prompt version
+-- Date: 2026-10-17
+
+CREATE TABLE IF NOT EXISTS barcode_enrichments (
+    id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    barcode VARCHAR(14) NOT NULL,
+    model VARCHAR(100) NOT NULL,
+    prompt_version VARCHAR(32) NOT NULL,
+    input_hash VARCHAR(64) NOT NULL,
+    product_json TEXT NOT NULL,
+    fiber INT NULL,
+    sugar INT NULL,
+    sodium INT NULL,
+    health_score INT NULL,
+    created_at DATETIME(6) NOT NULL,
+    updated_at DATETIME(6) NOT NULL,
+
+    UNIQUE KEY uq_barcode_enrichments_key (barcode, model, prompt_version),
+    INDEX ix_barcode_enrichments_barcode (barcode),
+    INDEX ix_barcode_enrichments_version (model, prompt_version)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,52 @@
+-- Migration: per-user daily nutrition rollup maintained on every meal/water write
+-- Date: 2026-10-17
+-- The app fills it from history on start while the table is empty (app.services.daily_nutrition.backfill)
+
+SET @dbname = DATABASE();
+SET @preparedStatement = (SELECT IF(
+  (
+    SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE table_name = 'users' AND table_schema = @dbname AND column_name = 'tz_offset_minutes'
+  ) > 0,
+  'SELECT 1',
+  'ALTER TABLE users ADD COLUMN tz_offset_minutes INT NULL'
+));
+PREPARE alterIfNotExists FROM @preparedStatement;
+EXECUTE alterIfNotExists;
+DEALLOCATE PREPARE alterIfNotExists;
+
+-- Days before this local date still use the previous tz offset; a background
+-- task rebuilds them and clears it.
+SET @preparedStatement = (SELECT IF(
+  (
+    SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE table_name = 'users' AND table_schema = @dbname AND column_name = 'rollup_stale_before'
+  ) > 0,
+  'SELECT 1',
+  'ALTER TABLE users ADD COLUMN rollup_stale_before DATE NULL'
+));
+PREPARE alterIfNotExists FROM @preparedStatement;
+EXECUTE alterIfNotExists;
+DEALLOCATE PREPARE alterIfNotExists;
+
+CREATE TABLE IF NOT EXISTS daily_nutrition (
+    user_id INT NOT NULL,
+    local_date DATE NOT NULL,
+    calories INT NOT NULL DEFAULT 0,
+    protein INT NOT NULL DEFAULT 0,
+    fat INT NOT NULL DEFAULT 0,
+    carbs INT NOT NULL DEFAULT 0,
+    fiber INT NOT NULL DEFAULT 0,
+    sugar INT NOT NULL DEFAULT 0,
+    sodium INT NOT NULL DEFAULT 0,
+    meal_count INT NOT NULL DEFAULT 0,
+    named_meal_count INT NOT NULL DEFAULT 0,
+    named_calories INT NOT NULL DEFAULT 0,
+    health_score_sum DOUBLE NOT NULL DEFAULT 0,
+    health_score_count INT NOT NULL DEFAULT 0,
+    water_ml INT NOT NULL DEFAULT 0,
+    updated_at DATETIME(6) NULL,
+
+    PRIMARY KEY (user_id, local_date),
+    CONSTRAINT fk_daily_nutrition_user FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
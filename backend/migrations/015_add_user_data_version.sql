@@ -0,0 +1,15 @@
+-- Migration: per-user data version for ETag / If-None-Match on read endpoints
+-- Date: 2026-10-17
+
+SET @dbname = DATABASE();
+SET @preparedStatement = (SELECT IF(
+  (
+    SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE table_name = 'users' AND table_schema = @dbname AND column_name = 'data_version'
+  ) > 0,
+  'SELECT 1',
+  'ALTER TABLE users ADD COLUMN data_version BIGINT NOT NULL DEFAULT 0'
+));
+PREPARE alterIfNotExists FROM @preparedStatement;
+EXECUTE alterIfNotExists;
+DEALLOCATE PREPARE alterIfNotExists;
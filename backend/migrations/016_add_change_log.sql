@@ -0,0 +1,28 @@
+-- Migration: append-only change log behind GET /sync delta sync
+-- Date: 2026-10-17
+-- Existing meals, water, weight and badge rows are logged once as upserts so
+-- that a first sync from cursor 0 returns the full history.
+
+CREATE TABLE IF NOT EXISTS change_log (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    entity VARCHAR(20) NOT NULL,
+    entity_id INT NOT NULL,
+    op VARCHAR(10) NOT NULL,
+    created_at DATETIME(6) NOT NULL,
+
+    INDEX ix_change_log_user_id_id (user_id, id),
+    CONSTRAINT fk_change_log_user FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+INSERT INTO change_log (user_id, entity, entity_id, op, created_at)
+SELECT user_id, 'meal', id, 'upsert', NOW(6) FROM meal_photos ORDER BY id;
+
+INSERT INTO change_log (user_id, entity, entity_id, op, created_at)
+SELECT user_id, 'water', id, 'upsert', NOW(6) FROM water_logs ORDER BY id;
+
+INSERT INTO change_log (user_id, entity, entity_id, op, created_at)
+SELECT user_id, 'weight', id, 'upsert', NOW(6) FROM weight_logs ORDER BY id;
+
+INSERT INTO change_log (user_id, entity, entity_id, op, created_at)
+SELECT user_id, 'badge', id, 'upsert', NOW(6) FROM user_badges ORDER BY id;
@@ -0,0 +1,41 @@
+-- Migration: client-supplied ids for de-duplicating offline batch writes (POST /sync/batch)
+-- Date: 2026-10-17
+
+SET @dbname = DATABASE();
+SET @preparedStatement = (SELECT IF(
+  (
+    SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE table_name = 'meal_photos' AND table_schema = @dbname AND column_name = 'client_id'
+  ) > 0,
+  'SELECT 1',
+  'ALTER TABLE meal_photos ADD COLUMN client_id VARCHAR(64) NULL, ADD UNIQUE INDEX uq_meal_photos_user_client (user_id, client_id)'
+));
+PREPARE alterIfNotExists FROM @preparedStatement;
+EXECUTE alterIfNotExists;
+DEALLOCATE PREPARE alterIfNotExists;
+
+SET @dbname = DATABASE();
+SET @preparedStatement = (SELECT IF(
+  (
+    SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE table_name = 'water_logs' AND table_schema = @dbname AND column_name = 'client_id'
+  ) > 0,
+  'SELECT 1',
+  'ALTER TABLE water_logs ADD COLUMN client_id VARCHAR(64) NULL, ADD UNIQUE INDEX uq_water_logs_user_client (user_id, client_id)'
+));
+PREPARE alterIfNotExists FROM @preparedStatement;
+EXECUTE alterIfNotExists;
+DEALLOCATE PREPARE alterIfNotExists;
+
+SET @dbname = DATABASE();
+SET @preparedStatement = (SELECT IF(
+  (
+    SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE table_name = 'weight_logs' AND table_schema = @dbname AND column_name = 'client_id'
+  ) > 0,
+  'SELECT 1',
+  'ALTER TABLE weight_logs ADD COLUMN client_id VARCHAR(64) NULL, ADD UNIQUE INDEX uq_weight_logs_user_client (user_id, client_id)'
+));
+PREPARE alterIfNotExists FROM @preparedStatement;
+EXECUTE alterIfNotExists;
+DEALLOCATE PREPARE alterIfNotExists;
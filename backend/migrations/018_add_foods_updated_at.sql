@@ -0,0 +1,17 @@
+-- Migration: foods.updated_at for incremental refresh of the in-process food search index
+-- Date: 2026-10-17
+-- MySQL maintains the column itself (ON UPDATE), so translate_foods.py and
+-- re-imports need no changes; new rows are picked up by fdc_id.
+
+SET @dbname = DATABASE();
+SET @preparedStatement = (SELECT IF(
+  (
+    SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE table_name = 'foods' AND table_schema = @dbname AND column_name = 'updated_at'
+  ) > 0,
+  'SELECT 1',
+  'ALTER TABLE foods ADD COLUMN updated_at DATETIME NULL DEFAULT NULL ON UPDATE CURRENT_TIMESTAMP, ADD INDEX ix_foods_updated_at (updated_at)'
+));
+PREPARE alterIfNotExists FROM @preparedStatement;
+EXECUTE alterIfNotExists;
+DEALLOCATE PREPARE alterIfNotExists;
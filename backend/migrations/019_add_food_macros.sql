@@ -0,0 +1,24 @@
+-- Migration: denormalized food_macros read by /foods, /foods/search and /foods/{fdc_id}
+-- Date: 2026-10-17
+-- One row per food with the NUTRIENT_MAP nutrients and branded serving info,
+-- so the endpoints no longer read food_nutrients. Fill it after applying:
+--   python3 scripts/import_fooddata.py --macros-only
+-- Until then the API pivots food_nutrients for foods without a row.
+
+CREATE TABLE IF NOT EXISTS food_macros (
+    fdc_id INT PRIMARY KEY,
+    calories DECIMAL(12, 4),
+    protein DECIMAL(12, 4),
+    fat DECIMAL(12, 4),
+    carbs DECIMAL(12, 4),
+    fiber DECIMAL(12, 4),
+    calcium DECIMAL(12, 4),
+    iron DECIMAL(12, 4),
+    sodium DECIMAL(12, 4),
+    brand_owner VARCHAR(255),
+    serving_size DECIMAL(10, 2),
+    serving_size_unit VARCHAR(50),
+    updated_at DATETIME NULL,
+
+    CONSTRAINT fk_food_macros_food FOREIGN KEY (fdc_id) REFERENCES foods(fdc_id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
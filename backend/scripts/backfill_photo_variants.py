@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Генерация thumbnail/medium вариантов для уже загруженных фото еды и прогресса.
+
+Обрабатывает фото без thumbnail_path/medium_path пачками: скачивает оригинал,
+строит варианты и загружает их в S3 параллельно (пул потоков), затем
+обновляет пути в БД одним коммитом на пачку. Повторный запуск продолжает
+с того места, где остановился (обработанные фото уже имеют пути).
+
+Запуск: python3 scripts/backfill_photo_variants.py --kind all --workers 16
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import SessionLocal
+from app.models.meal_photo import MealPhoto
+from app.models.progress_photo import ProgressPhoto
+from app.services.image_processing import PIL_AVAILABLE, ImageDecodeError, build_variants, output_format
+from app.services.photo_variants import SIZE_COLUMNS, variant_paths
+from app.services.storage import storage_service
+
+MODELS = {
+    "meal": MealPhoto,
+    "progress": ProgressPhoto,
+}
+
+
+def pending_query(db, model):
+    return db.query(model.id, model.file_path).filter(
+        model.thumbnail_path.is_(None),
+        model.file_path.isnot(None),
+        model.file_path != "manual",
+        model.mime_type != "manual",
+        ~model.file_path.like("http%"),
+    )
+
+
+def process_photo(photo_id, file_path, dry_run):
+    original = storage_service.download_file(file_path)
+    variants = build_variants(original)
+    if not variants:
+        return photo_id, None
+    _, content_type, extension = output_format()
+    paths = variant_paths(file_path, variants, extension)
+    if not dry_run:
+        for size, data in variants.items():
+            storage_service.upload_file(data, paths[size], content_type)
+    return photo_id, paths
+
+
+def backfill(kind, workers, batch_size, limit, dry_run):
+    model = MODELS[kind]
+    processed = 0
+    failed = 0
+    last_id = 0
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="backfill") as executor:
+        while limit is None or processed + failed < limit:
+            db = SessionLocal()
+            try:
+                size = batch_size if limit is None else min(batch_size, limit - processed - failed)
+                rows = (
+                    pending_query(db, model)
+                    .filter(model.id > last_id)
+                    .order_by(model.id)
+                    .limit(size)
+                    .all()
+                )
+                if not rows:
+                    break
+                last_id = rows[-1].id
+
+                futures = [
+                    executor.submit(process_photo, row.id, row.file_path, dry_run)
+                    for row in rows
+                ]
+                updates = []
+                for row, future in zip(rows, futures):
+                    try:
+                        photo_id, paths = future.result()
+                    except ImageDecodeError as e:
+                        failed += 1
+                        print(f"  [{kind} {row.id}] не удалось декодировать: {e}")
+                        continue
+                    except Exception as e:
+                        failed += 1
+                        print(f"  [{kind} {row.id}] ошибка: {e}")
+                        continue
+                    if paths:
+                        values = {SIZE_COLUMNS[size]: path for size, path in paths.items()}
+                        values["id"] = photo_id
+                        updates.append(values)
+                    processed += 1
+
+                if updates and not dry_run:
+                    db.bulk_update_mappings(model, updates)
+                    db.commit()
+            finally:
+                db.close()
+
+            elapsed = time.perf_counter() - started
+            rate = processed / elapsed if elapsed else 0
+            print(f"[{kind}] обработано {processed}, ошибок {failed}, {rate:.1f} фото/с")
+
+    return processed, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill thumbnail/medium photo variants")
+    parser.add_argument("--kind", choices=["meal", "progress", "all"], default="all")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--dry-run", action="store_true", help="Только построить варианты, без записи в S3 и БД")
+    args = parser.parse_args()
+
+    if not PIL_AVAILABLE:
+        print("❌ Pillow не установлен: pip install Pillow pillow-heif")
+        sys.exit(1)
+
+    kinds = ["meal", "progress"] if args.kind == "all" else [args.kind]
+    try:
+        for kind in kinds:
+            processed, failed = backfill(kind, max(1, args.workers), max(1, args.batch_size), args.limit, args.dry_run)
+            print(f"✅ {kind}: {processed} фото, {failed} ошибок")
+    finally:
+        storage_service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Регрессионный бенчмарк запросов к Claude: время до первого токена (TTFT)
+и размер тела запроса для анализа фото еды, потокового анализа и рецептов.
+
+Поднимает локальный Anthropic (scripts/fake_anthropic_server.py), который
+учитывает prompt caching и добавляет задержку за каждый незакэшированный
+входной токен, и гоняет через ai_service два прохода: с кэшированием
+статических промптов и без. Для прохода с кэшированием проверяет, что:
+  - p95 TTFT потокового анализа не превышает --max-ttft-ms
+  - максимальный размер тела запроса не превышает --max-payload-kb
+  - после первого запроса статический префикс читается из кэша
+Заглушка кэширует префикс только от минимальной длины модели
+(как настоящий API); префиксы короче выводятся предупреждением —
+в продакшене кэширование для них не срабатывает.
+
+Код выхода 1, если бюджет превышен.
+
+Запуск: python3 scripts/bench_ai_prompts.py --iterations 20 --max-ttft-ms 300
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_anthropic_server import start_in_thread
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def sample_photo():
+    from PIL import Image, ImageDraw
+
+    img = Image.new("RGB", (3024, 4032), (236, 228, 214))
+    draw = ImageDraw.Draw(img)
+    draw.ellipse((400, 900, 2600, 3100), fill=(250, 250, 250), outline=(180, 170, 160), width=30)
+    for i in range(60):
+        x = 700 + (i * 97) % 1500
+        y = 1200 + (i * 151) % 1500
+        draw.ellipse((x, y, x + 220, y + 160), fill=(200 - i, 120 + i % 60, 40 + i % 90))
+    buffer = io.BytesIO()
+    img.save(buffer, "JPEG", quality=92)
+    return buffer.getvalue()
+
+
+async def run_pass(ai_service, image_bytes, media_type, iterations):
+    async def on_field(key, value):
+        pass
+
+    ai_service._recent_calls.clear()
+    ai_service._usage.clear()
+    for i in range(iterations):
+        await ai_service.analyze_meal_image_stream(image_bytes, media_type, None, on_field)
+        await ai_service.analyze_meal_image(image_bytes, media_type, None)
+        await ai_service.generate_recipe(f"Завтрак на {300 + i * 10} ккал")
+    return ai_service.recent_calls()
+
+
+def summarize(label, records):
+    streamed = [r for r in records if r.streamed]
+    ttft = [r.ttft_ms for r in streamed]
+    warm = records[3:]
+    prompt_tokens = sum(r.input_tokens + r.cache_creation_input_tokens + r.cache_read_input_tokens for r in warm)
+    cache_read = sum(r.cache_read_input_tokens for r in warm)
+    by_operation = {}
+    for record in records:
+        by_operation.setdefault(record.operation, []).append(record)
+
+    print(f"\n== {label}")
+    print(f"{'operation':26} {'calls':>6} {'payload KB':>11} {'latency p50':>12} {'input':>7} {'cache_w':>8} {'cache_r':>8} {'output':>7}")
+    for operation, items in by_operation.items():
+        print(
+            f"{operation:26} {len(items):6} {max(r.request_bytes for r in items) / 1024:11.1f} "
+            f"{statistics.median(r.latency_ms for r in items):10.1f}ms "
+            f"{sum(r.input_tokens for r in items) // len(items):7} "
+            f"{sum(r.cache_creation_input_tokens for r in items) // len(items):8} "
+            f"{sum(r.cache_read_input_tokens for r in items) // len(items):8} "
+            f"{sum(r.output_tokens for r in items) // len(items):7}"
+        )
+    print(f"stream TTFT p50={percentile(ttft, 50):.1f}ms p95={percentile(ttft, 95):.1f}ms")
+    print(f"warm cache read ratio: {cache_read / prompt_tokens:.2%}" if prompt_tokens else "warm cache read ratio: n/a")
+    return {
+        "ttft_p95": percentile(ttft, 95),
+        "max_payload": max(r.request_bytes for r in records),
+        "warm_cache_read": cache_read,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TTFT and payload size of AI prompts")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--latency-ms", type=int, default=40, help="Fake server base latency")
+    parser.add_argument("--prefill-us-per-token", type=int, default=50)
+    parser.add_argument("--chunk-delay-ms", type=int, default=5)
+    parser.add_argument("--max-ttft-ms", type=float, default=300.0)
+    parser.add_argument("--max-payload-kb", type=float, default=400.0)
+    parser.add_argument("--min-cache-tokens", type=int, help="Override the model's minimum cacheable prefix")
+    args = parser.parse_args()
+
+    server = start_in_thread(
+        latency_ms=args.latency_ms,
+        prefill_us_per_token=args.prefill_us_per_token,
+        chunk_delay_ms=args.chunk_delay_ms,
+        min_cache_tokens=args.min_cache_tokens,
+    )
+    os.environ["ANTHROPIC_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ.setdefault("ANTHROPIC_API_KEY", "sk-ant-bench")
+
+    from app.core.config import settings
+    from app.services.ai_service import ai_service
+    from app.services.image_processing import normalize_image
+
+    settings.anthropic_base_url = os.environ["ANTHROPIC_BASE_URL"]
+    ai_service.api_key = ai_service.api_key or os.environ["ANTHROPIC_API_KEY"]
+
+    normalized = normalize_image(sample_photo())
+    if normalized is None:
+        print("❌ Pillow is required to build the sample photo")
+        sys.exit(1)
+    image_bytes = normalized.ai_data or normalized.data
+    media_type = normalized.ai_content_type or normalized.content_type
+    print(f"Sample photo sent to AI: {len(image_bytes) / 1024:.1f} KB ({media_type})")
+
+    async def run():
+        results = {}
+        for caching in (False, True):
+            settings.anthropic_prompt_caching = caching
+            records = await run_pass(ai_service, image_bytes, media_type, args.iterations)
+            results[caching] = summarize("prompt caching " + ("on" if caching else "off"), records)
+        await ai_service.close()
+        return results
+
+    results = asyncio.run(run())
+    server.shutdown()
+
+    prefixes = {}
+    for entry in server.handler.log.snapshot():
+        if entry["prefix_tokens"]:
+            prefixes[entry["tool"]] = (entry["prefix_tokens"], entry["min_cache_tokens"])
+    uncacheable = {tool: sizes for tool, sizes in prefixes.items() if sizes[0] < sizes[1]}
+
+    cached = results[True]
+    failures = []
+    if cached["ttft_p95"] > args.max_ttft_ms:
+        failures.append(f"stream TTFT p95 {cached['ttft_p95']:.1f}ms > {args.max_ttft_ms}ms")
+    if cached["max_payload"] > args.max_payload_kb * 1024:
+        failures.append(f"payload {cached['max_payload'] / 1024:.1f}KB > {args.max_payload_kb}KB")
+    if len(uncacheable) < len(prefixes) and not cached["warm_cache_read"]:
+        failures.append("static prompt prefix was never read from cache")
+
+    print()
+    for tool, (tokens, minimum) in uncacheable.items():
+        print(f"⚠️  {tool}: cached prefix ~{tokens} tokens is below the model minimum {minimum}, "
+              "the API will not cache it")
+    print(f"TTFT p95 with caching: {cached['ttft_p95']:.1f}ms (without: {results[False]['ttft_p95']:.1f}ms)")
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ TTFT and payload size within budget")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
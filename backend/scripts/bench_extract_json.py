@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Микро-бенчмарк извлечения JSON из ответов Claude:
+старый regex (re.findall(r"\\{.*\\}", DOTALL) + json.loads) против
+линейного сканера со счётчиком скобок (_extract_json).
+
+Прогоняет корпус scripts/fixtures/ai_outputs.json, длинные «болтливые»
+ответы и патологические входы (много незакрытых скобок).
+
+Запуск: python3 scripts/bench_extract_json.py --repeat 2000
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.ai_service import _extract_json
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "ai_outputs.json")
+
+
+def legacy_extract_json(text):
+    if not text:
+        return None
+    try:
+        matches = re.findall(r"\{.*\}", text, flags=re.DOTALL)
+        for match in matches:
+            try:
+                return json.loads(match)
+            except json.JSONDecodeError:
+                continue
+    except Exception:
+        pass
+    return None
+
+
+def timed(func, inputs, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text in inputs:
+            func(text)
+    return (time.perf_counter() - started) / (repeat * len(inputs)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark AI JSON extraction")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        corpus = json.load(f)
+    texts = [sample["text"] for sample in corpus]
+    expected = [sample["expected"] for sample in corpus]
+
+    chatty = [
+        "Let me think about this {carefully}. " * 200 + text + " Hope this helps {!}" * 200
+        for text in texts
+    ]
+    pathological = ["{" * n + "x" * n for n in (1_000, 4_000)]
+
+    scenarios = [
+        ("corpus", texts, expected, args.repeat),
+        ("chatty (long prose around JSON)", chatty, expected, max(1, args.repeat // 20)),
+        ("pathological (unclosed braces)", pathological, [None] * len(pathological), 1),
+    ]
+
+    print(f"{'scenario':36} {'legacy µs':>12} {'linear µs':>12} {'speedup':>9} {'legacy ok':>10} {'linear ok':>10}")
+    for name, inputs, wanted, repeat in scenarios:
+        legacy = timed(legacy_extract_json, inputs, repeat)
+        linear = timed(_extract_json, inputs, repeat)
+        legacy_ok = sum(1 for text, want in zip(inputs, wanted) if legacy_extract_json(text) == want)
+        linear_ok = sum(1 for text, want in zip(inputs, wanted) if _extract_json(text) == want)
+        print(
+            f"{name:36} {legacy:12.1f} {linear:12.1f} {legacy / linear:8.1f}x "
+            f"{legacy_ok:>6}/{len(inputs):<3} {linear_ok:>6}/{len(inputs):<3}"
+        )
+
+
+if __name__ == "__main__":
+    main()
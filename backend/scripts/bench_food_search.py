@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк поиска продуктов: старый SQL-запрос /foods/search (ILIKE '%term%' +
+FULLTEXT + count() + OFFSET), текущий SQL-путь (FULLTEXT по релевантности с
+keyset-курсором и total до 1000, app/services/food_search.py) и триграммный
+индекс в памяти (app/services/food_search_index.py) с догрузкой страницы из БД
+по fdc_id.
+
+Работает с базой из настроек (.env, DB_*), т.е. с реальным датасетом USDA.
+Запросы — встроенный список частых продуктов на en/ru/uz плюс --sample
+случайных слов из самих описаний. Печатает p50/p99 для обоих путей и
+совпадение total.
+
+Запуск: python3 scripts/bench_food_search.py --sample 200
+        python3 scripts/bench_food_search.py --snapshot /var/lib/caloriesapp/food_index.pkl --save-snapshot
+"""
+
+import argparse
+import os
+import random
+import resource
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import bindparam, func, or_, text
+from sqlalchemy.orm import joinedload
+
+from app.core.database import SessionLocal
+from app.models.food import Food
+from app.services.food_search import fulltext_search
+from app.services.food_search_index import SOURCE_TYPES, FoodSearchIndex
+
+DEFAULT_QUERIES = [
+    ("chicken", "en"), ("chicken breast", "en"), ("rice", "en"), ("apple", "en"), ("milk", "en"),
+    ("cheddar cheese", "en"), ("yogurt", "en"), ("bread", "en"), ("egg", "en"), ("banana", "en"),
+    ("курица", "ru"), ("рис", "ru"), ("молоко", "ru"), ("сыр", "ru"), ("яблоко", "ru"),
+    ("tovuq", "uz"), ("guruch", "uz"), ("sut", "uz"), ("non", "uz"), ("olma", "uz"),
+]
+
+LANG_COLUMNS = {"ru": Food.description_ru, "uz": Food.description_uz}
+
+
+def legacy_search(db, term, lang, source, limit, offset):
+    query = db.query(Food)
+    if source in SOURCE_TYPES:
+        query = query.filter(Food.data_type.in_(SOURCE_TYPES[source]))
+    search_term = term.strip().lower()
+    pattern = f"%{search_term}%"
+    if lang in LANG_COLUMNS:
+        query = query.filter(or_(LANG_COLUMNS[lang].ilike(pattern), Food.description.ilike(pattern)))
+    else:
+        match = text("MATCH(description) AGAINST(:term IN BOOLEAN MODE)").bindparams(bindparam("term", search_term))
+        query = query.filter(or_(Food.description.ilike(pattern), match))
+    total = query.count()
+    foods = query.order_by(Food.description).offset(offset).limit(limit).all()
+    return [food.fdc_id for food in foods], total
+
+
+def indexed_search(db, index, term, lang, source, limit, offset):
+    result = index.search(term, lang, source, limit, offset)
+    if result is None:
+        return None
+    fdc_ids, total, _ = result
+    if fdc_ids:
+        db.query(Food).options(joinedload(Food.macros)).filter(Food.fdc_id.in_(fdc_ids)).all()
+    return fdc_ids, total
+
+
+def sample_queries(db, count, seed):
+    rng = random.Random(seed)
+    max_id = db.query(func.max(Food.fdc_id)).scalar() or 0
+    queries = []
+    attempts = 0
+    while len(queries) < count and attempts < count * 20:
+        attempts += 1
+        food = db.query(Food).filter(Food.fdc_id >= rng.randint(0, max_id)).order_by(Food.fdc_id).first()
+        if food is None:
+            continue
+        lang = rng.choice(["en", "ru", "uz"])
+        description = food.get_name(lang)
+        words = [w for w in description.replace(",", " ").split() if len(w) >= 3 and w.isalpha()]
+        if words:
+            queries.append((rng.choice(words).lower(), lang if description != food.description else "en"))
+    return queries
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def report(name, samples):
+    print(f"  {name:8} p50 {statistics.median(samples):9.2f} мс   p99 {percentile(samples, 0.99):9.2f} мс   max {max(samples):9.2f} мс")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /foods/search: SQL ILIKE/FULLTEXT vs in-process trigram index")
+    parser.add_argument("--sample", type=int, default=100, help="Random words taken from descriptions")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--source", default="all", choices=["all", "foundation", "branded", "survey"])
+    parser.add_argument("--snapshot", help="Load the index from this snapshot instead of building it")
+    parser.add_argument("--save-snapshot", action="store_true", help="Write the built index to --snapshot")
+    parser.add_argument("--index-only", action="store_true", help="Skip the SQL path")
+    args = parser.parse_args()
+
+    index = FoodSearchIndex(enabled=True, snapshot_path=args.snapshot or "", refresh_seconds=0)
+    started = time.perf_counter()
+    if args.snapshot and not args.save_snapshot and index.load_snapshot():
+        print(f"📦 Индекс загружен из {args.snapshot}: {time.perf_counter() - started:.1f} с")
+    else:
+        index.build()
+        print(f"🔨 Индекс построен: {time.perf_counter() - started:.1f} с")
+        if args.save_snapshot and args.snapshot:
+            index.save_snapshot()
+            print(f"💾 Снимок сохранён в {args.snapshot}")
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    stats = index.stats()
+    print(f"   {stats['foods']:,} продуктов, триграмм {stats['trigrams']}, пик RSS {rss_mb:,.0f} МБ")
+
+    db = SessionLocal()
+    try:
+        queries = DEFAULT_QUERIES + sample_queries(db, args.sample, args.seed)
+        sql_ms, fulltext_ms, index_ms = [], [], []
+        same_total = compared = skipped = 0
+        for term, lang in queries:
+            t0 = time.perf_counter()
+            result = indexed_search(db, index, term, lang, args.source, args.limit, 0)
+            if result is None:
+                skipped += 1
+                continue
+            index_ms.append((time.perf_counter() - t0) * 1000)
+            index_total = result[1]
+            if args.index_only:
+                continue
+            t0 = time.perf_counter()
+            _, sql_total = legacy_search(db, term, lang, args.source, args.limit, 0)
+            sql_ms.append((time.perf_counter() - t0) * 1000)
+            t0 = time.perf_counter()
+            fulltext_search(db, term, lang, args.source, args.limit)
+            fulltext_ms.append((time.perf_counter() - t0) * 1000)
+            compared += 1
+            same_total += index_total == sql_total
+    finally:
+        db.close()
+
+    print(f"\n{len(index_ms)} запросов, source={args.source}, limit={args.limit}" + (f", пропущено {skipped}" if skipped else ""))
+    if sql_ms:
+        report("SQL", sql_ms)
+        report("FULLTEXT", fulltext_ms)
+    report("индекс", index_ms)
+    if compared:
+        print(f"  total совпал в {same_total}/{compared} запросах (для фраз из нескольких слов старый FULLTEXT находит любое из слов, индекс — все)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк исправления опечаток в поиске продуктов (app/services/food_spelling.py).
+
+Словари строятся из foods.description / description_ru / description_uz базы
+из настроек (.env, DB_*). Из словаря выбираются слова (чаще — частые), в них
+вносится 1 или 2 случайные правки (вставка, удаление, замена, перестановка
+соседних букв), после чего проверяется, вернёт ли correct_query исходное
+слово (recall@1), и меряется время на запрос (p50/p99).
+
+Запуск: python3 scripts/bench_food_spelling.py --sample 2000
+        python3 scripts/bench_food_spelling.py --lang ru --double 0.5
+"""
+
+import argparse
+import os
+import random
+import resource
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.food_spelling import FoodSpelling
+
+EXAMPLES = [("chiken", "en"), ("bananna", "en"), ("yougurt", "en"), ("brocoli", "en"), ("курциа", "ru"), ("малоко", "ru")]
+
+
+def typo(word, edits, alphabet, rng):
+    for _ in range(edits):
+        position = rng.randrange(len(word))
+        kind = rng.choice(("insert", "delete", "replace", "transpose"))
+        if kind == "insert":
+            word = word[:position] + rng.choice(alphabet) + word[position:]
+        elif kind == "delete" and len(word) > 3:
+            word = word[:position] + word[position + 1:]
+        elif kind == "transpose" and position + 1 < len(word):
+            word = word[:position] + word[position + 1] + word[position] + word[position + 2:]
+        else:
+            word = word[:position] + rng.choice(alphabet) + word[position + 1:]
+    return word
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark recall and latency of food search typo correction")
+    parser.add_argument("--sample", type=int, default=1000, help="Misspelled words per language")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--double", type=float, default=0.2, help="Share of words with two edits (only words longer than 4)")
+    parser.add_argument("--lang", choices=["all", "en", "ru", "uz"], default="all")
+    args = parser.parse_args()
+
+    spelling = FoodSpelling(enabled=True, refresh_seconds=0)
+    started = time.perf_counter()
+    spelling.build()
+    stats = spelling.stats()
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"🔨 Словари построены: {time.perf_counter() - started:.1f} с, слов {stats['words']}, "
+          f"ключей удалений {stats['delete_keys']}, {stats['memory_mb']} МБ, пик RSS {rss_mb:,.0f} МБ")
+
+    print("\nПримеры:")
+    for term, lang in EXAMPLES:
+        print(f"  {term!r:12} [{lang}] → {spelling.correct_query(term, lang)!r}")
+
+    rng = random.Random(args.seed)
+    for lang in (["en", "ru", "uz"] if args.lang == "all" else [args.lang]):
+        vocabulary = spelling.vocabularies[lang]
+        pairs = [(word, count) for word, count in zip(vocabulary.words, vocabulary.counts) if len(word) >= 4]
+        if not pairs:
+            print(f"\n[{lang}] словарь пуст")
+            continue
+        words, weights = zip(*pairs)
+        alphabet = sorted(set("".join(words)))
+        recalled = corrected = skipped = 0
+        latencies = []
+        for word in rng.choices(words, weights=weights, k=args.sample):
+            edits = 2 if len(word) > 4 and rng.random() < args.double else 1
+            misspelled = typo(word, edits, alphabet, rng)
+            if misspelled == word or vocabulary.known(misspelled):
+                skipped += 1
+                continue
+            t0 = time.perf_counter()
+            result = spelling.correct_query(misspelled, lang)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            corrected += result is not None
+            recalled += result == word
+        if not latencies:
+            continue
+        checked = len(latencies)
+        print(f"\n[{lang}] {checked} слов с опечатками (пропущено {skipped}, совпавших со словарём)")
+        print(f"  recall@1 {recalled / checked:6.1%}   исправлено хоть во что-то {corrected / checked:6.1%}")
+        print(f"  p50 {statistics.median(latencies):.3f} мс   p99 {percentile(latencies, 0.99):.3f} мс   max {max(latencies):.3f} мс")
+
+
+if __name__ == "__main__":
+    main()
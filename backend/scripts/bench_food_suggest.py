@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк автодополнения /foods/suggest (app/services/food_suggest.py).
+
+Индекс строится из foods и meal_photos базы из настроек (.env, DB_*). Префиксы
+длиной 1..--max-length берутся из начала случайных названий (как при наборе
+по буквам); для каждой длины печатаются p50/p99 и доля запросов сверх
+бюджета 5 мс.
+
+Запуск: python3 scripts/bench_food_suggest.py --sample 500
+        python3 scripts/bench_food_suggest.py --lang ru --limit 10
+"""
+
+import argparse
+import os
+import random
+import resource
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.food_suggest import BUDGET_MS, FoodSuggest
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /foods/suggest prefix lookups")
+    parser.add_argument("--sample", type=int, default=500, help="Names whose prefixes are typed")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--max-length", type=int, default=8)
+    parser.add_argument("--lang", choices=["en", "ru", "uz"], default="en")
+    args = parser.parse_args()
+
+    suggest = FoodSuggest(enabled=True, refresh_seconds=0)
+    started = time.perf_counter()
+    suggest.build()
+    stats = suggest.stats()
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"🔨 Индекс построен: {time.perf_counter() - started:.1f} с, названий {stats['names']}, "
+          f"кэшированных префиксов {stats['cached_prefixes']}, пик RSS {rss_mb:,.0f} МБ")
+
+    index = suggest.indexes[args.lang]
+    if not len(index.keys):
+        print(f"❌ Нет названий для языка {args.lang}")
+        sys.exit(1)
+    rng = random.Random(args.seed)
+    names = [index.names[rng.randrange(len(index.keys))] for _ in range(args.sample)]
+
+    print(f"\nlang={args.lang}, limit={args.limit}, {args.sample} названий")
+    for length in range(1, args.max_length + 1):
+        latencies = []
+        for name in names:
+            if len(name) < length:
+                continue
+            t0 = time.perf_counter()
+            suggest.suggest(name[:length], args.lang, args.limit)
+            latencies.append((time.perf_counter() - t0) * 1000)
+        if not latencies:
+            continue
+        over = sum(1 for ms in latencies if ms > BUDGET_MS) / len(latencies)
+        print(f"  {length} симв.  p50 {statistics.median(latencies):7.3f} мс   p99 {percentile(latencies, 0.99):7.3f} мс   "
+              f"max {max(latencies):7.3f} мс   > {BUDGET_MS:g} мс: {over:.1%}")
+
+
+if __name__ == "__main__":
+    main()
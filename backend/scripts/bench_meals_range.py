@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк группировки приёмов пищи по дням за год.
+
+1) В памяти: синтетическая история (--meals-per-day за --days дней) группируется
+   старым способом /meals/daily/batch (для каждого фото перебор всех диапазонов дат,
+   O(фото × даты)) и новым /meals/range (индекс дня считается арифметически из
+   смещения часового пояса, O(фото)).
+2) По HTTP (если задан --app-url): /meals/range за год в полном режиме и
+   с aggregate_only=true против 12 запросов /meals/daily/batch по 31 дате.
+
+Запуск: python3 scripts/bench_meals_range.py --days 365 --meals-per-day 5
+        python3 scripts/bench_meals_range.py --app-url http://127.0.0.1:8000 --user-id 42
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from collections import namedtuple
+from datetime import date, datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.meal_range import iter_day_summaries
+from app.utils.date_utils import get_day_range_utc
+
+Meal = namedtuple("Meal", "created_at calories protein fat carbs fiber sugar sodium health_score")
+
+
+def synthetic_meals(start, days, per_day, tz_offset_minutes, rng):
+    origin = datetime(start.year, start.month, start.day, tzinfo=timezone.utc) - timedelta(minutes=tz_offset_minutes)
+    meals = []
+    for day in range(days):
+        for _ in range(per_day):
+            meals.append(Meal(
+                origin + timedelta(days=day, seconds=rng.randint(0, 86399)),
+                rng.randint(100, 900), rng.randint(0, 60), rng.randint(0, 50), rng.randint(0, 120),
+                rng.randint(0, 15), rng.randint(0, 40), rng.randint(0, 1500), rng.choice([None, 4, 7, 9, 75]),
+            ))
+    meals.sort(key=lambda meal: meal.created_at)
+    return meals
+
+
+def legacy_bucketing(meals, dates, tz_offset_minutes):
+    date_ranges = {}
+    for date_str in dates:
+        start_utc, end_utc, _ = get_day_range_utc(date_str, tz_offset_minutes)
+        date_ranges[date_str] = (start_utc, end_utc)
+    photos_by_date = {date_str: [] for date_str in date_ranges}
+    for meal in meals:
+        for date_str, (start_utc, end_utc) in date_ranges.items():
+            if start_utc <= meal.created_at < end_utc:
+                photos_by_date[date_str].append(meal)
+                break
+    return {date_str: sum(m.calories for m in photos) for date_str, photos in photos_by_date.items()}
+
+
+def range_bucketing(meals, start, days, tz_offset_minutes):
+    return {
+        summary["date"]: summary["total_calories"]
+        for summary in iter_day_summaries(meals, start, days, tz_offset_minutes)
+    }
+
+
+def timed(fn, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return result, statistics.median(samples)
+
+
+def bench_memory(args):
+    rng = random.Random(args.seed)
+    start = date.today() - timedelta(days=args.days - 1)
+    meals = synthetic_meals(start, args.days, args.meals_per_day, args.tz_offset, rng)
+    dates = [(start + timedelta(days=i)).isoformat() for i in range(args.days)]
+
+    legacy, legacy_ms = timed(lambda: legacy_bucketing(meals, dates, args.tz_offset), args.repeat)
+    ranged, range_ms = timed(lambda: range_bucketing(meals, start, args.days, args.tz_offset), args.repeat)
+    if legacy != ranged:
+        print("❌ Результаты группировки расходятся")
+        sys.exit(1)
+
+    print(f"{len(meals):,} приёмов пищи за {args.days} дней, смещение {args.tz_offset} мин")
+    print(f"  batch (O(фото × даты)): {legacy_ms:9.1f} мс")
+    print(f"  range (O(фото)):        {range_ms:9.1f} мс  ×{legacy_ms / max(range_ms, 1e-6):.0f}")
+
+
+def bench_http(args):
+    import httpx
+
+    from app.utils.auth import create_access_token
+
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': str(args.user_id)})}"}
+    end = date.today()
+    start = end - timedelta(days=args.days - 1)
+    params = {"start": start.isoformat(), "end": end.isoformat(), "tz_offset_minutes": args.tz_offset}
+
+    with httpx.Client(base_url=f"{args.app_url.rstrip('/')}/api/v1", headers=headers, timeout=120) as client:
+        def range_full():
+            response = client.get("/meals/range", params=params)
+            response.raise_for_status()
+            return len(response.content)
+
+        def range_aggregate():
+            response = client.get("/meals/range", params={**params, "aggregate_only": "true"})
+            response.raise_for_status()
+            return len(response.content)
+
+        def batches():
+            size = 0
+            for chunk_start in range(0, args.days, 31):
+                dates = [(start + timedelta(days=i)).isoformat() for i in range(chunk_start, min(chunk_start + 31, args.days))]
+                response = client.post("/meals/daily/batch", params={"tz_offset_minutes": args.tz_offset}, json={"dates": dates})
+                response.raise_for_status()
+                size += len(response.content)
+            return size
+
+        print(f"\nHTTP {args.app_url}, пользователь {args.user_id}, {args.days} дней")
+        for name, fn in (("range", range_full), ("range aggregate", range_aggregate), ("daily/batch ×31", batches)):
+            size, ms = timed(fn, args.repeat)
+            print(f"  {name:16} {ms:9.1f} мс  {size / 1024:9.1f} КБ")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-day bucketing for year-long meal ranges")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--meals-per-day", type=int, default=5)
+    parser.add_argument("--tz-offset", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--app-url", help="Also time the HTTP endpoints of a running app")
+    parser.add_argument("--user-id", type=int, help="User whose history is requested over HTTP")
+    args = parser.parse_args()
+
+    bench_memory(args)
+    if args.app_url:
+        if args.user_id is None:
+            parser.error("--app-url requires --user-id")
+        bench_http(args)
+
+
+if __name__ == "__main__":
+    main()
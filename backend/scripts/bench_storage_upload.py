@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк загрузки фото: блокирующий boto3 vs executor-backed async StorageService.
+
+Поднимает локальный S3 (scripts/fake_s3_server.py) с заданной задержкой,
+имитирует N одновременных /meals/upload (S3 put + AI-анализ через asyncio.sleep)
+и измеряет:
+  - задержку event loop (насколько опаздывает тикер с периодом 10 мс)
+  - p50/p99 латентность одного запроса
+
+Запуск: python3 scripts/bench_storage_upload.py --requests 200 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_s3_server import start_in_thread
+
+TICK_S = 0.01
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def loop_lag_monitor(samples, stop):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK_S)
+        samples.append((time.perf_counter() - started - TICK_S) * 1000)
+
+
+async def run_scenario(name, handler, requests, concurrency):
+    lag_samples = []
+    latencies = []
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(loop_lag_monitor(lag_samples, stop))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            started = time.perf_counter()
+            await handler(i)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    wall_started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    wall = time.perf_counter() - wall_started
+    stop.set()
+    await monitor
+
+    print(f"\n{name}")
+    print(f"  throughput:     {requests / wall:8.1f} req/s")
+    print(f"  latency p50:    {percentile(latencies, 50):8.1f} ms")
+    print(f"  latency p99:    {percentile(latencies, 99):8.1f} ms")
+    print(f"  loop lag mean:  {statistics.mean(lag_samples) if lag_samples else 0:8.1f} ms")
+    print(f"  loop lag p99:   {percentile(lag_samples, 99):8.1f} ms")
+    print(f"  loop lag max:   {max(lag_samples) if lag_samples else 0:8.1f} ms")
+
+
+async def main_async(args):
+    from app.services.storage import storage_service
+
+    payload = os.urandom(args.size_kb * 1024)
+    ai_latency = args.ai_latency_ms / 1000.0
+
+    async def blocking_sequential(i):
+        storage_service.upload_file(payload, f"bench/sync/{i}.jpg", "image/jpeg")
+        await asyncio.sleep(ai_latency)
+
+    async def async_concurrent(i):
+        await asyncio.gather(
+            storage_service.upload_file_async(payload, f"bench/async/{i}.jpg", "image/jpeg"),
+            asyncio.sleep(ai_latency),
+        )
+
+    await run_scenario("before: blocking put, then AI", blocking_sequential, args.requests, args.concurrency)
+    await run_scenario("after:  async put || AI", async_concurrent, args.requests, args.concurrency)
+    storage_service.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Storage upload benchmark")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--size-kb", type=int, default=512)
+    parser.add_argument("--s3-latency-ms", type=int, default=40)
+    parser.add_argument("--ai-latency-ms", type=int, default=300)
+    args = parser.parse_args()
+
+    server = start_in_thread(latency_ms=args.s3_latency_ms)
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ["YANDEX_STORAGE_ENDPOINT"] = endpoint
+    os.environ["YANDEX_STORAGE_ACCESS_KEY"] = "bench"
+    os.environ["YANDEX_STORAGE_SECRET_KEY"] = "bench"
+    os.environ["YANDEX_STORAGE_BUCKET_NAME"] = "bench"
+
+    print(f"Fake S3: {endpoint}, put latency {args.s3_latency_ms} ms, AI latency {args.ai_latency_ms} ms")
+    print(f"Requests: {args.requests}, concurrency: {args.concurrency}, payload: {args.size_kb} KB")
+
+    try:
+        asyncio.run(main_async(args))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+Локальный сервер, имитирующий Anthropic Messages API (POST /v1/messages),
+для бенчмарков и нагрузочных тестов без обращения к настоящему Claude.
+
+Поддерживает:
+  - обычные и потоковые (SSE, stream=true) ответы
+  - tool use: для известных инструментов ai_service возвращает готовый input
+  - prompt caching: префикс tools + system до последнего cache_control
+    считается закэшированным после первого запроса (cache_creation → cache_read),
+    если он не короче минимума модели (как в настоящем API: 1024, 2048
+    для Haiku 3/3.5, 4096 для Haiku 4.5 / Opus 4.5; --min-cache-tokens
+    переопределяет)
+  - задержку до первого токена, зависящую от числа незакэшированных токенов,
+    и задержку между чанками потока
+  - профили ошибок: доля ответов 429/500/529 (с retry-after), ошибка
+    посреди потока, зависание потока
+
+Профили (--profile): fast, realistic, slow, flaky, overloaded, stalling;
+отдельные параметры профиля переопределяются флагами.
+
+Запуск: python3 scripts/fake_anthropic_server.py --port 8089 --profile realistic --error-rate 0.05
+Приложение: ANTHROPIC_BASE_URL=http://127.0.0.1:8089
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+IMAGE_TOKENS = 1600
+
+MIN_CACHE_TOKENS = (("claude-opus-4-5", 4096), ("claude-haiku-4-5", 4096), ("haiku", 2048))
+DEFAULT_MIN_CACHE_TOKENS = 1024
+
+PROFILES = {
+    "fast": {},
+    "realistic": {"latency_ms": 600, "jitter_ms": 200, "prefill_us_per_token": 50, "chunk_delay_ms": 15},
+    "slow": {"latency_ms": 4000, "jitter_ms": 2000, "prefill_us_per_token": 200, "chunk_delay_ms": 60},
+    "flaky": {
+        "latency_ms": 600, "jitter_ms": 200, "prefill_us_per_token": 50, "chunk_delay_ms": 15,
+        "error_rate": 0.1, "error_status": 529, "stream_error_rate": 0.05,
+    },
+    "overloaded": {
+        "latency_ms": 300, "prefill_us_per_token": 50, "chunk_delay_ms": 15,
+        "error_rate": 0.6, "error_status": 529, "retry_after": 1,
+    },
+    "stalling": {"latency_ms": 600, "prefill_us_per_token": 50, "chunk_delay_ms": 15, "stall_rate": 0.2, "stall_ms": 15000},
+}
+
+DEFAULTS = {
+    "latency_ms": 0,
+    "jitter_ms": 0,
+    "prefill_us_per_token": 0,
+    "chunk_delay_ms": 0,
+    "chunk_chars": 16,
+    "min_cache_tokens": None,
+    "error_rate": 0.0,
+    "error_status": 529,
+    "retry_after": 0,
+    "stream_error_rate": 0.0,
+    "stall_rate": 0.0,
+    "stall_ms": 0,
+}
+
+ERROR_TYPES = {
+    400: "invalid_request_error",
+    429: "rate_limit_error",
+    500: "api_error",
+    529: "overloaded_error",
+}
+
+TOOL_OUTPUTS = {
+    "record_meal_nutrition": {
+        "name": "Плов с говядиной и морковью",
+        "calories": 650,
+        "protein": 28,
+        "fat": 24,
+        "carbs": 78,
+        "fiber": 4,
+        "sugar": 6,
+        "sodium": 820,
+        "health_score": 5,
+    },
+    "record_product_nutrition": {
+        "fiber": 3,
+        "sugar": 12,
+        "sodium": 240,
+        "health_score": 6,
+    },
+    "record_meal_correction": {
+        "name": "Плов с курицей",
+        "calories": 560,
+        "protein": 30,
+        "fat": 18,
+        "carbs": 70,
+        "fiber": 4,
+        "sugar": 5,
+        "sodium": 760,
+        "health_score": 6,
+        "ingredients": [{"name": "Рис", "calories": 300}, {"name": "Курица", "calories": 200}],
+    },
+    "record_recipe": {
+        "name": "Овсянка с ягодами",
+        "description": "Быстрый полезный завтрак",
+        "meal_type": "завтрак",
+        "calories": 350,
+        "protein": 12,
+        "fat": 8,
+        "carbs": 55,
+        "fiber": 7,
+        "sugar": 14,
+        "sodium": 90,
+        "health_score": 8.5,
+        "time": 10,
+        "difficulty": "Легко",
+        "ingredients": ["Овсяные хлопья 60 г", "Молоко 200 мл", "Ягоды 80 г"],
+        "instructions": ["Сварить хлопья на молоке", "Добавить ягоды"],
+    },
+}
+
+
+def estimate_tokens(value):
+    if isinstance(value, str):
+        return max(1, len(value) // 4)
+    if isinstance(value, list):
+        return sum(estimate_tokens(item) for item in value)
+    if isinstance(value, dict):
+        if value.get("type") == "image":
+            return IMAGE_TOKENS
+        return sum(estimate_tokens(item) for key, item in value.items() if key != "cache_control")
+    return 1
+
+
+def min_cache_tokens(model):
+    for marker, tokens in MIN_CACHE_TOKENS:
+        if marker in (model or ""):
+            return tokens
+    return DEFAULT_MIN_CACHE_TOKENS
+
+
+def cached_prefix(payload):
+    blocks = [("tool", tool) for tool in payload.get("tools") or []]
+    system = payload.get("system")
+    if isinstance(system, str):
+        blocks.append(("system", {"type": "text", "text": system}))
+    elif isinstance(system, list):
+        blocks.extend(("system", block) for block in system)
+    for message in payload.get("messages") or []:
+        content = message.get("content")
+        if isinstance(content, list):
+            blocks.extend(("message", block) for block in content)
+
+    last = -1
+    for index, (_, block) in enumerate(blocks):
+        if isinstance(block, dict) and block.get("cache_control"):
+            last = index
+    return [block for _, block in blocks[:last + 1]]
+
+
+class PromptCache:
+    def __init__(self, min_tokens=None):
+        self._lock = threading.Lock()
+        self.min_tokens = min_tokens
+        self.keys = set()
+
+    def minimum(self, payload):
+        if self.min_tokens is not None:
+            return self.min_tokens
+        return min_cache_tokens(payload.get("model"))
+
+    def usage(self, payload):
+        total = estimate_tokens(payload.get("tools") or []) + estimate_tokens(payload.get("system") or "")
+        total += estimate_tokens([m.get("content") for m in payload.get("messages") or []])
+        prefix = cached_prefix(payload)
+        prefix_tokens = estimate_tokens(prefix)
+        if not prefix or prefix_tokens < self.minimum(payload):
+            return {"input_tokens": total, "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0}
+
+        key = hashlib.sha256(json.dumps(prefix, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+        with self._lock:
+            hit = key in self.keys
+            self.keys.add(key)
+        return {
+            "input_tokens": total - prefix_tokens,
+            "cache_creation_input_tokens": 0 if hit else prefix_tokens,
+            "cache_read_input_tokens": prefix_tokens if hit else 0,
+        }
+
+
+class RequestLog:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.entries = []
+
+    def add(self, entry):
+        with self._lock:
+            self.entries.append(entry)
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.entries)
+
+
+class FakeAnthropicHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    cache: PromptCache = None
+    log: RequestLog = None
+    profile: dict = DEFAULTS
+    rng: random.Random = None
+    rng_lock: threading.Lock = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply_json(self, code, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _event(self, name, data):
+        chunk = f"event: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+        self.wfile.flush()
+
+    def _roll(self, rate):
+        if rate <= 0:
+            return False
+        with self.rng_lock:
+            return self.rng.random() < rate
+
+    def _jitter_s(self):
+        jitter = self.profile["jitter_ms"]
+        if not jitter:
+            return 0.0
+        with self.rng_lock:
+            return self.rng.uniform(0, jitter) / 1000.0
+
+    def _error_body(self, status):
+        return {
+            "type": "error",
+            "error": {"type": ERROR_TYPES.get(status, "api_error"), "message": "Simulated failure"},
+        }
+
+    def _reply_error(self, status):
+        body = json.dumps(self._error_body(status)).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if self.profile["retry_after"]:
+            self.send_header("retry-after", str(self.profile["retry_after"]))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _content(self, payload):
+        tool_choice = payload.get("tool_choice") or {}
+        tool_name = tool_choice.get("name")
+        if tool_name is None and payload.get("tools"):
+            tool_name = payload["tools"][0]["name"]
+        output = TOOL_OUTPUTS.get(tool_name, TOOL_OUTPUTS["record_meal_nutrition"])
+        text = json.dumps(output, ensure_ascii=False)
+        if tool_name:
+            return "tool_use", tool_name, output, text
+        return "text", None, output, text
+
+    def _message(self, payload, usage, content):
+        kind, tool_name, output, text = content
+        if kind == "tool_use":
+            block = {"type": "tool_use", "id": "toolu_fake", "name": tool_name, "input": output}
+        else:
+            block = {"type": "text", "text": text}
+        return {
+            "id": "msg_fake",
+            "type": "message",
+            "role": "assistant",
+            "model": payload.get("model", "fake"),
+            "content": [block],
+            "stop_reason": "tool_use" if kind == "tool_use" else "end_turn",
+            "stop_sequence": None,
+            "usage": usage,
+        }
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b"{}"
+        received = time.perf_counter()
+        payload = json.loads(raw or b"{}")
+
+        if not self.path.split("?")[0].endswith("/v1/messages"):
+            self._reply_json(404, {"type": "error", "error": {"type": "not_found_error", "message": self.path}})
+            return
+
+        profile = self.profile
+        chunk_chars = max(1, profile["chunk_chars"])
+        chunk_delay_s = profile["chunk_delay_ms"] / 1000.0
+        prefill_s = profile["prefill_us_per_token"] / 1_000_000.0
+
+        usage = self.cache.usage(payload)
+        content = self._content(payload)
+        output_tokens = estimate_tokens(content[3])
+        entry = {
+            "bytes": len(raw),
+            "stream": bool(payload.get("stream")),
+            "tool": content[1],
+            "status": 200,
+            "prefix_tokens": estimate_tokens(cached_prefix(payload)),
+            "min_cache_tokens": self.cache.minimum(payload),
+            **usage,
+        }
+        self.log.add(entry)
+
+        time.sleep(profile["latency_ms"] / 1000.0 + self._jitter_s())
+        if self._roll(profile["error_rate"]):
+            entry["status"] = profile["error_status"]
+            self._reply_error(profile["error_status"])
+            return
+        time.sleep((usage["input_tokens"] + usage["cache_creation_input_tokens"]) * prefill_s)
+
+        if not payload.get("stream"):
+            time.sleep(chunk_delay_s * (len(content[3]) // chunk_chars))
+            self._reply_json(200, self._message(payload, {**usage, "output_tokens": output_tokens}, content))
+            entry["server_ms"] = round((time.perf_counter() - received) * 1000, 1)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        kind, tool_name, _, text = content
+        start = self._message(payload, {**usage, "output_tokens": 1}, content)
+        start["content"] = []
+        start["stop_reason"] = None
+        self._event("message_start", {"type": "message_start", "message": start})
+        if kind == "tool_use":
+            block = {"type": "tool_use", "id": "toolu_fake", "name": tool_name, "input": {}}
+        else:
+            block = {"type": "text", "text": ""}
+        self._event("content_block_start", {"type": "content_block_start", "index": 0, "content_block": block})
+        fail_at = len(text) // 2 if self._roll(profile["stream_error_rate"]) else None
+        stall_at = len(text) // 2 if self._roll(profile["stall_rate"]) else None
+        for offset in range(0, len(text), chunk_chars):
+            if fail_at is not None and offset >= fail_at:
+                entry["status"] = "stream_error"
+                self._event("error", self._error_body(529))
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+                return
+            if stall_at is not None and offset >= stall_at:
+                stall_at = None
+                entry["status"] = "stalled"
+                time.sleep(profile["stall_ms"] / 1000.0)
+            piece = text[offset:offset + chunk_chars]
+            if kind == "tool_use":
+                delta = {"type": "input_json_delta", "partial_json": piece}
+            else:
+                delta = {"type": "text_delta", "text": piece}
+            self._event("content_block_delta", {"type": "content_block_delta", "index": 0, "delta": delta})
+            if chunk_delay_s:
+                time.sleep(chunk_delay_s)
+        self._event("content_block_stop", {"type": "content_block_stop", "index": 0})
+        self._event("message_delta", {
+            "type": "message_delta",
+            "delta": {"stop_reason": "tool_use" if kind == "tool_use" else "end_turn", "stop_sequence": None},
+            "usage": {"output_tokens": output_tokens},
+        })
+        self._event("message_stop", {"type": "message_stop"})
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+        entry["server_ms"] = round((time.perf_counter() - received) * 1000, 1)
+
+
+def resolve_profile(name="fast", **overrides):
+    if name not in PROFILES:
+        raise ValueError(f"Unknown profile '{name}', expected one of: {', '.join(PROFILES)}")
+    profile = {**DEFAULTS, **PROFILES[name]}
+    profile.update({key: value for key, value in overrides.items() if value is not None})
+    return profile
+
+
+def start_in_thread(host="127.0.0.1", port=0, profile="fast", seed=None, **overrides):
+    settings = resolve_profile(profile, **overrides)
+    handler = type("Handler", (FakeAnthropicHandler,), {
+        "cache": PromptCache(settings["min_cache_tokens"]),
+        "log": RequestLog(),
+        "profile": settings,
+        "rng": random.Random(seed),
+        "rng_lock": threading.Lock(),
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.handler = handler
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Anthropic Messages API stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--profile", default="realistic", choices=sorted(PROFILES))
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--latency-ms", type=int, help="Base delay before the first token")
+    parser.add_argument("--jitter-ms", type=int, help="Random extra delay, uniform 0..jitter")
+    parser.add_argument("--prefill-us-per-token", type=int, help="Extra delay per uncached input token")
+    parser.add_argument("--chunk-delay-ms", type=int, help="Delay between streamed chunks")
+    parser.add_argument("--chunk-chars", type=int)
+    parser.add_argument("--min-cache-tokens", type=int, help="Smallest cacheable prefix (default: the model's real minimum)")
+    parser.add_argument("--error-rate", type=float, help="Share of requests answered with --error-status")
+    parser.add_argument("--error-status", type=int, choices=sorted(ERROR_TYPES))
+    parser.add_argument("--retry-after", type=int, help="retry-after header on errors, seconds")
+    parser.add_argument("--stream-error-rate", type=float, help="Share of streams that fail midway")
+    parser.add_argument("--stall-rate", type=float, help="Share of streams that stall midway")
+    parser.add_argument("--stall-ms", type=int)
+    args = parser.parse_args()
+
+    overrides = {
+        key: value for key, value in vars(args).items()
+        if key in DEFAULTS and value is not None
+    }
+    server = start_in_thread(args.host, args.port, args.profile, args.seed, **overrides)
+    profile = server.handler.profile
+    print(f"Fake Anthropic listening on http://{args.host}:{server.server_address[1]} "
+          f"(profile {args.profile}: latency {profile['latency_ms']} ms, errors {profile['error_rate']:.0%})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
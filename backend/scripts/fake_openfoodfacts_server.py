@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Локальная заглушка OpenFoodFacts API (GET /api/v2/product/{barcode}.json)
+для нагрузочных тестов /meals/barcode/{code} без выхода в интернет.
+
+Товар генерируется детерминированно из штрихкода. Штрихкоды, оканчивающиеся
+на 0, отвечают 404 (товар не найден), чтобы проверить и этот путь.
+
+Запуск: python3 scripts/fake_openfoodfacts_server.py --port 8090 --latency-ms 150
+Приложение: OPENFOODFACTS_HOSTS=http://127.0.0.1:8090
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+PRODUCT_PATH = re.compile(r"^/api/v2/product/(\d+)\.json$")
+
+
+def fake_product(barcode):
+    seed = zlib.crc32(barcode.encode("ascii"))
+    return {
+        "code": barcode,
+        "product_name": f"Тестовый продукт {barcode[-6:]}",
+        "brands": ["Alpha", "Nestle", "Lactel", "Coca-Cola"][seed % 4],
+        "nutriments": {
+            "energy-kcal_100g": 50 + seed % 450,
+            "proteins_100g": round((seed >> 3) % 300 / 10, 1),
+            "fat_100g": round((seed >> 7) % 350 / 10, 1),
+            "carbohydrates_100g": round((seed >> 11) % 700 / 10, 1),
+            "sugars_100g": round((seed >> 13) % 300 / 10, 1) if seed % 3 else None,
+        },
+    }
+
+
+class FakeOpenFoodFactsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency_s: float = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, code, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def do_GET(self):
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        match = PRODUCT_PATH.match(urlsplit(self.path).path)
+        if not match:
+            self._reply(404, {"status": 0, "status_verbose": "not found"})
+            return
+        barcode = match.group(1)
+        if barcode.endswith("0"):
+            self._reply(404, {"code": barcode, "status": 0, "status_verbose": "product not found"})
+            return
+        self._reply(200, {"code": barcode, "status": 1, "product": fake_product(barcode)})
+
+
+def start_in_thread(host="127.0.0.1", port=0, latency_ms=0):
+    handler = type("Handler", (FakeOpenFoodFactsHandler,), {"latency_s": latency_ms / 1000.0})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenFoodFacts stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=int, default=0)
+    args = parser.parse_args()
+
+    server = start_in_thread(args.host, args.port, args.latency_ms)
+    print(f"Fake OpenFoodFacts listening on http://{args.host}:{server.server_address[1]} (latency {args.latency_ms} ms)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
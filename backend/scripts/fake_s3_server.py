@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Локальный S3-совместимый сервер для бенчмарков и нагрузочных тестов.
+Хранит объекты в памяти, поддерживает path-style запросы:
+HEAD/PUT bucket, PUT/GET/HEAD/DELETE object.
+
+Запуск: python3 scripts/fake_s3_server.py --port 9000 --latency-ms 40
+"""
+
+import argparse
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, unquote
+
+
+class ObjectStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.buckets = set()
+        self.objects = {}
+
+    def put(self, bucket, key, body, content_type):
+        with self._lock:
+            self.buckets.add(bucket)
+            self.objects[(bucket, key)] = (body, content_type)
+
+    def get(self, bucket, key):
+        with self._lock:
+            return self.objects.get((bucket, key))
+
+    def delete(self, bucket, key):
+        with self._lock:
+            self.objects.pop((bucket, key), None)
+
+
+class FakeS3Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    store: ObjectStore = None
+    latency_s: float = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _split(self):
+        path = unquote(urlsplit(self.path).path).lstrip("/")
+        bucket, _, key = path.partition("/")
+        return bucket, key
+
+    def _reply(self, code, body=b"", content_type="application/xml", extra_headers=None):
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if body and self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _delay(self):
+        if self.latency_s:
+            time.sleep(self.latency_s)
+
+    def do_HEAD(self):
+        self._delay()
+        bucket, key = self._split()
+        if not key:
+            self._reply(200 if bucket in self.store.buckets else 404)
+            return
+        obj = self.store.get(bucket, key)
+        if obj is None:
+            self._reply(404)
+            return
+        body, content_type = obj
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+
+    def do_PUT(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        self._delay()
+        bucket, key = self._split()
+        if not key:
+            self.store.buckets.add(bucket)
+            self._reply(200)
+            return
+        content_type = self.headers.get("Content-Type", "application/octet-stream")
+        self.store.put(bucket, key, body, content_type)
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        self._reply(200, extra_headers={"ETag": etag})
+
+    def do_GET(self):
+        self._delay()
+        bucket, key = self._split()
+        obj = self.store.get(bucket, key)
+        if obj is None:
+            error = b"<Error><Code>NoSuchKey</Code><Message>Not found</Message></Error>"
+            self._reply(404, error)
+            return
+        body, content_type = obj
+        self._reply(200, body, content_type)
+
+    def do_DELETE(self):
+        self._delay()
+        bucket, key = self._split()
+        self.store.delete(bucket, key)
+        self._reply(204)
+
+
+def start_in_thread(host="127.0.0.1", port=0, latency_ms=0):
+    handler = type("Handler", (FakeS3Handler,), {
+        "store": ObjectStore(),
+        "latency_s": latency_ms / 1000.0,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local S3 stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=int, default=0)
+    args = parser.parse_args()
+
+    server = start_in_thread(args.host, args.port, args.latency_ms)
+    print(f"Fake S3 listening on http://{args.host}:{server.server_address[1]} (latency {args.latency_ms} ms)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Фаззинг _extract_json на корпусе реальных ответов Claude
+(analyze_meal_image, correct_meal, analyze_barcode_product, generate_recipe).
+
+Для каждого образца из scripts/fixtures/ai_outputs.json генерирует мутации:
+  - болтовня до/после JSON, markdown-ограждения, фигурные скобки в тексте
+  - обрезка ответа в случайном месте (max_tokens)
+  - случайный мусор и лишние/незакрытые скобки
+и проверяет, что:
+  - парсер никогда не падает и возвращает dict или None
+  - если исходный объект в тексте не повреждён, он извлекается без потерь
+  - время разбора растёт линейно (нет катастрофического backtracking)
+
+Запуск: python3 scripts/fuzz_extract_json.py --iterations 2000 --seed 1
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.ai_service import _extract_json
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "ai_outputs.json")
+
+PREAMBLES = [
+    "",
+    "Here is the JSON:\n",
+    "Конечно! Вот результат анализа:\n\n",
+    "I can't be fully certain {but here is my best estimate}.\n",
+    "```json\n",
+]
+SUFFIXES = [
+    "",
+    "\n```",
+    "\nLet me know if you need more details.",
+    "\nNote: values in {braces} are estimates.",
+    "\n}",
+    "\n{\"unfinished\": ",
+]
+NOISE = "{}[]\"\\:,абв xyz 0123456789\n"
+
+
+def load_corpus():
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def intact_mutation(rng, sample):
+    text = sample["text"]
+    return rng.choice(PREAMBLES) + text + rng.choice(SUFFIXES)
+
+
+def damaged_mutation(rng, sample):
+    text = sample["text"]
+    choice = rng.randrange(3)
+    if choice == 0:
+        return text[:rng.randrange(len(text))]
+    if choice == 1:
+        pos = rng.randrange(len(text))
+        noise = "".join(rng.choice(NOISE) for _ in range(rng.randint(1, 8)))
+        return text[:pos] + noise + text[pos:]
+    return "".join(rng.choice(NOISE) for _ in range(rng.randint(0, 400)))
+
+
+def check_linear(sizes=(2_000, 8_000, 32_000)):
+    timings = []
+    for size in sizes:
+        text = "{" * size + '"a": 1' + "x" * size
+        started = time.perf_counter()
+        _extract_json(text)
+        timings.append(time.perf_counter() - started)
+    ratio = timings[-1] / max(timings[0], 1e-6)
+    growth = sizes[-1] / sizes[0]
+    print(f"Pathological input timings: {', '.join(f'{t * 1000:.2f} ms' for t in timings)} "
+          f"(size x{growth:.0f}, time x{ratio:.1f})")
+    return ratio < growth * 4
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fuzz the AI JSON extractor")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = load_corpus()
+    failures = 0
+
+    for sample in corpus:
+        if _extract_json(sample["text"]) != sample["expected"]:
+            failures += 1
+            print(f"❌ corpus {sample['source']}/{sample['kind']}: expected object not extracted")
+
+    for i in range(args.iterations):
+        sample = rng.choice(corpus)
+        intact = rng.random() < 0.5
+        text = intact_mutation(rng, sample) if intact else damaged_mutation(rng, sample)
+        try:
+            result = _extract_json(text)
+        except Exception as e:
+            failures += 1
+            print(f"❌ #{i} {sample['source']}/{sample['kind']}: raised {type(e).__name__}: {e}")
+            continue
+        if result is not None and not isinstance(result, dict):
+            failures += 1
+            print(f"❌ #{i} {sample['source']}/{sample['kind']}: returned {type(result).__name__}")
+        elif intact and result != sample["expected"]:
+            failures += 1
+            print(f"❌ #{i} {sample['source']}/{sample['kind']}: intact object not recovered from {text[:80]!r}")
+
+    if not check_linear():
+        failures += 1
+        print("❌ extractor time grows faster than linear")
+
+    print(f"{len(corpus)} corpus samples, {args.iterations} mutations, {failures} failures")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
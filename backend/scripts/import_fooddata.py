@@ -2,8 +2,15 @@
 """
 Импорт USDA FoodData CSV в MariaDB
 Оптимизированный батчевый импорт для больших датасетов
+
+После CSV пересобирается food_macros (КБЖУ + порция одной строкой на продукт),
+которую читают /foods, /foods/search и /foods/{fdc_id}.
+
+Запуск: python3 scripts/import_fooddata.py
+        python3 scripts/import_fooddata.py --macros-only   # только пересобрать food_macros
 """
 
+import argparse
 import csv
 import sys
 import os
@@ -22,6 +29,7 @@ DB_CONFIG = {
 }
 
 BATCH_SIZE = 5000  # Вставка по 5000 строк за раз
+MACROS_CHUNK = 20000  # Диапазон fdc_id на один INSERT ... SELECT в food_macros
 FOODDATA_PATH = '/home/scroll/backend/fooddata'
 
 
@@ -187,7 +195,67 @@ def import_branded_foods(cursor, csv_path):
         return total
 
 
+# nutrient_id → колонка food_macros (как NUTRIENT_MAP в app/api/v1/foods.py)
+MACRO_NUTRIENTS = {
+    1008: 'calories',
+    1003: 'protein',
+    1004: 'fat',
+    1005: 'carbs',
+    1079: 'fiber',
+    1087: 'calcium',
+    1089: 'iron',
+    1093: 'sodium',
+}
+
+
+def import_food_macros(cursor, connection):
+    """Пересборка food_macros из food_nutrients и branded_foods"""
+    print("\n📥 Пересборка food_macros")
+
+    columns = list(MACRO_NUTRIENTS.values())
+    pivot = ",\n                ".join(
+        f"MAX(CASE WHEN n.nutrient_id = {nutrient_id} THEN n.amount END)"
+        for nutrient_id in MACRO_NUTRIENTS
+    )
+    nutrient_ids = ", ".join(str(nutrient_id) for nutrient_id in MACRO_NUTRIENTS)
+    updates = ", ".join(
+        f"{column} = VALUES({column})"
+        for column in columns + ['brand_owner', 'serving_size', 'serving_size_unit', 'updated_at']
+    )
+    sql = f"""INSERT INTO food_macros
+               (fdc_id, {", ".join(columns)}, brand_owner, serving_size, serving_size_unit, updated_at)
+               SELECT f.fdc_id,
+                {pivot},
+                b.brand_owner, b.serving_size, b.serving_size_unit, NOW()
+               FROM foods f
+               LEFT JOIN food_nutrients n ON n.fdc_id = f.fdc_id AND n.nutrient_id IN ({nutrient_ids})
+               LEFT JOIN branded_foods b ON b.fdc_id = f.fdc_id
+               WHERE f.fdc_id >= %s AND f.fdc_id < %s
+               GROUP BY f.fdc_id, b.brand_owner, b.serving_size, b.serving_size_unit
+               ON DUPLICATE KEY UPDATE {updates}"""
+
+    cursor.execute("SELECT MIN(fdc_id) AS low, MAX(fdc_id) AS high FROM foods")
+    bounds = cursor.fetchone()
+    if bounds['low'] is None:
+        print("⚠️  Таблица foods пуста")
+        return 0
+
+    for start in range(bounds['low'], bounds['high'] + 1, MACROS_CHUNK):
+        cursor.execute(sql, (start, start + MACROS_CHUNK))
+        connection.commit()
+        print(f"  ✓ fdc_id до {start + MACROS_CHUNK:,}", end='\r')
+
+    cursor.execute("SELECT COUNT(*) AS total FROM food_macros")
+    total = cursor.fetchone()['total']
+    print(f"\n✅ Food macros: {total:,} строк")
+    return total
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Import USDA FoodData CSV and rebuild food_macros")
+    parser.add_argument("--macros-only", action="store_true", help="Skip the CSV import, only rebuild food_macros")
+    args = parser.parse_args()
+
     print("="*60)
     print("USDA FoodData → MariaDB Import")
     print("="*60)
@@ -206,15 +274,19 @@ def main():
         cursor.execute("SET UNIQUE_CHECKS=0")
         cursor.execute("SET AUTOCOMMIT=0")
         
-        # Импорт данных
-        foods_count = import_foods(cursor, os.path.join(FOODDATA_PATH, 'food.csv'))
-        connection.commit()
-        
-        nutrients_count = import_food_nutrients(cursor, os.path.join(FOODDATA_PATH, 'food_nutrient.csv'))
-        connection.commit()
+        foods_count = nutrients_count = branded_count = 0
+        if not args.macros_only:
+            # Импорт данных
+            foods_count = import_foods(cursor, os.path.join(FOODDATA_PATH, 'food.csv'))
+            connection.commit()
+            
+            nutrients_count = import_food_nutrients(cursor, os.path.join(FOODDATA_PATH, 'food_nutrient.csv'))
+            connection.commit()
+            
+            branded_count = import_branded_foods(cursor, os.path.join(FOODDATA_PATH, 'branded_food.csv'))
+            connection.commit()
         
-        branded_count = import_branded_foods(cursor, os.path.join(FOODDATA_PATH, 'branded_food.csv'))
-        connection.commit()
+        macros_count = import_food_macros(cursor, connection)
         
         # Включаем проверки обратно
         cursor.execute("SET FOREIGN_KEY_CHECKS=1")
@@ -227,6 +299,7 @@ def main():
         print(f"   Foods: {foods_count:,}")
         print(f"   Nutrients: {nutrients_count:,}")
         print(f"   Branded: {branded_count:,}")
+        print(f"   Macros: {macros_count:,}")
         print(f"   Время: {datetime.now() - start_time}")
         print("="*60)
         
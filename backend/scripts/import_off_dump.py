@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Импорт дампа OpenFoodFacts в таблицу off_products для офлайн-поиска по штрихкоду.
+
+Поддерживаемые форматы (можно в .gz):
+  - JSONL: openfoodfacts-products.jsonl(.gz), один товар на строку
+  - CSV:   en.openfoodfacts.org.products.csv(.gz), разделитель — табуляция
+
+Особенности:
+  - потоковое чтение: память не зависит от размера дампа
+  - пакетная вставка по --batch-size строк
+  - чекпоинт (смещение в файле + счётчики) после каждого пакета,
+    повторный запуск продолжает с места остановки (--restart — начать заново)
+  - при повторном импорте обновляются только товары, у которых изменился last_modified_t
+
+Запуск: python3 scripts/import_off_dump.py /data/openfoodfacts-products.jsonl.gz --batch-size 5000
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pymysql
+
+from app.core.config import settings
+from app.services.barcode_lookup import canonical_gtin
+
+csv.field_size_limit(sys.maxsize)
+
+NUTRIENT_COLUMNS = {
+    "calories": "energy-kcal_100g",
+    "protein": "proteins_100g",
+    "fat": "fat_100g",
+    "carbs": "carbohydrates_100g",
+    "fiber": "fiber_100g",
+    "sugar": "sugars_100g",
+    "sodium": "sodium_100g",
+}
+COLUMNS = (
+    "code", "raw_code", "product_name", "generic_name", "brands",
+    "calories", "protein", "fat", "carbs", "fiber", "sugar", "sodium",
+    "last_modified_t", "imported_at",
+)
+UPSERT_SQL = (
+    f"INSERT INTO off_products ({', '.join(COLUMNS)}) VALUES ({', '.join(['%s'] * len(COLUMNS))}) "
+    "ON DUPLICATE KEY UPDATE "
+    + ", ".join(f"{column} = VALUES({column})" for column in COLUMNS if column != "code")
+)
+MAX_NUTRIENT = 9_999_999
+
+
+def open_dump(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def dump_format(path, forced):
+    if forced:
+        return forced
+    name = path[:-3] if path.endswith(".gz") else path
+    return "csv" if name.endswith((".csv", ".tsv")) else "jsonl"
+
+
+def text(value, limit=500):
+    if value is None:
+        return None
+    if isinstance(value, list):
+        value = ", ".join(str(item) for item in value if item)
+    value = str(value).strip()
+    return value[:limit] or None
+
+
+def number(value):
+    if value is None or value == "":
+        return None
+    try:
+        result = float(value)
+    except (TypeError, ValueError):
+        return None
+    if result != result or abs(result) > MAX_NUTRIENT:
+        return None
+    return round(result, 3)
+
+
+def timestamp(value):
+    try:
+        return int(float(value)) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def to_row(record, imported_at, require_nutrition):
+    raw_code = str(record.get("code") or "").strip()
+    code = canonical_gtin(raw_code)
+    if not code or len(code) > 14:
+        return None
+
+    nutriments = record.get("nutriments")
+    if not isinstance(nutriments, dict):
+        nutriments = record
+    values = {field: number(nutriments.get(column)) for field, column in NUTRIENT_COLUMNS.items()}
+    if values["calories"] is None:
+        kj = number(nutriments.get("energy_100g") or nutriments.get("energy-kj_100g"))
+        if kj is not None:
+            values["calories"] = round(kj / 4.184, 3)
+
+    name = text(record.get("product_name"))
+    generic = text(record.get("generic_name"))
+    if require_nutrition and values["calories"] is None and not (name or generic):
+        return None
+
+    return (
+        code, raw_code[:32], name, generic, text(record.get("brands")),
+        values["calories"], values["protein"], values["fat"], values["carbs"],
+        values["fiber"], values["sugar"], values["sodium"],
+        timestamp(record.get("last_modified_t")), imported_at,
+    )
+
+
+def iter_records(stream, fmt, header):
+    for line in iter(stream.readline, b""):
+        offset = stream.tell()
+        if not line.strip():
+            continue
+        decoded = line.decode("utf-8", errors="replace")
+        if fmt == "jsonl":
+            try:
+                record = json.loads(decoded)
+            except json.JSONDecodeError:
+                yield offset, None
+                continue
+        else:
+            values = next(csv.reader([decoded.rstrip("\r\n")], delimiter="\t", quoting=csv.QUOTE_NONE))
+            record = dict(zip(header, values))
+        yield offset, record
+
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_checkpoint(path, state):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def connect():
+    return pymysql.connect(
+        host=settings.db_host,
+        port=settings.db_port,
+        user=settings.db_user,
+        password=settings.db_password,
+        database=settings.db_name,
+        charset="utf8mb4",
+        autocommit=False,
+    )
+
+
+def changed_rows(cursor, rows):
+    codes = [row[0] for row in rows]
+    placeholders = ", ".join(["%s"] * len(codes))
+    cursor.execute(f"SELECT code, last_modified_t FROM off_products WHERE code IN ({placeholders})", codes)
+    existing = dict(cursor.fetchall())
+    fresh, updated = [], 0
+    for row in rows:
+        if row[0] in existing:
+            known = existing[row[0]]
+            if known is not None and row[12] is not None and row[12] <= known:
+                continue
+            updated += 1
+        fresh.append(row)
+    return fresh, updated
+
+
+def write_batch(connection, rows, stats):
+    deduped = {}
+    for row in rows:
+        current = deduped.get(row[0])
+        if current is None or (row[12] or 0) >= (current[12] or 0):
+            deduped[row[0]] = row
+    rows = list(deduped.values())
+
+    with connection.cursor() as cursor:
+        fresh, updated = changed_rows(cursor, rows)
+        if fresh:
+            cursor.executemany(UPSERT_SQL, fresh)
+    connection.commit()
+    stats["inserted"] += len(fresh) - updated
+    stats["updated"] += updated
+    stats["unchanged"] += len(rows) - len(fresh)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import an OpenFoodFacts dump into off_products")
+    parser.add_argument("dump", help="Path to the JSONL or CSV dump (optionally .gz)")
+    parser.add_argument("--format", choices=("jsonl", "csv"), help="Override format detection")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <dump>.checkpoint.json)")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    parser.add_argument("--limit", type=int, default=0, help="Stop after N records (for testing)")
+    parser.add_argument("--keep-empty", action="store_true", help="Also import products without name and calories")
+    args = parser.parse_args()
+
+    fmt = dump_format(args.dump, args.format)
+    checkpoint_path = args.checkpoint or args.dump + ".checkpoint.json"
+    dump_size = os.path.getsize(args.dump)
+    dump_mtime = int(os.path.getmtime(args.dump))
+
+    stats = {"read": 0, "skipped": 0, "inserted": 0, "updated": 0, "unchanged": 0}
+    offset = 0
+    checkpoint = None if args.restart else load_checkpoint(checkpoint_path)
+    if checkpoint and checkpoint.get("size") == dump_size and checkpoint.get("mtime") == dump_mtime:
+        offset = checkpoint["offset"]
+        stats.update(checkpoint["stats"])
+        if checkpoint.get("done"):
+            print(f"✅ Дамп уже импортирован ({checkpoint_path}); --restart для повторного импорта")
+            return
+        print(f"↻ Продолжаем с позиции {offset:,} ({stats['read']:,} записей уже прочитано)")
+    elif checkpoint:
+        print("⚠️  Дамп изменился с прошлого запуска, чекпоинт проигнорирован")
+
+    connection = connect()
+    started = time.monotonic()
+    imported_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    require_nutrition = not args.keep_empty
+    processed = 0
+
+    with open_dump(args.dump) as stream:
+        header = None
+        if fmt == "csv":
+            header = stream.readline().decode("utf-8").rstrip("\r\n").split("\t")
+            offset = max(offset, stream.tell())
+        if offset:
+            stream.seek(offset)
+
+        batch = []
+        for position, record in iter_records(stream, fmt, header):
+            stats["read"] += 1
+            processed += 1
+            row = to_row(record, imported_at, require_nutrition) if record else None
+            if row is None:
+                stats["skipped"] += 1
+            else:
+                batch.append(row)
+
+            if len(batch) >= args.batch_size:
+                write_batch(connection, batch, stats)
+                batch = []
+                save_checkpoint(checkpoint_path, {
+                    "size": dump_size, "mtime": dump_mtime, "offset": position, "stats": stats, "done": False,
+                })
+                rate = processed / max(time.monotonic() - started, 1e-6)
+                print(f"  ✓ {stats['read']:,} прочитано, +{stats['inserted']:,} новых, "
+                      f"~{stats['updated']:,} обновлено, ={stats['unchanged']:,} без изменений ({rate:,.0f}/с)", end="\r")
+
+            if args.limit and processed >= args.limit:
+                break
+
+        if batch:
+            write_batch(connection, batch, stats)
+        position = stream.tell()
+
+    done = not args.limit or processed < args.limit
+    save_checkpoint(checkpoint_path, {
+        "size": dump_size, "mtime": dump_mtime, "offset": position, "stats": stats, "done": done,
+    })
+    connection.close()
+
+    print()
+    print("=" * 60)
+    print(f"📊 Прочитано: {stats['read']:,}, пропущено: {stats['skipped']:,}")
+    print(f"   Новых: {stats['inserted']:,}, обновлено: {stats['updated']:,}, без изменений: {stats['unchanged']:,}")
+    print(f"   Время: {time.monotonic() - started:.1f} с")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
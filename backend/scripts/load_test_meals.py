@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный тест /meals/upload, /meals/barcode/{code} и /meals/photos/{id}/correct
+на одной машине, без платных API и Yandex Object Storage.
+
+Поднимает локальные заглушки:
+  - Anthropic Messages API (scripts/fake_anthropic_server.py, профиль --ai-profile)
+  - S3 (scripts/fake_s3_server.py)
+  - OpenFoodFacts (scripts/fake_openfoodfacts_server.py)
+и запускает приложение (uvicorn) с переменными окружения, направляющими
+ai_service, storage_service и поиск по штрихкоду на эти заглушки
+(и снимающими лимит запросов в минуту с одного IP).
+База данных берётся из .env (DB_HOST, DB_NAME, ...), поэтому лучше
+использовать отдельную тестовую базу.
+
+Для каждого сценария печатает пропускную способность, p50/p95/p99
+и распределение кодов ответа, в конце — метрики /health/metrics
+(под учётной записью ADMIN_USERNAME / ADMIN_PASSWORD).
+
+Запуск: python3 scripts/load_test_meals.py --requests 200 --concurrency 16 --ai-profile realistic
+Уже запущенное приложение (с RATE_LIMIT_PER_MINUTE, поднятым под нагрузку):
+  python3 scripts/load_test_meals.py --app-url http://127.0.0.1:8000
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+
+import fake_anthropic_server
+import fake_openfoodfacts_server
+import fake_s3_server
+
+LOADTEST_EMAIL = "loadtest@caloriesapp.local"
+LOADTEST_BUCKET = "caloriesapp-loadtest"
+CORRECTIONS = [
+    "Там была курица, а не говядина",
+    "Порция в два раза меньше",
+    "Без масла",
+    "Добавь 100 г риса",
+]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def sample_photos(count, rng):
+    from PIL import Image, ImageDraw
+
+    photos = []
+    for i in range(count):
+        img = Image.new("RGB", (1600, 1200), (rng.randint(200, 255), rng.randint(200, 255), rng.randint(180, 240)))
+        draw = ImageDraw.Draw(img)
+        for _ in range(25):
+            x, y = rng.randint(0, 1400), rng.randint(0, 1000)
+            draw.ellipse((x, y, x + rng.randint(60, 240), y + rng.randint(60, 200)),
+                         fill=(rng.randint(60, 230), rng.randint(40, 200), rng.randint(20, 160)))
+        buffer = io.BytesIO()
+        img.save(buffer, "JPEG", quality=88)
+        photos.append(buffer.getvalue())
+    return photos
+
+
+def sample_barcodes(count, rng):
+    return ["".join(str(rng.randint(0, 9)) for _ in range(13)) for _ in range(count)]
+
+
+def loadtest_token(user_id):
+    from app.core.database import SessionLocal
+    from app.models.user import User
+    from app.utils.auth import create_access_token
+
+    db = SessionLocal()
+    try:
+        if user_id is None:
+            user = db.query(User).filter(User.email == LOADTEST_EMAIL).first()
+            if user is None:
+                user = User(email=LOADTEST_EMAIL, name="Load Test")
+                db.add(user)
+                db.commit()
+                db.refresh(user)
+            user_id = user.id
+    finally:
+        db.close()
+    return user_id, create_access_token(data={"sub": str(user_id)})
+
+
+def start_fakes(args):
+    anthropic = fake_anthropic_server.start_in_thread(profile=args.ai_profile, seed=args.seed)
+    s3 = fake_s3_server.start_in_thread(latency_ms=args.s3_latency_ms)
+    off = fake_openfoodfacts_server.start_in_thread(latency_ms=args.off_latency_ms)
+    env = {
+        "ANTHROPIC_API_KEY": "sk-ant-loadtest",
+        "ANTHROPIC_BASE_URL": f"http://127.0.0.1:{anthropic.server_address[1]}",
+        "YANDEX_STORAGE_ENDPOINT": f"http://127.0.0.1:{s3.server_address[1]}",
+        "YANDEX_STORAGE_ACCESS_KEY": "loadtest",
+        "YANDEX_STORAGE_SECRET_KEY": "loadtest",
+        "YANDEX_STORAGE_BUCKET_NAME": LOADTEST_BUCKET,
+        "STORAGE_ADDRESSING_STYLE": "path",
+        "OPENFOODFACTS_HOSTS": f"http://127.0.0.1:{off.server_address[1]}",
+        "RATE_LIMIT_PER_MINUTE": "1000000",
+    }
+    return [anthropic, s3, off], env
+
+
+def spawn_app(args, env):
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(args.port), "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env={**os.environ, **env},
+    )
+    app_url = f"http://127.0.0.1:{args.port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"App exited with code {process.returncode}")
+        try:
+            if httpx.get(f"{app_url}/health", timeout=1).status_code == 200:
+                return process, app_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.3)
+    process.terminate()
+    raise RuntimeError("App did not become healthy in 60s")
+
+
+async def run_scenario(name, total, concurrency, make_request):
+    latencies = []
+    statuses = Counter()
+    results = []
+    counter = iter(range(total))
+
+    async def worker():
+        for index in counter:
+            started = time.perf_counter()
+            try:
+                response = await make_request(index)
+                statuses[response.status_code] += 1
+                if response.is_success:
+                    results.append(response)
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    ok = sum(count for code, count in statuses.items() if isinstance(code, int) and code < 400)
+    codes = ", ".join(f"{code}×{count}" for code, count in sorted(statuses.items(), key=lambda item: str(item[0])))
+    print(
+        f"{name:10} {total:6} {total / elapsed:8.1f} {percentile(latencies, 50):9.0f} "
+        f"{percentile(latencies, 95):9.0f} {percentile(latencies, 99):9.0f} {ok / total:7.1%}  {codes}"
+    )
+    return results
+
+
+async def run_load(args, app_url, token):
+    rng = random.Random(args.seed)
+    headers = {"Authorization": f"Bearer {token}"}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    photos = sample_photos(min(args.requests, 16), rng) if "upload" in scenarios else []
+    barcodes = sample_barcodes(args.requests, rng)
+    photo_ids = list(args.photo_ids)
+
+    async with httpx.AsyncClient(base_url=f"{app_url}/api/v1", headers=headers, timeout=args.timeout, limits=limits) as client:
+        print(f"{'scenario':10} {'reqs':>6} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ok':>7}  codes")
+
+        if "upload" in scenarios:
+            async def upload(index):
+                return await client.post(
+                    "/meals/upload",
+                    files={"file": (f"loadtest_{index}.jpg", photos[index % len(photos)], "image/jpeg")},
+                    data={"async_analysis": "true" if args.async_analysis else "false"},
+                )
+
+            responses = await run_scenario("upload", args.requests, args.concurrency, upload)
+            photo_ids.extend(response.json()["photo"]["id"] for response in responses)
+
+        if "barcode" in scenarios:
+            async def barcode(index):
+                return await client.get(f"/meals/barcode/{barcodes[index]}")
+
+            await run_scenario("barcode", args.requests, args.concurrency, barcode)
+
+        if "correct" in scenarios:
+            if not photo_ids:
+                print("correct    skipped: no photos (run with the upload scenario or pass --photo-ids)")
+            else:
+                async def correct(index):
+                    return await client.post(
+                        f"/meals/photos/{photo_ids[index % len(photo_ids)]}/correct",
+                        json={"correction": CORRECTIONS[index % len(CORRECTIONS)]},
+                    )
+
+                await run_scenario("correct", args.requests, args.concurrency, correct)
+
+        if args.cleanup and len(photo_ids) > len(args.photo_ids):
+            for photo_id in photo_ids[len(args.photo_ids):]:
+                await client.delete(f"/meals/photos/{photo_id}")
+
+        try:
+            from app.core.config import settings
+
+            metrics = (await client.get(
+                f"{app_url}/health/metrics", auth=(settings.admin_username, settings.admin_password)
+            )).json()
+            print("\n/health/metrics (one worker):")
+            print(json.dumps(metrics, ensure_ascii=False, indent=2))
+        except (httpx.HTTPError, ValueError):
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test of meal upload, barcode and correction")
+    parser.add_argument("--app-url", help="Use an already running app instead of spawning one")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--requests", type=int, default=100, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--scenarios", default="upload,barcode,correct")
+    parser.add_argument("--ai-profile", default="realistic", choices=sorted(fake_anthropic_server.PROFILES))
+    parser.add_argument("--s3-latency-ms", type=int, default=30)
+    parser.add_argument("--off-latency-ms", type=int, default=150)
+    parser.add_argument("--async-analysis", action="store_true", help="Upload with async_analysis=true")
+    parser.add_argument("--user-id", type=int, help="Existing user; by default a dedicated load-test user is used")
+    parser.add_argument("--photo-ids", type=int, nargs="*", default=[], help="Existing photos for the correct scenario")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--cleanup", action="store_true", help="Delete photos created by the test")
+    args = parser.parse_args()
+
+    user_id, token = loadtest_token(args.user_id)
+    servers, env = [], {}
+    process = None
+    if args.app_url:
+        app_url = args.app_url.rstrip("/")
+    else:
+        servers, env = start_fakes(args)
+        process, app_url = spawn_app(args, env)
+        print(f"App {app_url} (workers={args.workers}), AI profile {args.ai_profile}, user {user_id}")
+        for name, value in env.items():
+            if name.endswith(("_URL", "_ENDPOINT", "_HOSTS")):
+                print(f"  {name}={value}")
+
+    try:
+        asyncio.run(run_load(args, app_url, token))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+        for server in servers:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
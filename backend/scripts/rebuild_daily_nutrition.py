@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Пересборка и проверка таблицы daily_nutrition (суммы КБЖУ, число приёмов пищи,
+средний health score и вода за локальный день пользователя).
+
+Обычно таблица обновляется при каждой записи еды/воды, а пустую таблицу
+приложение заполняет из истории при старте; скрипт нужен для ручной
+пересборки и для проверки расхождений.
+
+  --verify  только сравнить таблицу с историей meal_photos/water_logs
+  --fix     вместе с --verify: пересобрать пользователей с расхождениями
+
+Запуск: python3 scripts/rebuild_daily_nutrition.py [--user-id 42] [--verify [--fix]]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import SessionLocal
+from app.models.user import User
+from app.services.daily_nutrition import rebuild_user, verify_user
+
+
+def user_ids(user_id, batch_size):
+    if user_id is not None:
+        yield user_id
+        return
+    last_id = 0
+    while True:
+        db = SessionLocal()
+        try:
+            ids = [
+                row.id for row in
+                db.query(User.id).filter(User.id > last_id).order_by(User.id).limit(batch_size).all()
+            ]
+        finally:
+            db.close()
+        if not ids:
+            return
+        yield from ids
+        last_id = ids[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild or verify the daily_nutrition rollup")
+    parser.add_argument("--user-id", type=int)
+    parser.add_argument("--verify", action="store_true", help="Report mismatches instead of rebuilding")
+    parser.add_argument("--fix", action="store_true", help="With --verify: rebuild users that have mismatches")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--show", type=int, default=5, help="Mismatches to print per user")
+    args = parser.parse_args()
+
+    users = days = broken = 0
+    started = time.perf_counter()
+    for user_id in user_ids(args.user_id, args.batch_size):
+        db = SessionLocal()
+        try:
+            if args.verify:
+                mismatches = verify_user(db, user_id)
+                if mismatches:
+                    broken += 1
+                    print(f"  ✗ пользователь {user_id}: {len(mismatches)} расхождений")
+                    for item in mismatches[:args.show]:
+                        print(f"      {item['date']} {item['field']}: {item['stored']} ≠ {item['expected']}")
+                    if args.fix:
+                        days += rebuild_user(db, user_id)
+                        db.commit()
+            else:
+                days += rebuild_user(db, user_id)
+                db.commit()
+        except Exception as e:
+            db.rollback()
+            broken += 1
+            print(f"  ✗ пользователь {user_id}: ошибка {e}")
+        finally:
+            db.close()
+        users += 1
+        if users % 100 == 0:
+            print(f"  … {users} пользователей ({time.perf_counter() - started:.1f} с)")
+
+    elapsed = time.perf_counter() - started
+    if args.verify:
+        print(f"📊 Проверено пользователей: {users}, с расхождениями: {broken}" + (f", пересобрано дней: {days}" if args.fix else ""))
+        if broken and not args.fix:
+            sys.exit(1)
+    else:
+        print(f"✅ Пересобрано: {users} пользователей, {days} дней за {elapsed:.1f} с" + (f", ошибок: {broken}" if broken else ""))
+
+
+if __name__ == "__main__":
+    main()
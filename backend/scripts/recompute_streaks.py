@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Пересчёт серий (streak_count / last_streak_date) всех пользователей по истории.
+
+Серия — число подряд идущих локальных дней (по tz_offset_minutes пользователя),
+в которые калорий набрано не меньше цели из онбординга; серия жива, если
+последний такой день — сегодня или вчера. Дни берутся из daily_nutrition,
+поэтому после миграции сначала выполните scripts/rebuild_daily_nutrition.py
+(или запустите этот скрипт с --rebuild-rollup).
+
+Запуск: python3 scripts/recompute_streaks.py [--user-id 42] [--rebuild-rollup] [--dry-run]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import SessionLocal
+from app.models.user import User
+from app.services.daily_nutrition import rebuild_user
+from app.services.streak_service import recompute_user
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute user streaks from meal history")
+    parser.add_argument("--user-id", type=int)
+    parser.add_argument("--rebuild-rollup", action="store_true", help="Rebuild daily_nutrition for each user first")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without saving them")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    users = changed = failed = 0
+    last_id = 0
+    started = time.perf_counter()
+    while True:
+        db = SessionLocal()
+        try:
+            query = db.query(User).filter(User.id > last_id).order_by(User.id)
+            if args.user_id is not None:
+                query = query.filter(User.id == args.user_id)
+            batch = query.limit(args.batch_size).all()
+            if not batch:
+                break
+            last_id = batch[-1].id
+            for user in batch:
+                users += 1
+                before = (user.streak_count or 0, user.last_streak_date)
+                try:
+                    with db.begin_nested():
+                        if args.rebuild_rollup:
+                            rebuild_user(db, user.id)
+                        if recompute_user(db, user):
+                            changed += 1
+                            print(f"  {user.id}: {before[0]} → {user.streak_count} (последний день {user.last_streak_date})")
+                except Exception as e:
+                    failed += 1
+                    print(f"  ✗ пользователь {user.id}: {e}")
+            if args.dry_run:
+                db.rollback()
+            else:
+                db.commit()
+        finally:
+            db.close()
+
+    elapsed = time.perf_counter() - started
+    suffix = " (dry run, ничего не сохранено)" if args.dry_run else ""
+    print(f"✅ Пользователей: {users}, изменено серий: {changed}, ошибок: {failed}, {elapsed:.1f} с{suffix}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Фоновое перевычисление AI-обогащения штрихкодов (fiber/sugar/sodium/health_score)
+после смены модели (ANTHROPIC_MODEL) или промпта товара.
+
+Берёт штрихкоды, у которых нет записи для текущей пары (модель, версия промпта),
+и заново вызывает AI по сохранённым данным товара. Старые записи продолжают
+отдаваться при сканировании, пока новая не готова. Повторный запуск продолжает
+с того места, где остановился (обработанные штрихкоды уже имеют текущую запись).
+
+Запуск: python3 scripts/reenrich_barcodes.py --concurrency 4 --batch-size 200
+Удалить устаревшие записи после перевычисления: --prune
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.ai_service import ai_service
+from app.services.barcode_enrichment import barcode_enrichment_service
+
+
+async def reenrich(batch_size, concurrency, limit):
+    model, prompt_version = barcode_enrichment_service.version
+    print(f"Модель {model}, версия промпта {prompt_version}")
+
+    totals = {"enriched": 0, "failed": 0}
+    last_id = 0
+    started = time.perf_counter()
+    while limit is None or totals["enriched"] + totals["failed"] < limit:
+        size = batch_size if limit is None else min(batch_size, limit - totals["enriched"] - totals["failed"])
+        entries = await asyncio.to_thread(barcode_enrichment_service.stale_entries, size, last_id)
+        if not entries:
+            break
+        last_id = entries[-1][0]
+        outcome = await barcode_enrichment_service.reenrich(entries, concurrency)
+        for key, value in outcome.items():
+            totals[key] += value
+        elapsed = time.perf_counter() - started
+        print(f"  ✓ обновлено {totals['enriched']:,}, ошибок {totals['failed']:,} ({elapsed:.1f} с)")
+
+    await ai_service.close()
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-enrich barcodes for the current AI model and prompt version")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--limit", type=int, help="Stop after N barcodes")
+    parser.add_argument("--prune", action="store_true", help="Delete outdated rows that already have a current one")
+    args = parser.parse_args()
+
+    if not ai_service.is_configured:
+        print("❌ ANTHROPIC_API_KEY не задан")
+        sys.exit(1)
+
+    totals = asyncio.run(reenrich(args.batch_size, args.concurrency, args.limit))
+    print(f"📊 Обновлено: {totals['enriched']:,}, ошибок: {totals['failed']:,}")
+
+    if args.prune:
+        deleted = barcode_enrichment_service.prune()
+        print(f"🗑  Удалено устаревших записей: {deleted:,}")
+
+
+if __name__ == "__main__":
+    main()